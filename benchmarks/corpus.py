@@ -0,0 +1,214 @@
+"""Generates synthetic consent strings with controlled shapes to benchmark
+the decoders against: bitfield or range encoded vendors, small or maximal
+max vendor ids, many publisher restrictions and every non core segment.
+"""
+
+import base64
+import random
+from datetime import datetime
+from typing import Dict, Iterable, List, Set, Tuple
+
+CREATED = datetime(2020, 9, 5, 21, 50, 29)
+
+
+class BitWriter:
+
+    """Writes fields sequentially into an integer, with the same layout
+    the Reader expects, and encodes the result as url safe base64.
+    """
+
+    def __init__(self):
+        self._value = 0
+        self._size = 0
+
+    def write_int(self, value: int, n: int):
+        self._value = (self._value << n) | (value & ((1 << n) - 1))
+        self._size += n
+
+    def write_bool(self, value: bool):
+        self.write_int(int(value), 1)
+
+    def write_time(self, value: datetime):
+        self.write_int(int(value.timestamp() * 10), 36)
+
+    def write_string(self, value: str):
+        for character in value:
+            self.write_int(ord(character) - ord("A"), 6)
+
+    def write_bitfield(self, ids: Iterable[int], n: int):
+        self.write_int(sum(1 << (n - id) for id in set(ids) if 0 < id <= n), n)
+
+    def write_range(self, ranges: List[Tuple[int, int]]):
+        for start, end in ranges:
+            self.write_bool(start != end)
+            self.write_int(start, 16)
+            if start != end:
+                self.write_int(end, 16)
+
+    def encode(self) -> str:
+        padding = -self._size % 8
+        data = (self._value << padding).to_bytes((self._size + padding) // 8, "big")
+        return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def to_ranges(ids: Iterable[int]) -> List[Tuple[int, int]]:
+    ranges = []
+    for id in sorted(set(ids)):
+        if ranges and ranges[-1][1] == id - 1:
+            ranges[-1] = (ranges[-1][0], id)
+        else:
+            ranges.append((id, id))
+    return ranges
+
+
+def random_vendors(generator: random.Random, max_vendor_id: int, runs: int) -> Set[int]:
+    """Picks a set of vendors made of the given number of consecutive runs,
+    so range encoding needs exactly that many entries.
+    """
+    starts = sorted(generator.sample(range(1, max_vendor_id + 1, 2), runs))
+    vendors = set()
+    for index, start in enumerate(starts):
+        limit = starts[index + 1] - 1 if index + 1 < len(starts) else max_vendor_id + 1
+        vendors.update(
+            range(start, generator.randint(start + 1, max(start + 1, limit)))
+        )
+    vendors.add(max_vendor_id)
+    return vendors
+
+
+def write_vendors(
+    writer: BitWriter, vendors: Set[int], max_vendor_id: int, range_encoding: bool
+):
+    writer.write_int(max_vendor_id, 16)
+    writer.write_bool(range_encoding)
+    if range_encoding:
+        ranges = to_ranges(vendors)
+        writer.write_int(len(ranges), 12)
+        writer.write_range(ranges)
+    else:
+        writer.write_bitfield(vendors, max_vendor_id)
+
+
+def v1_consent(
+    generator: random.Random, max_vendor_id: int, runs: int, range_encoding: bool
+) -> str:
+    writer = BitWriter()
+    writer.write_int(1, 6)
+    writer.write_time(CREATED)
+    writer.write_time(CREATED)
+    writer.write_int(generator.randint(1, 4095), 12)
+    writer.write_int(generator.randint(1, 4095), 12)
+    writer.write_int(0, 6)
+    writer.write_string("EN")
+    writer.write_int(generator.randint(1, 4095), 12)
+    writer.write_bitfield(generator.sample(range(1, 25), 5), 24)
+    vendors = random_vendors(generator, max_vendor_id, runs)
+    writer.write_int(max_vendor_id, 16)
+    writer.write_bool(range_encoding)
+    if range_encoding:
+        ranges = to_ranges(vendors)
+        writer.write_bool(False)
+        writer.write_int(len(ranges), 12)
+        writer.write_range(ranges)
+    else:
+        writer.write_bitfield(vendors, max_vendor_id)
+    return writer.encode()
+
+
+def v2_consent(
+    generator: random.Random,
+    max_vendor_id: int,
+    runs: int,
+    range_encoding: bool,
+    restrictions: int = 0,
+    non_core: bool = False,
+) -> str:
+    writer = BitWriter()
+    writer.write_int(2, 6)
+    writer.write_time(CREATED)
+    writer.write_time(CREATED)
+    writer.write_int(generator.randint(1, 4095), 12)
+    writer.write_int(generator.randint(1, 4095), 12)
+    writer.write_int(1, 6)
+    writer.write_string("EN")
+    writer.write_int(generator.randint(1, 4095), 12)
+    writer.write_int(2, 6)
+    writer.write_bool(True)
+    writer.write_bool(False)
+    writer.write_bitfield(generator.sample(range(1, 13), 2), 12)
+    writer.write_bitfield(generator.sample(range(1, 25), 10), 24)
+    writer.write_bitfield(generator.sample(range(1, 25), 10), 24)
+    writer.write_bool(False)
+    writer.write_string("ES")
+    for _ in range(2):
+        vendors = random_vendors(generator, max_vendor_id, runs)
+        write_vendors(writer, vendors, max_vendor_id, range_encoding)
+    writer.write_int(restrictions, 12)
+    for _ in range(restrictions):
+        writer.write_int(generator.randint(1, 24), 6)
+        writer.write_int(generator.randint(0, 3), 2)
+        ranges = to_ranges(random_vendors(generator, max_vendor_id, 10))
+        writer.write_int(len(ranges), 12)
+        writer.write_range(ranges)
+    segments = [writer.encode()]
+    if non_core:
+        for segment_type in (1, 2):
+            writer = BitWriter()
+            writer.write_int(segment_type, 3)
+            vendors = random_vendors(generator, max_vendor_id, runs)
+            write_vendors(writer, vendors, max_vendor_id, range_encoding)
+            segments.append(writer.encode())
+        writer = BitWriter()
+        writer.write_int(3, 3)
+        writer.write_bitfield(generator.sample(range(1, 25), 10), 24)
+        writer.write_bitfield(generator.sample(range(1, 25), 10), 24)
+        writer.write_int(4, 6)
+        writer.write_bitfield([1, 3], 4)
+        writer.write_bitfield([2], 4)
+        segments.append(writer.encode())
+    return ".".join(segments)
+
+
+SCENARIOS: Dict[str, Tuple] = {
+    "v1_bitfield": (
+        v1_consent,
+        dict(max_vendor_id=700, runs=100, range_encoding=False),
+    ),
+    "v1_range": (v1_consent, dict(max_vendor_id=700, runs=100, range_encoding=True)),
+    "v2_bitfield_small": (
+        v2_consent,
+        dict(max_vendor_id=150, runs=20, range_encoding=False),
+    ),
+    "v2_bitfield_max": (
+        v2_consent,
+        dict(max_vendor_id=65535, runs=500, range_encoding=False),
+    ),
+    "v2_range_small": (
+        v2_consent,
+        dict(max_vendor_id=150, runs=20, range_encoding=True),
+    ),
+    "v2_range_max": (
+        v2_consent,
+        dict(max_vendor_id=65535, runs=2000, range_encoding=True),
+    ),
+    "v2_restrictions": (
+        v2_consent,
+        dict(max_vendor_id=800, runs=100, range_encoding=True, restrictions=60),
+    ),
+    "v2_non_core": (
+        v2_consent,
+        dict(max_vendor_id=800, runs=100, range_encoding=False, non_core=True),
+    ),
+}
+
+
+def corpus(scenario: str, size: int, seed: int = 0) -> List[str]:
+    """Generates size consent strings with the shape of the scenario.
+
+    :param scenario: One of the SCENARIOS names.
+    :param size: Number of consent strings to generate.
+    :param seed: Seed of the random generator, to get the same corpus again.
+    """
+    generate, params = SCENARIOS[scenario]
+    generator = random.Random(f"{scenario}-{seed}")
+    return [generate(generator, **params) for _ in range(size)]
@@ -0,0 +1,68 @@
+"""Measures the memory retained by every decoded consent over the synthetic
+corpus, right after decoding and once every section has been loaded.
+
+Usage (from the repository root):
+
+    python benchmarks/memory.py
+    python benchmarks/memory.py --scenarios v2_bitfield_small --size 1000
+"""
+
+import argparse
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from corpus import SCENARIOS, corpus  # noqa: E402
+
+from iab_tcf import decode  # noqa: E402
+
+
+def retained(consents: List[str], build: Callable) -> float:
+    """Average number of bytes still allocated per consent after building
+    every consent and collecting the garbage, excluding the strings.
+    """
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    objects = [build(consent) for consent in consents]
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del objects
+    return size / len(consents)
+
+
+def measure(scenario: str, size: int) -> Dict[str, float]:
+    consents = corpus(scenario, size)
+    return {
+        "decoded": retained(consents, decode),
+        "loaded": retained(consents, lambda consent: decode(consent).load()),
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--scenarios", nargs="*", default=sorted(SCENARIOS), choices=sorted(SCENARIOS)
+    )
+    parser.add_argument(
+        "--size", type=int, default=200, help="Consent strings per scenario."
+    )
+    args = parser.parse_args(argv)
+
+    print(f"{'scenario':<18} {'decoded':>12} {'loaded':>12}")
+    for scenario in args.scenarios:
+        result = measure(scenario, args.size)
+        print(
+            f"{scenario:<18} {result['decoded']:>11,.0f}B {result['loaded']:>11,.0f}B"
+        )
+
+
+if __name__ == "__main__":
+    main()
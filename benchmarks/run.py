@@ -0,0 +1,218 @@
+"""Benchmarks the decoders over the synthetic corpus, reporting throughput,
+latency percentiles and allocations per operation and scenario.
+
+Usage (from the repository root):
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --compare results.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import tracemalloc
+from pathlib import Path
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from corpus import SCENARIOS, corpus  # noqa: E402
+
+from iab_tcf import (
+    base64_decode,
+    check,
+    decode,
+    decode_v1,
+    decode_v2,
+    segments,
+    version,
+)  # noqa: E402
+from iab_tcf.iab_tcf_v2 import ConsentV2  # noqa: E402
+
+Call = Tuple[Callable, Tuple]
+
+
+def _operations(scenario: str, consents: List[str]) -> Dict[str, List[Call]]:
+    """Builds, for every operation that applies to the scenario, the list of
+    calls to measure, with anything that isn't being measured prepared ahead.
+    """
+    generator = random.Random(scenario)
+    is_v1 = scenario.startswith("v1")
+    operations = {
+        "decode": [(decode, (consent,)) for consent in consents],
+        "version": [
+            (lambda core: version(base64_decode(core)), (segments(consent)[0],))
+            for consent in consents
+        ],
+    }
+    if is_v1:
+        operations["decode_v1"] = [(decode_v1, (consent,)) for consent in consents]
+        operations["decode_v1+load"] = [
+            (lambda consent: decode_v1(consent).load(), (consent,))
+            for consent in consents
+        ]
+        decoded = [decode_v1(consent).load() for consent in consents]
+        max_vendor_id = decoded[0].max_vendor_id
+    else:
+        operations["decode_v2"] = [(decode_v2, (consent,)) for consent in consents]
+        operations["decode_v2+load"] = [
+            (lambda consent: decode_v2(consent).load(), (consent,))
+            for consent in consents
+        ]
+        decoded = [decode_v2(consent).load() for consent in consents]
+        max_vendor_id = decoded[0].max_consent_vendor_id
+        operations["get_restriction"] = [
+            (
+                ConsentV2.get_restriction,
+                (
+                    consent,
+                    generator.randint(1, max_vendor_id),
+                    generator.randint(1, 24),
+                ),
+            )
+            for consent in decoded
+            for _ in range(10)
+        ]
+        if "." in consents[0]:
+            operations["read_non_core_segments"] = [
+                (
+                    ConsentV2(
+                        base64_decode(segments(consent)[0])
+                    ).read_non_core_segments,
+                    (segments(consent),),
+                )
+                for consent in consents
+            ]
+    operations["is_vendor_allowed"] = [
+        (consent.is_vendor_allowed, (generator.randint(1, max_vendor_id),))
+        for consent in decoded
+        for _ in range(10)
+    ]
+    operations["check"] = [
+        (check, (consent, generator.randint(1, max_vendor_id), (1,)))
+        for consent in consents
+        for _ in range(10)
+    ]
+    return operations
+
+
+def _percentile(timings: List[int], percentile: float) -> float:
+    return timings[min(len(timings) - 1, int(len(timings) * percentile))] / 1000
+
+
+def measure(calls: List[Call], rounds: int) -> Dict[str, Any]:
+    """Runs every call rounds times, measuring each one independently, and
+    then once more under tracemalloc to measure the memory allocated.
+    """
+    timings = []
+    for _ in range(rounds):
+        for function, args in calls:
+            start = perf_counter_ns()
+            function(*args)
+            timings.append(perf_counter_ns() - start)
+    timings.sort()
+    peaks = []
+    tracemalloc.start()
+    for function, args in calls:
+        tracemalloc.clear_traces()
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak() if hasattr(tracemalloc, "reset_peak") else None
+        function(*args)
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    return {
+        "calls": len(timings),
+        "ops_per_sec": round(len(timings) / (sum(timings) / 1e9), 1),
+        "p50_us": round(_percentile(timings, 0.50), 2),
+        "p90_us": round(_percentile(timings, 0.90), 2),
+        "p99_us": round(_percentile(timings, 0.99), 2),
+        "peak_alloc_bytes": round(sum(peaks) / len(peaks)),
+    }
+
+
+def _commit() -> Optional[str]:
+    try:
+        output = subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL
+        )
+        return output.decode().strip()
+    except Exception:
+        return None
+
+
+def run(
+    scenarios: List[str], size: int, rounds: int, operations: Optional[List[str]]
+) -> Dict[str, Any]:
+    results = []
+    for scenario in scenarios:
+        consents = corpus(scenario, size)
+        for operation, calls in _operations(scenario, consents).items():
+            if operations and operation not in operations:
+                continue
+            result = {"scenario": scenario, "operation": operation}
+            result.update(measure(calls, rounds))
+            results.append(result)
+            print(_format(result), file=sys.stderr)
+    return {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "size": size,
+        "rounds": rounds,
+        "results": results,
+    }
+
+
+def _format(result: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> str:
+    line = (
+        f"{result['scenario']:<18} {result['operation']:<24} "
+        f"{result['ops_per_sec']:>12,.0f} ops/s  p50 {result['p50_us']:>9.2f}us  "
+        f"p99 {result['p99_us']:>9.2f}us  alloc {result['peak_alloc_bytes']:>9,}B"
+    )
+    if baseline:
+        line += f"  x{result['ops_per_sec'] / baseline['ops_per_sec']:.2f} throughput"
+    return line
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]):
+    previous = {
+        (result["scenario"], result["operation"]): result
+        for result in baseline["results"]
+    }
+    print(f"Comparing {current['commit']} against {baseline['commit']}")
+    for result in current["results"]:
+        print(_format(result, previous.get((result["scenario"], result["operation"]))))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--scenarios", nargs="*", default=sorted(SCENARIOS), choices=sorted(SCENARIOS)
+    )
+    parser.add_argument("--operations", nargs="*", help="Only run these operations.")
+    parser.add_argument(
+        "--size", type=int, default=200, help="Consent strings per scenario."
+    )
+    parser.add_argument(
+        "--rounds", type=int, default=5, help="Times every call is measured."
+    )
+    parser.add_argument("--output", help="File where the results are written as JSON.")
+    parser.add_argument(
+        "--compare", help="Results of a previous run to compare against."
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.scenarios, args.size, args.rounds, args.operations)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    if args.compare:
+        compare(results, json.loads(Path(args.compare).read_text()))
+
+
+if __name__ == "__main__":
+    main()
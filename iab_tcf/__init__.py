@@ -1,22 +1,51 @@
-from .bits import Reader
-from .iab_tcf import base64_decode, segments, version
+import importlib
+
+from .bits import Bitfield, RangeIndex, Reader, Writer
+from .cache import CacheInfo, DecodeCache, SegmentCache, SegmentCacheInfo
+from .decoder import decode
+from .exceptions import (
+    ConsentError,
+    ConsentLimitError,
+    InvalidConsentError,
+    UnsupportedVersionError,
+)
+from .iab_tcf import (
+    base64_decode,
+    base64_encode,
+    peek_version,
+    segments,
+    version,
+)
 from .iab_tcf_v1 import ConsentV1, decode_v1
 from .iab_tcf_v2 import ConsentV2, PubRestrictionEntry, decode_v2
+from .masks import ids_to_mask, mask_to_ids
+from .query import check
+from .raw import RawDecoder, decode_raw
+from .serialization import ConsentSerializer, to_dict, to_json
+from .validation import DEFAULT_LIMITS, Limits, validate
+from .v2.aggregator import ConsentAggregator
+from .v2.encoder import encode_v2
+from .v2.gvl import GlobalVendorList
+
+# Attributes imported from their module when they're first accessed, as the
+# modules import asyncio and concurrent.futures, which take longer to import
+# than the rest of the package.
+_LAZY_ATTRIBUTES = {
+    "async_decode": "aio",
+    "async_decode_many": "aio",
+    "DecodeResult": "batch",
+    "decode_many": "batch",
+}
 
 
-def decode(consent: str):
-    """Generic implementation of a IAB TCF decoder.
+def __getattr__(name: str):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
 
-    It detects if the consent received is v1.1 or v2 and returns
-    the appropriate ConsentV1 or ConsentV2 instance.
-    """
 
-    if consent:
-        consent_segments = segments(consent)
-        consent_version = version(base64_decode(consent_segments[0]))
-        if consent_version == 1:
-            return decode_v1(consent_segments[0])
-        elif consent_version == 2:
-            return decode_v2(consent)
-        raise Exception(f"Unable to process a consent with version {consent_version}")
-    raise Exception("Unable to process an empty consent")
+def __dir__():
+    return sorted([*globals(), *_LAZY_ATTRIBUTES])
@@ -0,0 +1,110 @@
+import asyncio
+import os
+from concurrent.futures import Executor
+from time import perf_counter
+from typing import Any, Callable, Iterable, List, Optional
+
+from .batch import DecodeResult, _decode_chunk
+from .decoder import decode
+from .lazy import LazyConsent
+
+# Consent strings up to this length are decoded straight in the event loop,
+# as sending them to an executor costs more than decoding them. The length
+# grows with the max vendor id of bitfields and with the number of ranges,
+# so it measures the cost of decoding either encoding.
+INLINE_LENGTH = 1024
+
+# Maximum time, in seconds, async_decode_many decodes consents inline before
+# letting the event loop run other tasks.
+INLINE_SLICE = 0.001
+
+
+def _decode_loaded(decoder: Callable[[str], Any], consent: str) -> Any:
+    """Decodes a consent with every section loaded, so accessing it later
+    from the event loop doesn't decode anything.
+    """
+    decoded = decoder(consent)
+    if isinstance(decoded, LazyConsent):
+        decoded.load()
+    return decoded
+
+
+async def async_decode(
+    consent: str,
+    executor: Optional[Executor] = None,
+    inline_length: int = INLINE_LENGTH,
+    decoder: Callable[[str], Any] = decode,
+) -> Any:
+    """Decodes a consent string from a coroutine without blocking the event
+    loop: short consents are decoded inline and long ones in an executor.
+    The consent is returned with every section already decoded.
+
+    Cancelling the coroutine cancels the decoding if it hasn't started yet.
+
+    :param consent: base64 encoded consent string.
+    :param executor: Thread or process pool used for the long consents. By
+        default, the default executor of the event loop.
+    :param inline_length: Longest consent string decoded inline.
+    :param decoder: Function used to decode the consent. It must be a module
+        level function to be used with a process pool.
+    """
+    if len(consent) <= inline_length:
+        return _decode_loaded(decoder, consent)
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(executor, _decode_loaded, decoder, consent)
+
+
+async def async_decode_many(
+    consents: Iterable[str],
+    executor: Optional[Executor] = None,
+    concurrency: Optional[int] = None,
+    inline_length: int = INLINE_LENGTH,
+    decoder: Callable[[str], Any] = decode,
+) -> List[DecodeResult]:
+    """Decodes many consent strings from a coroutine, returning a
+    DecodeResult with the input index, the decoded consent and the error
+    raised, if any, for every consent received, in the input order.
+
+    Short consents are decoded inline, giving control back to the event
+    loop every INLINE_SLICE seconds, and long ones are sent to the executor
+    with at most `concurrency` of them in flight, so the consents are read
+    as they are sent. A consent that fails to decode doesn't stop the rest.
+    Cancelling the coroutine cancels every decoding that hasn't started.
+
+    :param consents: Iterable with the base64 encoded consent strings.
+    :param executor: Thread or process pool used for the long consents. By
+        default, the default executor of the event loop.
+    :param concurrency: Maximum number of consents in the executor at once.
+        By default as many as CPUs.
+    :param inline_length: Longest consent string decoded inline.
+    :param decoder: Function used to decode every consent. It must be a
+        module level function to be used with a process pool.
+    """
+    loop = asyncio.get_event_loop()
+    semaphore = asyncio.Semaphore(concurrency or os.cpu_count() or 1)
+    results: List[DecodeResult] = []
+    pending: List[asyncio.Future] = []
+    started = perf_counter()
+    try:
+        for index, consent in enumerate(consents):
+            if len(consent) <= inline_length:
+                results.extend(_decode_chunk(decoder, index, [consent]))
+                if perf_counter() - started > INLINE_SLICE:
+                    await asyncio.sleep(0)
+                    started = perf_counter()
+                continue
+            await semaphore.acquire()
+            started = perf_counter()
+            future = loop.run_in_executor(
+                executor, _decode_chunk, decoder, index, [consent]
+            )
+            future.add_done_callback(lambda _: semaphore.release())
+            pending.append(future)
+        for chunk in await asyncio.gather(*pending):
+            results.extend(chunk)
+    except BaseException:
+        for future in pending:
+            future.cancel()
+        raise
+    results.sort(key=lambda result: result.index)
+    return results
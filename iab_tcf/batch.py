@@ -0,0 +1,232 @@
+import mmap
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .decoder import decode
+from .lazy import LazyConsent
+
+# Size, in bytes, of the newline aligned chunks decode_file splits files in.
+FILE_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+class DecodeResult(NamedTuple):
+    index: int
+    consent: Any
+    error: Optional[Exception]
+
+
+def _decode_chunk(
+    decoder: Callable[[str], Any], start: int, consents: List[str]
+) -> List[DecodeResult]:
+    """Decodes a chunk of consents, fully loading them so they can be sent
+    to another process without the reader and its encoded bytes.
+    """
+    results = []
+    for index, consent in enumerate(consents, start):
+        try:
+            decoded = decoder(consent)
+            if isinstance(decoded, LazyConsent):
+                decoded.load()
+            results.append(DecodeResult(index, decoded, None))
+        except Exception as error:
+            results.append(DecodeResult(index, None, error))
+    return results
+
+
+def _chunks(consents: Iterable[str], chunksize: int) -> Iterator[Tuple[int, List[str]]]:
+    iterator = iter(consents)
+    start = 0
+    while True:
+        chunk = list(islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def decode_many(
+    consents: Iterable[str],
+    workers: Optional[int] = None,
+    chunksize: int = 1024,
+    ordered: bool = True,
+    decoder: Callable[[str], Any] = decode,
+) -> Iterator[DecodeResult]:
+    """Decodes many consent strings spreading the work across a pool of
+    processes, yielding a DecodeResult with the input index, the decoded
+    consent and the error raised, if any, for every consent received.
+
+    The consents are read and sent to the workers in chunks, keeping only
+    a couple of chunks per worker in flight, so any iterable can be
+    processed in bounded memory. A consent that fails to decode doesn't
+    stop the batch.
+
+    :param consents: Iterable with the base64 encoded consent strings.
+    :param workers: Number of processes to use. By default as many as CPUs,
+        and with 1 or less the consents are decoded in this process.
+    :param chunksize: Number of consents sent to a worker at once.
+    :param ordered: If the results must be yielded in the input order. If
+        not, they are yielded as soon as every chunk is decoded.
+    :param decoder: Module level function used to decode every consent.
+    """
+    chunks = _chunks(consents, chunksize)
+    if workers is not None and workers <= 1:
+        for start, chunk in chunks:
+            yield from _decode_chunk(decoder, start, chunk)
+        return
+    window = 2 * (workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        try:
+            for start, chunk in chunks:
+                pending.append(executor.submit(_decode_chunk, decoder, start, chunk))
+                while len(pending) >= window:
+                    for future in _completed(pending, ordered):
+                        yield from future.result()
+            while pending:
+                for future in _completed(pending, ordered):
+                    yield from future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _completed(pending: deque, ordered: bool) -> List:
+    """Removes from pending and returns the next futures to yield: the
+    oldest one if the results are ordered, any finished ones if not.
+    """
+    if ordered:
+        return [pending.popleft()]
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        pending.remove(future)
+    return list(done)
+
+
+def file_chunks(path: str, chunk_size: int = FILE_CHUNK_SIZE) -> List[Tuple[int, int]]:
+    """Splits a file in chunks of about chunk_size bytes that start and end
+    at line boundaries, returning their (start, end) offsets. The file is
+    memory mapped, so only the bytes around each boundary are read.
+
+    :param path: Path of the file.
+    :param chunk_size: Approximate size of every chunk, in bytes.
+    """
+    with open(path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        if not size:
+            return []
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            chunks = []
+            start = 0
+            while start < size:
+                newline = data.find(b"\n", min(start + chunk_size, size) - 1)
+                end = size if newline < 0 else newline + 1
+                chunks.append((start, end))
+                start = end
+            return chunks
+
+
+def _decode_lines(
+    decoder: Callable[[str], Any], data: bytes, offset: int
+) -> Iterator[DecodeResult]:
+    """Decodes every non empty line of data, using as index the offset in
+    the file where the line starts.
+    """
+    for line in data.split(b"\n"):
+        consent = line.strip()
+        if consent:
+            try:
+                yield DecodeResult(offset, decoder(consent.decode("ascii")), None)
+            except Exception as error:
+                yield DecodeResult(offset, None, error)
+        offset += len(line) + 1
+
+
+def load_results(results: Iterable[DecodeResult]) -> List[DecodeResult]:
+    """Returns the results as a list, fully loading the consents so they
+    can be sent to another process without the reader and its encoded
+    bytes. Consents whose sections fail to decode are returned as failures.
+    It's the default process of decode_file.
+
+    :param results: DecodeResult of every consent.
+    """
+    loaded = []
+    for result in results:
+        if isinstance(result.consent, LazyConsent):
+            try:
+                result.consent.load()
+            except Exception as error:
+                result = DecodeResult(result.index, None, error)
+        loaded.append(result)
+    return loaded
+
+
+def _decode_file_chunk(
+    path: str,
+    start: int,
+    end: int,
+    decoder: Callable[[str], Any],
+    process: Callable[[Iterator[DecodeResult]], Any],
+) -> Any:
+    """Decodes the lines between the offsets of a memory mapped file, and
+    returns what process returns for their results.
+    """
+    with open(path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return process(_decode_lines(decoder, data[start:end], start))
+
+
+def decode_file(
+    path: str,
+    process: Callable[[Iterator[DecodeResult]], Any] = load_results,
+    workers: Optional[int] = None,
+    chunk_size: int = FILE_CHUNK_SIZE,
+    decoder: Callable[[str], Any] = decode,
+) -> Iterator[Any]:
+    """Decodes a file with a consent string per line spreading the work
+    across a pool of processes, yielding, in file order, what process
+    returns for the results of every chunk of the file.
+
+    The file is split in chunks aligned to lines, and only their offsets are
+    sent to the workers, which memory map the file and read their chunk from
+    it at once. process receives an iterator with a DecodeResult for every
+    non empty line of the chunk, whose index is the offset in the file where
+    the line starts, and runs in the worker, so it can aggregate the results
+    or write them into a file per chunk, returning something small. By
+    default the results are returned as a list with the consents fully
+    loaded (see load_results), which sends every consent back through a
+    pipe, so large files should be given a process that aggregates them. A
+    line that fails to decode doesn't stop the file.
+
+    :param path: Path of the file with the consent strings.
+    :param process: Module level function that receives the results of a
+        chunk and returns what is yielded for it.
+    :param workers: Number of processes to use. By default as many as CPUs,
+        and with 1 or less the file is decoded in this process.
+    :param chunk_size: Approximate size of every chunk, in bytes.
+    :param decoder: Module level function used to decode every consent.
+    """
+    chunks = file_chunks(path, chunk_size)
+    if workers is not None and workers <= 1:
+        for start, end in chunks:
+            yield _decode_file_chunk(path, start, end, decoder, process)
+        return
+    window = 2 * (workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        try:
+            for start, end in chunks:
+                pending.append(
+                    executor.submit(
+                        _decode_file_chunk, path, start, end, decoder, process
+                    )
+                )
+                while len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
@@ -1,8 +1,171 @@
+from array import array
+from bisect import bisect_right
+from calendar import timegm
+from collections.abc import Mapping
 from datetime import datetime
-from typing import Dict, List, Tuple
+from itertools import chain
+from typing import Iterable, Iterator, List, Tuple
 
 from bitarray import bitarray
-from bitarray.util import ba2int
+from bitarray.util import int2ba
+
+# Every byte value with its bits in reverse order, to turn the bits packed
+# most significant first into an integer where the first bit is the lowest.
+_REVERSED_BITS = bytes(int(f"{byte:08b}"[::-1], 2) for byte in range(256))
+
+
+class Bitfield(Mapping):
+
+    """Represents a read-only bitfield as a mapping where the key is the bit
+    position (starting by 1) and the value is True if the bit is 1 and False
+    if the bit is 0.
+
+    The bits are kept packed in a bytes object, so lookups don't need a
+    python object per bit and the memory used is one bit per position.
+
+    :param bits: The bits packed in bytes, most significant bit first.
+    :param length: Number of positions the bitfield contains.
+    """
+
+    __slots__ = ("_bits", "_length")
+
+    def __init__(self, bits: bytes, length: int):
+        self._bits = bytes(bits)
+        self._length = length
+
+    @classmethod
+    def from_int(cls, value: int, length: int) -> "Bitfield":
+        """Builds a bitfield from the integer representation of its bits,
+        where the first position is the most significant bit.
+
+        :param value: Integer with the bits of the bitfield.
+        :param length: Number of positions the bitfield contains.
+        """
+        padding = -length % 8
+        return cls((value << padding).to_bytes((length + padding) // 8, "big"), length)
+
+    @classmethod
+    def from_mask(cls, mask: int, length: int) -> "Bitfield":
+        """Builds a bitfield from an integer mask where the position n is
+        the bit n - 1, the inverse of to_mask. Bits past the length are
+        ignored.
+
+        :param mask: Integer mask with the positions set.
+        :param length: Number of positions the bitfield contains.
+        """
+        mask &= (1 << length) - 1
+        bits = mask.to_bytes((length + 7) // 8, "little")
+        return cls(bits.translate(_REVERSED_BITS), length)
+
+    def to_int(self) -> int:
+        """Returns the integer representation of the bits of the bitfield,
+        where the first position is the most significant bit.
+        """
+        return int.from_bytes(self._bits, "big") >> (-self._length % 8)
+
+    def to_mask(self) -> int:
+        """Returns the positions set as an integer mask where the position
+        n is the bit n - 1, so masks of bitfields with different lengths
+        line up. See mask_to_ids and ids_to_mask.
+        """
+        return int.from_bytes(self._bits.translate(_REVERSED_BITS), "little")
+
+    def __getitem__(self, key: int) -> bool:
+        if key not in self:
+            raise KeyError(key)
+        index = key - 1
+        return bool(self._bits[index >> 3] >> (7 - (index & 7)) & 1)
+
+    def __contains__(self, key) -> bool:
+        try:
+            return 0 < key <= self._length
+        except TypeError:
+            return False
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(1, self._length + 1))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Bitfield):
+            return self._length == other._length and self._bits == other._bits
+        return super().__eq__(other)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.items())})"
+
+
+class RangeIndex(Mapping):
+
+    """Represents a set of (start, end) ranges as a read-only mapping where
+    every id covered by any of the ranges is a key with value True.
+
+    The ranges are sorted and merged on creation into parallel arrays of
+    starts and ends, so checking if an id is covered is a binary search.
+
+    :param ranges: The (start, end) ranges, both ends included.
+    """
+
+    __slots__ = ("_starts", "_ends", "_size")
+
+    def __init__(self, ranges: Iterable[Tuple[int, int]]):
+        self._starts = array("L")
+        self._ends = array("L")
+        for start, end in sorted(ranges):
+            if start > end:
+                continue
+            if self._ends and start <= self._ends[-1] + 1:
+                self._ends[-1] = max(self._ends[-1], end)
+            else:
+                self._starts.append(start)
+                self._ends.append(end)
+        self._size = sum(self._ends) - sum(self._starts) + len(self._starts)
+
+    @property
+    def ranges(self) -> List[Tuple[int, int]]:
+        """The sorted and merged (start, end) ranges."""
+        return list(zip(self._starts, self._ends))
+
+    def to_mask(self) -> int:
+        """Returns the ids covered as an integer mask where the id n is the
+        bit n - 1, like Bitfield.to_mask.
+        """
+        mask = 0
+        for start, end in zip(self._starts, self._ends):
+            if end > 0:
+                start = max(start, 1)
+                mask |= ((1 << (end - start + 1)) - 1) << (start - 1)
+        return mask
+
+    def __getitem__(self, key: int) -> bool:
+        if key not in self:
+            raise KeyError(key)
+        return True
+
+    def __contains__(self, key) -> bool:
+        try:
+            index = bisect_right(self._starts, key) - 1
+        except TypeError:
+            return False
+        return index >= 0 and key <= self._ends[index]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[int]:
+        return chain.from_iterable(
+            range(start, end + 1) for start, end in zip(self._starts, self._ends)
+        )
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, RangeIndex):
+            return self._starts == other._starts and self._ends == other._ends
+        return super().__eq__(other)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.ranges})"
 
 
 class Reader:
@@ -10,13 +173,47 @@ class Reader:
     """Represents a bit reader that can extract bits sequentially from
     a bytes consent and return a representation in different formats.
 
+    The consent is converted once into an integer and every field is
+    extracted from it with shifts and masks, so no intermediate bit
+    containers are built while decoding. As shifting an integer costs
+    proportionally to its size, consents longer than MAX_INT_BYTES are
+    instead read from the bytes that contain every field. Bits past the
+    end of the consent are read as 0.
+
     :param consent: The consent to process in bytes.
     """
 
+    __slots__ = ("_pointer", "_consent", "_size", "_value")
+
+    MAX_INT_BYTES = 2048
+
     def __init__(self, consent: bytes):
         self._pointer = 0
-        self._consent = bitarray(endian="big")
-        self._consent.frombytes(consent)
+        self._consent = bytes(consent)
+        self._size = len(self._consent) * 8
+        self._value = None
+        if len(self._consent) <= self.MAX_INT_BYTES:
+            self._value = int.from_bytes(self._consent, "big")
+
+    @property
+    def position(self) -> int:
+        """Current position of the pointer, in bits."""
+        return self._pointer
+
+    def seek(self, position: int):
+        """Moves the pointer to an absolute bit position so the next
+        read starts from there.
+
+        :param position: Bit position to move the pointer to.
+        """
+        self._pointer = position
+
+    def skip(self, n: int):
+        """Advances the pointer without extracting the bits.
+
+        :param n: Number of bits to skip.
+        """
+        self._pointer += n
 
     def read_bits(self, n: int) -> bitarray:
         """Reads the number of bits requested from the pointer position
@@ -25,12 +222,16 @@ class Reader:
 
         :param n: Number of bits to retrieve.
         """
-        self._pointer += n
-        return self._consent[self._pointer - n : self._pointer]
+        return int2ba(self.read_int(n), length=n, endian="big") if n else bitarray()
 
     def read_bool(self) -> bool:
         """Reads a bit and returns the value as boolean."""
-        return self.read_bits(1).all()
+        position = self._pointer
+        self._pointer += 1
+        try:
+            return bool(self._consent[position >> 3] >> (7 - (position & 7)) & 1)
+        except IndexError:
+            return False
 
     def read_int(self, n: int) -> int:
         """Reads certain number of bits from the pointer position
@@ -38,8 +239,19 @@ class Reader:
 
         :param n: Number of bits to retrieve and transform into int.
         """
-        bits = self.read_bits(n)
-        return ba2int(bits) if bits else 0
+        self._pointer += n
+        if self._value is None:
+            return self._read_int_from_bytes(n)
+        shift = self._size - self._pointer
+        if shift >= 0:
+            return (self._value >> shift) & ((1 << n) - 1)
+        return (self._value << -shift) & ((1 << n) - 1)
+
+    def _read_int_from_bytes(self, n: int) -> int:
+        first, last = (self._pointer - n) >> 3, (self._pointer + 7) >> 3
+        chunk = self._consent[first:last]
+        value = int.from_bytes(chunk, "big") << ((last - first - len(chunk)) << 3)
+        return (value >> ((last << 3) - self._pointer)) & ((1 << n) - 1)
 
     def read_time(self) -> datetime:
         """Reads 36 bits (the length TCF uses for timestamps) and transforms
@@ -60,16 +272,16 @@ class Reader:
         """
         return b"".join([self.read_character() for _ in range(n)])
 
-    def read_bitfield(self, n: int) -> Dict[int, bool]:
+    def read_bitfield(self, n: int) -> Bitfield:
         """Reads certain number of bits from the pointer position
-        and returns the value as a dictionary. The key is the bit
+        and returns the value as a Bitfield mapping. The key is the bit
         position (starting by 1) and the value is True if the bit is
         1 and False if the bit is 0.
 
         :param n: Number of bits to retrieve and transform into the
-            dictionary. The dictionary will have as many keys as n.
+            mapping. The mapping will have as many keys as n.
         """
-        return {i + 1: self.read_bool() for i in range(n)}
+        return Bitfield.from_int(self.read_int(n), n)
 
     def read_range(self, n: int) -> List[Tuple[int, int]]:
         """Reads a complex "ranged" type from the reader given
@@ -86,8 +298,92 @@ class Reader:
         """
         ranges = []
         for _ in range(n):
-            is_range = self.read_bool()
-            start = self.read_int(16)
-            end = start if not is_range else self.read_int(16)
+            entry = self.read_int(17)
+            start = entry & 0xFFFF
+            end = self.read_int(16) if entry >> 16 else start
             ranges.append((start, end))
         return ranges
+
+    def skip_range(self, n: int):
+        """Advances the pointer past a complex "ranged" type without
+        building the ranges, following the same layout read_range expects.
+
+        :param n: Number of ranges we are going to skip.
+        """
+        for _ in range(n):
+            self.skip(32 if self.read_bool() else 16)
+
+
+class Writer:
+
+    """Represents a bit writer that appends fields sequentially with the
+    same layout the Reader extracts them, and returns the result in bytes.
+
+    Every field is kept as a string of binary digits and they are all
+    joined once when the bytes are requested, so writing a field doesn't
+    depend on the size of what has been written before.
+    """
+
+    def __init__(self):
+        self._fields: List[str] = []
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def write_int(self, value: int, n: int):
+        """Writes an integer using n bits.
+
+        :param value: The value to write, it must fit in n bits.
+        :param n: Number of bits to use.
+        """
+        if n:
+            self._fields.append(format(value & ((1 << n) - 1), f"0{n}b"))
+            self._size += n
+
+    def write_bool(self, value: bool):
+        """Writes a boolean as a single bit."""
+        self.write_int(1 if value else 0, 1)
+
+    def write_time(self, value: datetime):
+        """Writes an utc datetime in 36 bits, as deciseconds since the epoch."""
+        self.write_int(timegm(value.utctimetuple()) * 10, 36)
+
+    def write_string(self, value: bytes):
+        """Writes a string of characters starting with A, 6 bits each."""
+        for character in value:
+            self.write_int(character - b"A"[0], 6)
+
+    def write_bitfield(self, bitfield: "Mapping[int, bool]", n: int):
+        """Writes n bits, where the bit in each position (starting by 1)
+        is set if the bitfield maps that position to True.
+
+        :param bitfield: Mapping of position to bool, like a Bitfield.
+        :param n: Number of bits to write.
+        """
+        if isinstance(bitfield, Bitfield) and len(bitfield) == n:
+            value = bitfield.to_int()
+        else:
+            value = sum(
+                1 << (n - key)
+                for key, enabled in bitfield.items()
+                if enabled and 0 < key <= n
+            )
+        self.write_int(value, n)
+
+    def write_range(self, ranges: List[Tuple[int, int]]):
+        """Writes a complex "ranged" type, the reverse of Reader.read_range.
+
+        :param ranges: The (start, end) ranges to write.
+        """
+        for start, end in ranges:
+            self.write_bool(start != end)
+            self.write_int(start, 16)
+            if start != end:
+                self.write_int(end, 16)
+
+    def to_bytes(self) -> bytes:
+        """Returns the bits written so far, padded with 0 to complete a byte."""
+        padding = -self._size % 8
+        value = int("".join(self._fields), 2) if self._fields else 0
+        return (value << padding).to_bytes((self._size + padding) // 8, "big")
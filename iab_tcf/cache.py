@@ -0,0 +1,295 @@
+import copy
+import threading
+from collections import OrderedDict, defaultdict
+from time import monotonic, perf_counter
+from typing import Any, Callable, Iterable, NamedTuple, Optional, Tuple
+
+from . import instrumentation
+from .decoder import decode
+from .exceptions import InvalidConsentError, UnsupportedVersionError
+from .iab_tcf import base64_decode, peek_version, segments
+from .iab_tcf_v1 import ConsentV1
+from .iab_tcf_v2 import ConsentV2, consent_v2, read_non_core_segment
+from .lazy import LazyConsent
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+
+class SegmentCacheInfo(NamedTuple):
+    core: CacheInfo
+    non_core: CacheInfo
+
+
+class _Entry:
+
+    __slots__ = ("value", "error", "expires", "uses")
+
+    def __init__(
+        self, value: Any, error: Optional[Exception], expires: Optional[float]
+    ):
+        self.value = value
+        self.error = error
+        self.expires = expires
+        self.uses = 1
+
+
+class DecodeCache:
+
+    """Represents a bounded cache of decoded consents keyed by the raw
+    consent string.
+
+    Consents are frozen before being cached, so the same instance can be
+    returned to every caller. Consents that fail to decode are cached as
+    well, without their traceback, and a copy of the exception is raised
+    again on every hit, so raising it doesn't attach frames to the cached one.
+
+    :param maxsize: Maximum number of consent strings kept in the cache.
+    :param policy: Eviction policy, DecodeCache.LRU or DecodeCache.LFU.
+    :param ttl: Seconds an entry stays valid, or None to keep it until evicted.
+    :param decoder: Function used to decode the consents not found in the
+        cache. By default the generic decode.
+    :param negative: If the failures to decode must be cached too.
+    """
+
+    LRU = "lru"
+    LFU = "lfu"
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        policy: str = LRU,
+        ttl: Optional[float] = None,
+        decoder: Optional[Callable[[str], Any]] = None,
+        negative: bool = True,
+    ):
+        if maxsize <= 0:
+            raise ValueError("The cache maxsize must be greater than 0")
+        if policy not in (self.LRU, self.LFU):
+            raise ValueError(f"Unknown eviction policy {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.ttl = ttl
+        self.negative = negative
+        self._decoder = decoder or decode
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._frequencies = defaultdict(OrderedDict)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, consent: str) -> bool:
+        return consent in self._entries
+
+    def decode(self, consent: str):
+        """Returns the decoded consent from the cache, decoding and
+        caching it first if it wasn't there.
+
+        :param consent: base64 encoded consent string.
+        """
+        started = perf_counter() if instrumentation._hooks else None
+        with self._lock:
+            entry = self._lookup(consent)
+        outcome = "hit"
+        if entry is None:
+            outcome = "miss"
+            entry = self._decode(consent)
+            with self._lock:
+                self._store(consent, entry)
+        if started is not None:
+            instrumentation.emit(
+                "cache",
+                perf_counter() - started,
+                outcome=outcome,
+                error=entry.error is not None,
+            )
+        if entry.error is not None:
+            raise copy.copy(entry.error)
+        return entry.value
+
+    __call__ = decode
+
+    def cache_info(self) -> CacheInfo:
+        """Returns the hits, misses and evictions of the cache so far."""
+        with self._lock:
+            return CacheInfo(
+                self._hits, self._misses, self._evictions, self.maxsize, len(self)
+            )
+
+    def cache_clear(self):
+        """Removes every entry from the cache and resets its statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._frequencies.clear()
+            self._hits = self._misses = self._evictions = 0
+
+    def _decode(self, consent: str) -> _Entry:
+        expires = monotonic() + self.ttl if self.ttl is not None else None
+        try:
+            value = self._decoder(consent)
+            # Sections that fail to decode only raise once loaded, so the
+            # consent is frozen before deciding if it's a failure.
+            if isinstance(value, LazyConsent):
+                value.freeze()
+        except Exception as error:
+            if not self.negative:
+                raise
+            # The traceback would keep its frames, with the consent and its
+            # reader, alive as long as the entry is cached.
+            return _Entry(None, error.with_traceback(None), expires)
+        return _Entry(value, None, expires)
+
+    def _lookup(self, consent: str) -> Optional[_Entry]:
+        entry = self._entries.get(consent)
+        if entry is not None and entry.expires is not None:
+            if entry.expires <= monotonic():
+                self._remove(consent, entry)
+                entry = None
+        if entry is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        if self.policy == self.LRU:
+            self._entries.move_to_end(consent)
+        else:
+            self._remove_frequency(consent, entry)
+            entry.uses += 1
+            self._frequencies[entry.uses][consent] = None
+        return entry
+
+    def _store(self, consent: str, entry: _Entry):
+        if consent in self._entries:
+            return
+        while len(self._entries) >= self.maxsize:
+            self._evict()
+        self._entries[consent] = entry
+        if self.policy == self.LFU:
+            self._frequencies[entry.uses][consent] = None
+
+    def _evict(self):
+        if self.policy == self.LRU:
+            self._entries.popitem(last=False)
+        else:
+            uses = min(self._frequencies)
+            consents = self._frequencies[uses]
+            consent, _ = consents.popitem(last=False)
+            if not consents:
+                del self._frequencies[uses]
+            del self._entries[consent]
+        self._evictions += 1
+
+    def _remove(self, consent: str, entry: _Entry):
+        del self._entries[consent]
+        if self.policy == self.LFU:
+            self._remove_frequency(consent, entry)
+
+    def _remove_frequency(self, consent: str, entry: _Entry):
+        consents = self._frequencies[entry.uses]
+        del consents[consent]
+        if not consents:
+            del self._frequencies[entry.uses]
+
+
+def _decode_core(core: str):
+    """Decodes a core segment on its own, as a v1 consent or as a v2
+    consent without non core segments.
+    """
+    consent_version = peek_version(core)
+    if consent_version == 1:
+        return ConsentV1(base64_decode(core))
+    elif consent_version == 2:
+        return consent_v2(base64_decode(core), [core])
+    raise UnsupportedVersionError(
+        f"Unable to process a consent with version {consent_version}"
+    )
+
+
+def _assemble_v2(core: ConsentV2, non_core: Iterable[Tuple[Optional[str], Any]]):
+    """Builds a frozen v2 consent sharing the decoded sections of a frozen
+    core segment consent, with the attributes of the non core segments.
+    The sections shared are read-only: tuples, read-only proxies and
+    read-only entries.
+    """
+    consent = object.__new__(ConsentV2)
+    state = core.__getstate__()
+    state["_frozen"] = False
+    consent.__setstate__(state)
+    for name, value in non_core:
+        if name is not None:
+            setattr(consent, name, value)
+    return consent.freeze()
+
+
+class SegmentCache:
+
+    """Represents bounded caches of decoded consent segments, keeping the
+    core segments and the non core segments apart, each one keyed by the
+    segment string and with its own size.
+
+    Consent strings that share their core segment but not their non core
+    segments (or the other way around) are then decoded only once. Every
+    v2 consent returned is frozen and assembled from shared parts: the
+    sections decoded from the core segment and the values decoded from
+    each non core segment. The shared parts are read-only, see
+    LazyConsent.freeze, so no consent can modify the others. Consents
+    without non core segments, and v1 consents, are returned as the same
+    cached instance.
+
+    Unlike decode_v2, the non core segments are decoded straight away, so
+    a malformed non core segment raises when decoding the consent.
+
+    :param maxsize: Maximum number of core segments kept in the cache.
+    :param non_core_maxsize: Maximum number of non core segments kept in
+        the cache.
+    :param policy: Eviction policy, DecodeCache.LRU or DecodeCache.LFU.
+    :param ttl: Seconds an entry stays valid, or None to keep it until evicted.
+    :param negative: If the failures to decode must be cached too.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        non_core_maxsize: int = 1024,
+        policy: str = DecodeCache.LRU,
+        ttl: Optional[float] = None,
+        negative: bool = True,
+    ):
+        self._cores = DecodeCache(maxsize, policy, ttl, _decode_core, negative)
+        self._non_cores = DecodeCache(
+            non_core_maxsize, policy, ttl, read_non_core_segment, negative
+        )
+
+    def decode(self, consent: str):
+        """Returns the decoded consent assembled from the cached segments,
+        decoding and caching first the segments that weren't there.
+
+        :param consent: base64 encoded consent string.
+        """
+        if not consent:
+            raise InvalidConsentError("Unable to process an empty consent")
+        consent_segments = segments(consent)
+        core = self._cores.decode(consent_segments[0])
+        if core.version == 1 or len(consent_segments) == 1:
+            return core
+        non_core = [self._non_cores.decode(segment) for segment in consent_segments[1:]]
+        return _assemble_v2(core, non_core)
+
+    __call__ = decode
+
+    def cache_info(self) -> SegmentCacheInfo:
+        """Returns the hits, misses and evictions of both caches so far."""
+        return SegmentCacheInfo(self._cores.cache_info(), self._non_cores.cache_info())
+
+    def cache_clear(self):
+        """Removes every entry from both caches and resets their statistics."""
+        self._cores.cache_clear()
+        self._non_cores.cache_clear()
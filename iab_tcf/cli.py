@@ -0,0 +1,180 @@
+import argparse
+import csv
+import json
+import sys
+from collections import deque
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional
+
+from .batch import decode_many
+from .decoder import decode
+from .serialization import ConsentSerializer
+
+DEFAULT_FIELDS = [
+    "consent",
+    "version",
+    "created",
+    "last_updated",
+    "cmp_id",
+    "cmp_version",
+    "consent_language",
+    "vendor_list_version",
+]
+
+
+class _RecordDecoder:
+
+    """Decodes a consent string straight into its record, so the records
+    are built in the worker processes and only primitives are sent back.
+    """
+
+    def __init__(self, fields: List[str]):
+        self.fields = fields
+        self.serializer = ConsentSerializer(
+            [field for field in fields if field != "consent"], timestamps="iso"
+        )
+
+    def __call__(self, line: str) -> Dict[str, Any]:
+        consent = decode(line)
+        return {
+            field: line if field == "consent" else self.serializer.field(consent, field)
+            for field in self.fields
+        }
+
+
+def _lines(paths: List[str]) -> Iterator[str]:
+    for path in paths:
+        if path == "-":
+            yield from (line.strip() for line in sys.stdin)
+        else:
+            with open(path) as lines:
+                yield from (line.strip() for line in lines)
+
+
+class _JSONLWriter:
+    def __init__(self, output: IO, fields: List[str]):
+        self._output = output
+
+    def write(self, record: Dict[str, Any]):
+        self._output.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+class _CSVWriter:
+    def __init__(self, output: IO, fields: List[str]):
+        self._writer = csv.DictWriter(output, fieldnames=fields)
+        self._writer.writeheader()
+
+    def write(self, record: Dict[str, Any]):
+        self._writer.writerow(
+            {
+                field: json.dumps(value) if isinstance(value, list) else value
+                for field, value in record.items()
+            }
+        )
+
+
+WRITERS = {"jsonl": _JSONLWriter, "csv": _CSVWriter}
+
+
+def decode_lines(
+    lines: Iterable[str],
+    output: IO,
+    fields: List[str] = DEFAULT_FIELDS,
+    format: str = "jsonl",
+    errors: Optional[IO] = None,
+    workers: int = 1,
+    chunksize: int = 1024,
+) -> int:
+    """Decodes every consent string received and writes a record with the
+    fields requested for each one into output. Blank lines are skipped. The
+    consents that can't be decoded or written are written into errors, if
+    given, with their line number and the error. Returns the number of
+    consents that couldn't be decoded or written.
+
+    :param lines: Iterable with a consent string per item.
+    :param output: File where the decoded records are written.
+    :param fields: Attributes of the consents to write. "consent" writes
+        the consent string itself. Raises ValueError for unknown fields.
+    :param format: Format of the records, "jsonl" or "csv".
+    :param errors: File where the consents that can't be decoded are written.
+    :param workers: Number of processes used to decode.
+    :param chunksize: Number of consents sent to a process at once.
+    """
+    decoder = _RecordDecoder(fields)
+    writer = WRITERS[format](output, fields)
+    pending = deque()
+
+    def _tracked(lines: Iterable[str]) -> Iterator[str]:
+        for number, line in enumerate(lines, 1):
+            if line.strip():
+                pending.append((number, line))
+                yield line
+
+    failed = 0
+    results = decode_many(
+        _tracked(lines),
+        workers=workers,
+        chunksize=chunksize,
+        decoder=decoder,
+    )
+    for result in results:
+        number, line = pending.popleft()
+        error = result.error
+        if error is None:
+            try:
+                writer.write(result.consent)
+                continue
+            except (TypeError, ValueError) as write_error:
+                error = write_error
+        failed += 1
+        if errors is not None:
+            failure = {"line": number, "consent": line, "error": str(error)}
+            errors.write(json.dumps(failure) + "\n")
+    return failed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="iab-tcf",
+        description="Decodes newline separated IAB TCF consent strings. Exits "
+        "with status 1 if any of them can't be decoded.",
+    )
+    parser.add_argument(
+        "files", nargs="*", default=["-"], help="Files to read, - for stdin."
+    )
+    parser.add_argument("-o", "--output", help="File to write, stdout by default.")
+    parser.add_argument("-f", "--format", choices=sorted(WRITERS), default="jsonl")
+    parser.add_argument(
+        "--fields",
+        default=",".join(DEFAULT_FIELDS),
+        help="Comma separated consent attributes to write.",
+    )
+    parser.add_argument(
+        "-e", "--errors", help="File to write the lines that can't be decoded."
+    )
+    parser.add_argument("-w", "--workers", type=int, default=1)
+    parser.add_argument("--chunksize", type=int, default=1024)
+    args = parser.parse_args(argv)
+    fields = [field.strip() for field in args.fields.split(",")]
+    try:
+        _RecordDecoder(fields)
+    except ValueError as error:
+        parser.error(str(error))
+
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    errors = open(args.errors, "w") if args.errors else None
+    try:
+        failed = decode_lines(
+            _lines(args.files),
+            output,
+            fields=fields,
+            format=args.format,
+            errors=errors,
+            workers=args.workers,
+            chunksize=args.chunksize,
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if errors is not None:
+            errors.close()
+    return 1 if failed else 0
@@ -0,0 +1,88 @@
+from functools import partial
+from typing import Callable, List, Optional
+
+from . import instrumentation
+from .exceptions import InvalidConsentError, UnsupportedVersionError
+from .iab_tcf import base64_decode, peek_version, segments
+from .iab_tcf_v1 import ConsentV1
+from .iab_tcf_v2 import consent_v2
+from .validation import Limits, check_segments, decode_segment, validate_decoded
+
+
+def decode(consent: str, limits: Optional[Limits] = None):
+    """Generic implementation of a IAB TCF decoder.
+
+    It detects if the consent received is v1.1 or v2 and returns
+    the appropriate ConsentV1 or ConsentV2 instance.
+
+    The version is read from the first character of the core segment,
+    so the segment is only decoded from base64 once, by the version
+    that is going to process it.
+
+    :param consent: base64 encoded consent string.
+    :param limits: If given, the consent string is validated against them
+        before building the consent, see validate.
+    """
+
+    if limits is not None:
+        return _decode_validated(consent, limits)
+    if instrumentation._hooks:
+        return _decode_instrumented(consent)
+    if consent:
+        consent_segments = segments(consent)
+        consent_version = peek_version(consent_segments[0])
+        if consent_version == 1:
+            return ConsentV1(base64_decode(consent_segments[0]))
+        elif consent_version == 2:
+            return consent_v2(base64_decode(consent_segments[0]), consent_segments)
+        raise UnsupportedVersionError(
+            f"Unable to process a consent with version {consent_version}"
+        )
+    raise InvalidConsentError("Unable to process an empty consent")
+
+
+def _decode_instrumented(consent: str):
+    """Same as decode, emitting the duration of every phase to the hooks."""
+    if not consent:
+        raise InvalidConsentError("Unable to process an empty consent")
+    consent_segments = segments(consent)
+    consent_version = peek_version(consent_segments[0])
+    return instrumentation.decode_core(
+        consent,
+        consent_segments[0],
+        _builder(consent_version, consent_segments),
+        version=consent_version,
+    )
+
+
+def _decode_validated(consent: str, limits: Limits):
+    """Same as decode, validating the consent string against the limits.
+    The core segment is decoded from base64 once, to validate it and to
+    build the consent.
+    """
+    consent_segments = check_segments(consent, limits)
+    consent_version = peek_version(consent_segments[0])
+    build = _builder(consent_version, consent_segments)
+
+    def validate_and_build(core: bytes):
+        validate_decoded(core, consent_version, consent_segments, limits)
+        return build(core)
+
+    if instrumentation._hooks:
+        return instrumentation.decode_core(
+            consent, consent_segments[0], validate_and_build, version=consent_version
+        )
+    return validate_and_build(decode_segment(consent_segments[0]))
+
+
+def _builder(consent_version: int, consent_segments: List[str]) -> Callable:
+    """Returns the function that builds the consent of the version from its
+    decoded core segment.
+    """
+    if consent_version == 1:
+        return ConsentV1
+    elif consent_version == 2:
+        return partial(consent_v2, consent_segments=consent_segments)
+    raise UnsupportedVersionError(
+        f"Unable to process a consent with version {consent_version}"
+    )
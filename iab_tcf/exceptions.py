@@ -0,0 +1,24 @@
+class ConsentError(Exception):
+
+    """Base class of the errors raised when a consent string can't be
+    processed.
+    """
+
+
+class InvalidConsentError(ConsentError, ValueError):
+
+    """The consent string is empty, isn't base64 or its structure doesn't
+    fit in its bits.
+    """
+
+
+class UnsupportedVersionError(ConsentError):
+
+    """The consent string has a version other than 1 or 2."""
+
+
+class ConsentLimitError(ConsentError):
+
+    """The consent string declares more vendors or entries than the limits
+    allow.
+    """
@@ -1,7 +1,16 @@
 import base64
-from typing import List
+import string
+from typing import Dict, List
 
-from .bits import Reader
+from .exceptions import InvalidConsentError
+
+BASE64_VALUES: Dict[str, int] = {
+    character: value
+    for value, character in enumerate(
+        string.ascii_uppercase + string.ascii_lowercase + string.digits + "-_"
+    )
+}
+BASE64_VALUES.update({"+": 62, "/": 63})
 
 
 def segments(consent: str) -> List[str]:
@@ -10,14 +19,43 @@ def segments(consent: str) -> List[str]:
 
 
 def base64_decode(segment: str) -> bytes:
-    """Helper to decode the IAB TCF segments encoded."""
+    """Helper to decode the IAB TCF segments encoded. Raises
+    InvalidConsentError if the length of the segment isn't valid base64 or
+    it has characters outside of ASCII.
+    """
     padding = "=" * (-len(segment) % 4)
-    return base64.urlsafe_b64decode(segment + padding)
+    try:
+        return base64.urlsafe_b64decode(segment + padding)
+    except ValueError:
+        # binascii.Error is a ValueError, which is also raised for non ASCII
+        # strings.
+        raise InvalidConsentError(
+            "Unable to process a consent that isn't base64"
+        ) from None
+
+
+def base64_encode(segment: bytes) -> str:
+    """Helper to encode the IAB TCF segments, without padding."""
+    return base64.urlsafe_b64encode(segment).decode().rstrip("=")
 
 
 def version(consent: bytes) -> int:
     """Helper to extract the version from a consent without having
     to wait for the full decoding.
     """
-    reader = Reader(consent)
-    return reader.read_int(6)
+    return consent[0] >> 2 if consent else 0
+
+
+def peek_version(segment: str) -> int:
+    """Helper to extract the version from a consent segment before
+    decoding it from base64, as its first character encodes exactly
+    the 6 bits of the version.
+
+    :param segment: base64 encoded core segment.
+    """
+    if not segment:
+        return 0
+    try:
+        return BASE64_VALUES[segment[0]]
+    except KeyError:
+        raise InvalidConsentError(f"Invalid base64 character {segment[0]!r}") from None
@@ -1,15 +1,48 @@
-from .bits import Reader
+from . import instrumentation
+from .bits import RangeIndex, Reader
 from .iab_tcf import base64_decode
+from .lazy import LazyConsent
 
 
-class ConsentV1:
+class ConsentV1(LazyConsent):
 
     """Represents a v1.1 consent with all the information extracted.
 
+    The fixed size header is decoded on creation. The vendors section is
+    decoded the first time any of its attributes is accessed.
+
     :param consent: The consent to process in bytes.
     """
 
+    _lazy_attributes = dict.fromkeys(
+        (
+            "max_vendor_id",
+            "is_range_encoding",
+            "default_consent",
+            "num_entries",
+            "range_entries",
+            "_range_entries_index",
+            "consented_vendors",
+            "consented_vendors_mask",
+        ),
+        "read_vendors",
+    )
+
+    __slots__ = (
+        "version",
+        "created",
+        "last_updated",
+        "cmp_id",
+        "cmp_version",
+        "consent_screen",
+        "consent_language",
+        "vendor_list_version",
+        "purposes_allowed",
+        *_lazy_attributes,
+    )
+
     def __init__(self, consent: bytes):
+        super().__init__()
         self._reader: Reader = Reader(consent)
         self.version = self._reader.read_int(6)
         self.created = self._reader.read_time()
@@ -20,14 +53,36 @@ class ConsentV1:
         self.consent_language = self._reader.read_string(2)
         self.vendor_list_version = self._reader.read_int(12)
         self.purposes_allowed = self._reader.read_bitfield(24)
+
+    def read_vendors(self):
+        """Reads the vendors. It must be called with the reader already
+        in the position where the vendors start.
+        """
         self.max_vendor_id = self._reader.read_int(16)
         self.is_range_encoding = self._reader.read_bool()
         if self.is_range_encoding:
             self.default_consent = self._reader.read_bool()
             self.num_entries = self._reader.read_int(12)
             self.range_entries = self._reader.read_range(self.num_entries)
+            self._range_entries_index = RangeIndex(self.range_entries)
+            ranges_mask = self._range_entries_index.to_mask()
+            if self.default_consent:
+                # The mask is bounded by the max vendor id, while
+                # is_vendor_allowed allows any vendor not in the ranges.
+                all_vendors = (1 << self.max_vendor_id) - 1
+                self.consented_vendors_mask = all_vendors & ~ranges_mask
+            else:
+                self.consented_vendors_mask = ranges_mask
         else:
             self.consented_vendors = self._reader.read_bitfield(self.max_vendor_id)
+            self.consented_vendors_mask = self.consented_vendors.to_mask()
+
+    @property
+    def purposes_allowed_mask(self) -> int:
+        """Purposes allowed as an integer mask where the purpose n is the
+        bit n - 1. See ids_to_mask.
+        """
+        return self.purposes_allowed.to_mask()
 
     def is_purpose_allowed(self, id: int) -> bool:
         """Checks if a purpose is allowed or not.
@@ -44,9 +99,8 @@ class ConsentV1:
         :param id: Vendor id to check if it's allowed or not.
         """
         if self.is_range_encoding:
-            for (start, end) in self.range_entries:
-                if start <= id and id <= end:
-                    return not self.default_consent
+            if id in self._range_entries_index:
+                return not self.default_consent
             return self.default_consent
         return False if id not in self.consented_vendors else self.consented_vendors[id]
 
@@ -56,4 +110,6 @@ def decode_v1(consent: str):
 
     :param consent: base64 encoded consent string.
     """
+    if instrumentation._hooks:
+        return instrumentation.decode_core(consent, consent, ConsentV1, version=1)
     return ConsentV1(base64_decode(consent))
@@ -1,19 +1,94 @@
-from typing import List
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from .bits import Reader
+from . import instrumentation
+from .bits import RangeIndex, Reader
 from .iab_tcf import base64_decode, segments
+from .lazy import LazyConsent
 from .v2.non_core_segments import NonCoreSegment
 from .v2.publisher_restriction import PubRestrictionEntry
 
 
-class ConsentV2:
+class ConsentV2(LazyConsent):
 
     """Represents a v2 consent with all the information extracted.
 
+    The fixed size header is decoded on creation. The vendor sections, the
+    publisher restrictions and the non core segments are decoded the first
+    time any of their attributes is accessed.
+
     :param consent: The consent to process in bytes.
     """
 
+    _lazy_attributes = {
+        **dict.fromkeys(
+            (
+                "max_consent_vendor_id",
+                "is_consent_range_encoding",
+                "num_consent_entries",
+                "consented_vendors_range",
+                "_consented_vendors_index",
+                "consented_vendors",
+                "consented_vendors_mask",
+            ),
+            "_load_consent_vendors",
+        ),
+        **dict.fromkeys(
+            (
+                "max_interests_vendor_id",
+                "is_interests_range_encoding",
+                "num_interests_entries",
+                "interests_vendors_range",
+                "_interests_vendors_index",
+                "interests_vendors",
+                "interests_vendors_mask",
+            ),
+            "_load_interest_vendors",
+        ),
+        **dict.fromkeys(
+            (
+                "num_pub_restrictions",
+                "pub_restriction_entries",
+                "_pub_restrictions_index",
+            ),
+            "_load_pub_restriction_entries",
+        ),
+        **dict.fromkeys(
+            ("oob_disclosed_vendors", "oob_allowed_vendors", "publisher_tc"),
+            "_load_non_core_segments",
+        ),
+    }
+    _decoding_state = (
+        "_reader",
+        "_consent_string",
+        "_sections_offsets",
+        "_non_core_segments",
+    )
+
+    __slots__ = (
+        "version",
+        "created",
+        "last_updated",
+        "cmp_id",
+        "cmp_version",
+        "consent_screen",
+        "consent_language",
+        "vendor_list_version",
+        "tcf_policy_version",
+        "is_service_specific",
+        "use_non_standard_stacks",
+        "special_features_optin",
+        "purposes_consent",
+        "purposes_legitimate_interests",
+        "purpose_one_treatment",
+        "publisher_cc",
+        "_sections_offsets",
+        "_non_core_segments",
+        *_lazy_attributes,
+    )
+
     def __init__(self, consent: bytes):
+        super().__init__()
         self._reader: Reader = Reader(consent)
         self.version = self._reader.read_int(6)
         self.created = self._reader.read_time()
@@ -31,9 +106,42 @@ class ConsentV2:
         self.purposes_legitimate_interests = self._reader.read_bitfield(24)
         self.purpose_one_treatment = self._reader.read_bool()
         self.publisher_cc = self._reader.read_string(2)
-        self.read_consent_vendors()
-        self.read_interest_vendors()
-        self.read_pub_restriction_entries()
+        self._sections_offsets: List[int] = [self._reader.position]
+        self._non_core_segments: List[str] = []
+
+    def _seek_section(self, index: int):
+        """Moves the reader to the start of the core section in the given
+        position (0 consent vendors, 1 interest vendors, 2 publisher
+        restrictions), skipping over the previous vendor sections without
+        decoding them if their size isn't known yet.
+        """
+        while len(self._sections_offsets) <= index:
+            self._reader.seek(self._sections_offsets[-1])
+            max_vendor_id = self._reader.read_int(16)
+            if self._reader.read_bool():
+                self._reader.skip_range(self._reader.read_int(12))
+            else:
+                self._reader.skip(max_vendor_id)
+            self._sections_offsets.append(self._reader.position)
+        self._reader.seek(self._sections_offsets[index])
+
+    def _read_section(self, index: int, read: Callable[[], None]):
+        self._seek_section(index)
+        read()
+        if len(self._sections_offsets) == index + 1:
+            self._sections_offsets.append(self._reader.position)
+
+    def _load_consent_vendors(self):
+        self._read_section(0, self.read_consent_vendors)
+
+    def _load_interest_vendors(self):
+        self._read_section(1, self.read_interest_vendors)
+
+    def _load_pub_restriction_entries(self):
+        self._read_section(2, self.read_pub_restriction_entries)
+
+    def _load_non_core_segments(self):
+        self.read_non_core_segments(self._non_core_segments)
 
     def read_consent_vendors(self):
         """Reads the consent vendors. It must be called with the
@@ -46,10 +154,13 @@ class ConsentV2:
             self.consented_vendors_range = self._reader.read_range(
                 self.num_consent_entries
             )
+            self._consented_vendors_index = RangeIndex(self.consented_vendors_range)
+            self.consented_vendors_mask = self._consented_vendors_index.to_mask()
         else:
             self.consented_vendors = self._reader.read_bitfield(
                 self.max_consent_vendor_id
             )
+            self.consented_vendors_mask = self.consented_vendors.to_mask()
 
     def read_interest_vendors(self):
         """Reads the interest vendors. It must be called with the
@@ -62,43 +173,68 @@ class ConsentV2:
             self.interests_vendors_range = self._reader.read_range(
                 self.num_interests_entries
             )
+            self._interests_vendors_index = RangeIndex(self.interests_vendors_range)
+            self.interests_vendors_mask = self._interests_vendors_index.to_mask()
         else:
             self.interests_vendors = self._reader.read_bitfield(
                 self.max_interests_vendor_id
             )
+            self.interests_vendors_mask = self.interests_vendors.to_mask()
 
     def read_pub_restriction_entries(self):
         """Reads the publisher restriction entries. It must be called with the
         reader already in the position where the publisher restrictions start.
         """
-        self.num_pub_restrictions = self._reader.read_int(12)
-        self.pub_restriction_entries = []
-        for _ in range(self.num_pub_restrictions):
+        num_pub_restrictions = self._reader.read_int(12)
+        entries = []
+        index: Dict[int, List[PubRestrictionEntry]] = {}
+        for _ in range(num_pub_restrictions):
             purpose_id = self._reader.read_int(6)
             restriction_type = self._reader.read_int(2)
             num_entries = self._reader.read_int(12)
             restrictions_range = self._reader.read_range(num_entries)
-            self.pub_restriction_entries.append(
-                PubRestrictionEntry(
-                    purpose_id=purpose_id,
-                    restriction_type=restriction_type,
-                    restrictions_range=restrictions_range,
-                )
+            entry = PubRestrictionEntry(
+                purpose_id=purpose_id,
+                restriction_type=restriction_type,
+                restrictions_range=restrictions_range,
             )
+            entries.append(entry)
+            index.setdefault(purpose_id, []).append(entry)
+        # The attributes are set once complete, as other threads may read
+        # them as soon as they're set.
+        self.num_pub_restrictions = num_pub_restrictions
+        self.pub_restriction_entries = entries
+        self._pub_restrictions_index = index
 
     def read_non_core_segments(self, segments: List[str]):
         """Receives list of non core segments and tries to
         parse the information inside them.
         """
         for segment in segments[1:]:
-            decoded = base64_decode(segment)
-            non_core_segment = NonCoreSegment(decoded)
-            if non_core_segment.is_disclosed_vendors():
-                self.oob_disclosed_vendors = non_core_segment.read_vendors()
-            elif non_core_segment.is_allowed_vendors():
-                self.oob_allowed_vendors = non_core_segment.read_vendors()
-            elif non_core_segment.is_publisher_tc():
-                self.publisher_tc = non_core_segment.read_publisher_tc()
+            name, value = read_non_core_segment(segment)
+            if name is not None:
+                setattr(self, name, value)
+
+    @property
+    def purposes_consent_mask(self) -> int:
+        """Purposes allowed as an integer mask where the purpose n is the
+        bit n - 1. See ids_to_mask.
+        """
+        return self.purposes_consent.to_mask()
+
+    @property
+    def purposes_legitimate_interests_mask(self) -> int:
+        """Purposes with legitimate interest established as an integer mask
+        where the purpose n is the bit n - 1.
+        """
+        return self.purposes_legitimate_interests.to_mask()
+
+    @property
+    def special_features_optin_mask(self) -> int:
+        """Special features opted in as an integer mask where the special
+        feature n is the bit n - 1.
+        """
+        return self.special_features_optin.to_mask()
 
     def is_purpose_allowed(self, id: int) -> bool:
         """Checks if a purpose is allowed or not.
@@ -120,26 +256,74 @@ class ConsentV2:
         :param id: Vendor id to check if it's allowed or not.
         """
         if self.is_consent_range_encoding:
-            for (start, end) in self.consented_vendors_range:
-                if start <= id and id <= end:
-                    return True
-            return False
+            return id in self._consented_vendors_index
         return False if id not in self.consented_vendors else self.consented_vendors[id]
 
     def is_interest_allowed(self, id: int) -> bool:
         if self.is_interests_range_encoding:
-            for (start, end) in self.interests_vendors_range:
-                if start <= id and id <= end:
-                    return True
-            return False
+            return id in self._interests_vendors_index
         return False if id not in self.interests_vendors else self.interests_vendors[id]
 
     def get_restriction(self, publisher: int, purpose: int) -> PubRestrictionEntry:
-        for entry in self.pub_restriction_entries:
-            if entry.purpose_id == purpose and entry.is_in_range(publisher):
+        """Returns the first publisher restriction that applies to the vendor
+        for the purpose, or None if there isn't any.
+
+        :param publisher: Vendor id to check the restrictions for.
+        :param purpose: Purpose id to check the restrictions for.
+        """
+        for entry in self._pub_restrictions_index.get(purpose, ()):
+            if entry.is_in_range(publisher):
                 return entry
         return None
 
+    def get_restrictions(self, vendor: int, purpose: int) -> List[PubRestrictionEntry]:
+        """Returns every publisher restriction that applies to the vendor for
+        the purpose. The entries are indexed by purpose when decoded and each
+        one keeps its vendors as sorted ranges, so only the entries of the
+        purpose are checked, with a binary search each.
+
+        :param vendor: Vendor id to check the restrictions for.
+        :param purpose: Purpose id to check the restrictions for.
+        """
+        return [
+            entry
+            for entry in self._pub_restrictions_index.get(purpose, ())
+            if entry.is_in_range(vendor)
+        ]
+
+    def get_vendor_restrictions(
+        self, vendor: int
+    ) -> Dict[int, List[PubRestrictionEntry]]:
+        """Returns the publisher restrictions that apply to the vendor across
+        every purpose, as a dictionary of purpose id to its restrictions.
+        Purposes without restrictions for the vendor are not included.
+
+        :param vendor: Vendor id to check the restrictions for.
+        """
+        restrictions = {}
+        for purpose, entries in self._pub_restrictions_index.items():
+            matching = [entry for entry in entries if entry.is_in_range(vendor)]
+            if matching:
+                restrictions[purpose] = matching
+        return restrictions
+
+
+def read_non_core_segment(segment: str) -> Tuple[Optional[str], Any]:
+    """Decodes a non core segment encoded in base64, returning the name of
+    the ConsentV2 attribute it fills and its value, or (None, None) if the
+    segment type is unknown.
+
+    :param segment: base64 encoded non core segment.
+    """
+    non_core_segment = NonCoreSegment(base64_decode(segment))
+    if non_core_segment.is_disclosed_vendors():
+        return "oob_disclosed_vendors", non_core_segment.read_vendors()
+    elif non_core_segment.is_allowed_vendors():
+        return "oob_allowed_vendors", non_core_segment.read_vendors()
+    elif non_core_segment.is_publisher_tc():
+        return "publisher_tc", non_core_segment.read_publisher_tc()
+    return None, None
+
 
 def decode_v2(consent: str):
     """Decodes a v2 consent string that it's encoded in base64 but split in
@@ -148,6 +332,24 @@ def decode_v2(consent: str):
     :param consent: base64 encoded consent string.
     """
     consent_segments = segments(consent)
-    consent = ConsentV2(base64_decode(consent_segments[0]))
-    consent.read_non_core_segments(consent_segments)
+    if instrumentation._hooks:
+        return instrumentation.decode_core(
+            consent,
+            consent_segments[0],
+            partial(consent_v2, consent_segments=consent_segments),
+            version=2,
+        )
+    return consent_v2(base64_decode(consent_segments[0]), consent_segments)
+
+
+def consent_v2(core: bytes, consent_segments: List[str]) -> ConsentV2:
+    """Builds a v2 consent from its core segment, already decoded from
+    base64, and the rest of segments, which are decoded when accessed.
+
+    :param core: core segment decoded from base64.
+    :param consent_segments: every segment of the consent string, as
+        returned by `segments`.
+    """
+    consent = ConsentV2(core)
+    consent._non_core_segments = consent_segments
     return consent
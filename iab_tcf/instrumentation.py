@@ -0,0 +1,239 @@
+import logging
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from .iab_tcf import base64_decode
+
+logger = logging.getLogger(__name__)
+
+
+class DecodeEvent(NamedTuple):
+
+    """Measure of a phase of the decoding of a consent.
+
+    Phases: base64_decode, header and decode (the whole decode call) when
+    a consent is decoded, the name of every section when it's loaded
+    (vendors, consent_vendors, interest_vendors, pub_restriction_entries
+    and non_core_segments) and cache for every DecodeCache lookup.
+
+    The details of the decoding and section phases include the consent
+    string, when the consent was decoded with a hook registered.
+    """
+
+    phase: str
+    seconds: float
+    bits: int
+    details: Dict[str, Any]
+
+
+Hook = Callable[[DecodeEvent], None]
+
+# Hooks registered. The decoding functions only measure anything while it's
+# not empty, so with no hook registered the cost is checking it.
+_hooks: List[Hook] = []
+
+# Name of the phase of every section loader, and the attributes the section
+# sets with its encoding and its number of entries.
+_SECTIONS = {
+    "read_vendors": ("vendors", "is_range_encoding", "num_entries"),
+    "_load_consent_vendors": (
+        "consent_vendors",
+        "is_consent_range_encoding",
+        "num_consent_entries",
+    ),
+    "_load_interest_vendors": (
+        "interest_vendors",
+        "is_interests_range_encoding",
+        "num_interests_entries",
+    ),
+    "_load_pub_restriction_entries": (
+        "pub_restriction_entries",
+        None,
+        "num_pub_restrictions",
+    ),
+    "_load_non_core_segments": ("non_core_segments", None, None),
+}
+
+
+def add_hook(hook: Hook):
+    """Registers a function that receives a DecodeEvent for every phase
+    measured. Hooks are called from the thread that decodes.
+
+    :param hook: Function, Histograms or SlowDecodeLog instance.
+    """
+    _hooks.append(hook)
+
+
+def remove_hook(hook: Hook):
+    """Unregisters a hook. Once there are no hooks nothing is measured.
+
+    :param hook: Hook previously registered.
+    """
+    _hooks.remove(hook)
+
+
+@contextmanager
+def instrument(hook: Hook) -> Iterator[Hook]:
+    """Registers the hook only inside the with block.
+
+    :param hook: Function, Histograms or SlowDecodeLog instance.
+    """
+    add_hook(hook)
+    try:
+        yield hook
+    finally:
+        remove_hook(hook)
+
+
+def emit(phase: str, seconds: float, bits: int = 0, **details: Any):
+    """Sends the measure of a phase to every hook registered."""
+    event = DecodeEvent(phase, seconds, bits, details)
+    for hook in tuple(_hooks):
+        hook(event)
+
+
+def decode_core(
+    consent: str, core: str, build: Callable[[bytes], Any], **details: Any
+) -> Any:
+    """Decodes the core segment of a consent string from base64 and builds
+    the consent from it, emitting the base64_decode, header and decode
+    phases. The consent keeps the consent string until every section is
+    loaded, to identify the events of its sections.
+
+    :param consent: base64 encoded consent string.
+    :param core: base64 encoded core segment of the consent string.
+    :param build: Function that builds the consent from the decoded core.
+    """
+    started = perf_counter()
+    decoded_core = base64_decode(core)
+    decoded = perf_counter()
+    emit("base64_decode", decoded - started, len(decoded_core) * 8, consent=consent)
+    result = build(decoded_core)
+    object.__setattr__(result, "_consent_string", consent)
+    finished = perf_counter()
+    bits = result._reader.position
+    emit("header", finished - decoded, bits, consent=consent, **details)
+    emit("decode", finished - started, bits, consent=consent, **details)
+    return result
+
+
+def _attribute(consent: Any, name: Optional[str]) -> Any:
+    try:
+        return object.__getattribute__(consent, name) if name else None
+    except AttributeError:
+        return None
+
+
+def load_section(consent: Any, loader: str):
+    """Runs the loader of a section of a lazy consent, emitting how long it
+    took, the bits it read, its encoding and its number of entries.
+    """
+    phase, encoding, entries = _SECTIONS.get(loader, (loader, None, None))
+    reader = _attribute(consent, "_reader")
+    position = reader.position if reader is not None else 0
+    started = perf_counter()
+    getattr(consent, loader)()
+    seconds = perf_counter() - started
+    details = {}
+    consent_string = _attribute(consent, "_consent_string")
+    if consent_string is not None:
+        details["consent"] = consent_string
+    if encoding is not None:
+        details["range_encoding"] = _attribute(consent, encoding)
+    if entries is not None:
+        details["entries"] = _attribute(consent, entries)
+    bits = reader.position - position if reader is not None else 0
+    emit(phase, seconds, bits, **details)
+
+
+class Histograms:
+
+    """In-process registry of histograms of the duration of every phase,
+    to be registered as a hook.
+
+    Durations are counted in buckets of powers of two microseconds, so
+    the memory used doesn't grow with the number of events. The bits read
+    are added up by phase too.
+    """
+
+    # Upper bounds of the buckets, in microseconds. Longer durations are
+    # counted in an extra overflow bucket.
+    BUCKETS = [2**exponent for exponent in range(21)]
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts: Dict[str, List[int]] = {}
+        self.seconds: Dict[str, float] = {}
+        self.bits: Dict[str, int] = {}
+
+    def __call__(self, event: DecodeEvent):
+        bucket = bisect_left(self.BUCKETS, event.seconds * 1e6)
+        with self._lock:
+            counts = self.counts.get(event.phase)
+            if counts is None:
+                counts = self.counts[event.phase] = [0] * (len(self.BUCKETS) + 1)
+            counts[bucket] += 1
+            self.seconds[event.phase] = self.seconds.get(event.phase, 0) + event.seconds
+            self.bits[event.phase] = self.bits.get(event.phase, 0) + event.bits
+
+    def percentile(self, phase: str, percentile: float) -> float:
+        """Returns the upper bound, in microseconds, of the bucket with the
+        given percentile of the durations of a phase, or infinity if it's
+        over the last bucket.
+
+        :param phase: Name of the phase.
+        :param percentile: Percentile between 0 and 100.
+        """
+        counts = self.counts.get(phase)
+        if not counts:
+            raise KeyError(phase)
+        target = sum(counts) * percentile / 100
+        seen = 0
+        for bound, count in zip(self.BUCKETS, counts):
+            seen += count
+            if seen >= target:
+                return float(bound)
+        return float("inf")
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Returns the count, the mean and the p50 and p99 durations, in
+        microseconds, and the mean bits read of every phase.
+        """
+        summary = {}
+        for phase, counts in sorted(self.counts.items()):
+            count = sum(counts)
+            summary[phase] = {
+                "count": count,
+                "mean": self.seconds[phase] / count * 1e6,
+                "p50": self.percentile(phase, 50),
+                "p99": self.percentile(phase, 99),
+                "bits": self.bits[phase] / count,
+            }
+        return summary
+
+
+class SlowDecodeLog:
+
+    """Hook that logs a warning for every phase slower than a threshold,
+    with its details. The decode phase includes the consent string.
+
+    :param threshold: Seconds a phase has to take to be logged.
+    :param logger: Logger used, by default the one of this module.
+    """
+
+    def __init__(self, threshold: float, logger: logging.Logger = logger):
+        self.threshold = threshold
+        self.logger = logger
+
+    def __call__(self, event: DecodeEvent):
+        if event.seconds > self.threshold:
+            self.logger.warning(
+                "Slow %s phase took %.6fs reading %d bits: %s",
+                event.phase,
+                event.seconds,
+                event.bits,
+                event.details,
+            )
@@ -0,0 +1,138 @@
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, Tuple
+
+from . import instrumentation
+
+
+def _read_only(value: Any) -> Any:
+    """Returns a read-only version of a decoded value, with the lists
+    converted into tuples, the dicts into read-only proxies and the entries
+    with a _freeze method frozen.
+    """
+    freeze = getattr(value, "_freeze", None)
+    if freeze is not None:
+        return freeze()
+    if isinstance(value, list):
+        return tuple(_read_only(item) for item in value)
+    if isinstance(value, dict):
+        return MappingProxyType({key: _read_only(item) for key, item in value.items()})
+    return value
+
+
+class LazyConsent:
+
+    """Base class for consents that decode their fixed header straight away
+    and leave the variable-length sections encoded until one of their
+    attributes is accessed for the first time.
+
+    Subclasses map in ``_lazy_attributes`` every lazily decoded attribute to
+    the name of the loader method that fills it. A loader is run at most once,
+    and afterwards the attributes it set behave as regular attributes. As
+    every section is read from the same reader, loaders run under a lock of
+    the instance, so a consent can be read from several threads at once.
+
+    Consents use ``__slots__`` instead of a ``__dict__`` per instance, so
+    subclasses have to declare a slot for every attribute they set. Once every
+    section is decoded, the attributes listed in ``_decoding_state`` (the
+    reader and anything else only needed to decode) are dropped.
+    """
+
+    __slots__ = ("_loaded_sections", "_frozen", "_reader", "_lock", "_consent_string")
+
+    _lazy_attributes: Dict[str, str] = {}
+    _decoding_state: Tuple[str, ...] = ("_reader", "_consent_string")
+
+    def __init__(self):
+        object.__setattr__(self, "_frozen", False)
+        self._loaded_sections: Tuple[str, ...] = ()
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name: str):
+        loader = self._lazy_attributes.get(name)
+        if loader is None:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+        if loader not in self._loaded_sections:
+            self._load_section(loader)
+        # The section may have been loaded by another thread after the
+        # attribute was looked up, so it's looked up again in any case.
+        return object.__getattribute__(self, name)
+
+    def __getstate__(self):
+        state = {}
+        for cls in type(self).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                if name == "_lock":
+                    continue
+                try:
+                    value = object.__getattribute__(self, name)
+                except AttributeError:
+                    continue
+                # Read-only proxies can't be pickled, they're restored
+                # when unpickling a frozen consent.
+                if isinstance(value, MappingProxyType):
+                    value = dict(value)
+                state[name] = value
+        return state
+
+    def __setstate__(self, state):
+        object.__setattr__(self, "_lock", threading.RLock())
+        frozen = state.get("_frozen")
+        for name, value in state.items():
+            object.__setattr__(self, name, _read_only(value) if frozen else value)
+
+    def __setattr__(self, name: str, value):
+        if self._frozen:
+            raise AttributeError(f"'{type(self).__name__}' object is read-only")
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name: str):
+        if self._frozen:
+            raise AttributeError(f"'{type(self).__name__}' object is read-only")
+        object.__delattr__(self, name)
+
+    def _load_section(self, loader: str):
+        with self._lock:
+            # Another thread may have loaded the section while waiting. The
+            # section is only marked as loaded once its loader succeeds.
+            if loader in self._loaded_sections:
+                return
+            if instrumentation._hooks:
+                instrumentation.load_section(self, loader)
+            else:
+                getattr(self, loader)()
+            self._loaded_sections += (loader,)
+            if set(self._lazy_attributes.values()).issubset(self._loaded_sections):
+                self._release()
+
+    def _release(self):
+        """Drops the attributes that are only needed to decode sections."""
+        for name in self._decoding_state:
+            try:
+                object.__delattr__(self, name)
+            except AttributeError:
+                pass
+
+    def load(self):
+        """Decodes every section that hasn't been accessed yet, leaving
+        the consent fully populated.
+        """
+        for loader in dict.fromkeys(self._lazy_attributes.values()):
+            if loader not in self._loaded_sections:
+                self._load_section(loader)
+        return self
+
+    def freeze(self):
+        """Decodes every pending section and makes the consent read-only,
+        so the same instance can be safely shared between callers and threads.
+        Lists of decoded values are converted into tuples and dicts into
+        read-only proxies, and the entries they contain are read-only too.
+        """
+        self.load()
+        with self._lock:
+            for name, value in self.__getstate__().items():
+                object.__setattr__(self, name, _read_only(value))
+            object.__setattr__(self, "_frozen", True)
+        return self
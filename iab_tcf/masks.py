@@ -0,0 +1,28 @@
+from typing import Iterable, List
+
+
+def ids_to_mask(ids: Iterable[int]) -> int:
+    """Packs the ids into an integer mask where the id n is the bit n - 1,
+    the same layout as the vendors, purposes and special features masks of
+    the decoded consents, so a set of partners can be checked against a
+    consent with a single and: ``consent.consented_vendors_mask & partners``.
+    Ids lower than 1 are ignored.
+
+    :param ids: Vendor, purpose or special feature ids.
+    """
+    mask = 0
+    for id in ids:
+        if id > 0:
+            mask |= 1 << (id - 1)
+    return mask
+
+
+def mask_to_ids(mask: int) -> List[int]:
+    """Returns the sorted ids set in an integer mask built like ids_to_mask.
+
+    :param mask: Integer mask where the id n is the bit n - 1.
+    """
+    if mask < 0:
+        raise ValueError("Unable to process a negative mask")
+    bits = bin(mask)[:1:-1]
+    return [index + 1 for index, bit in enumerate(bits) if bit == "1"]
@@ -0,0 +1,135 @@
+from typing import Iterable, Optional
+
+from .bits import Reader
+from .exceptions import InvalidConsentError, UnsupportedVersionError
+from .iab_tcf import base64_decode, peek_version
+
+# Bit offsets of the fields a check needs, which are at fixed positions
+# in the core segment of each version.
+V1_PURPOSES_OFFSET = 132
+V1_VENDORS_OFFSET = 156
+V2_SPECIAL_FEATURES_OFFSET = 140
+V2_PURPOSES_OFFSET = 152
+V2_VENDORS_OFFSET = 213
+
+
+class _SliceReader(Reader):
+
+    """Reader that always extracts the fields from slices of the bytes. A
+    check reads a few fields or scans the range entries once, so converting
+    the whole consent into an integer first would cost more than it saves.
+    """
+
+    __slots__ = ()
+
+    MAX_INT_BYTES = 0
+
+
+def check(
+    consent: str,
+    vendor: Optional[int] = None,
+    purposes: Iterable[int] = (),
+    special_features: Iterable[int] = (),
+) -> bool:
+    """Checks if a consent string allows a vendor, a list of purposes and a
+    list of special features, without building a consent object.
+
+    Only the bits that answer the question are read: the purposes and the
+    special features from their fixed offsets, and the vendor from its bit
+    in the bitfield or by scanning the range entries. The answers are the
+    same ones is_vendor_allowed, is_purpose_allowed and the special
+    features opt-ins of the decoded consent would give.
+
+    :param consent: base64 encoded consent string, v1.1 or v2.
+    :param vendor: Vendor id that has to be allowed, if any.
+    :param purposes: Purpose ids that have to be allowed.
+    :param special_features: Special feature ids that have to be opted in.
+        v1.1 consents have no special features so they never allow any.
+    """
+    if not consent:
+        raise InvalidConsentError("Unable to process an empty consent")
+    core = consent.split(".", 1)[0]
+    consent_version = peek_version(core)
+    if consent_version not in (1, 2):
+        raise UnsupportedVersionError(
+            f"Unable to process a consent with version {consent_version}"
+        )
+    if consent_version == 1:
+        header = _SliceReader(_decode_prefix(core, V1_VENDORS_OFFSET + 30))
+        if any(True for _ in special_features):
+            return False
+        if not _check_bitfield(header, V1_PURPOSES_OFFSET, 24, purposes):
+            return False
+        return vendor is None or _check_v1_vendor(core, header, vendor)
+    header = _SliceReader(_decode_prefix(core, V2_VENDORS_OFFSET + 29))
+    if not _check_bitfield(header, V2_SPECIAL_FEATURES_OFFSET, 12, special_features):
+        return False
+    if not _check_bitfield(header, V2_PURPOSES_OFFSET, 24, purposes):
+        return False
+    return vendor is None or _check_v2_vendor(core, header, vendor)
+
+
+def _decode_prefix(core: str, n: int) -> bytes:
+    """Decodes from base64 only the characters that hold the first n bits
+    of the core segment. The bits that are missing read as 0, as they would
+    at the end of the whole segment.
+    """
+    return base64_decode(core[: -(-n // 24) * 4])
+
+
+def _check_bitfield(reader: Reader, offset: int, n: int, ids: Iterable[int]) -> bool:
+    """Checks that every id is set in the bitfield of n bits at offset."""
+    value = None
+    for id in ids:
+        if not 0 < id <= n:
+            return False
+        if value is None:
+            reader.seek(offset)
+            value = reader.read_int(n)
+        if not value >> (n - id) & 1:
+            return False
+    return True
+
+
+def _check_bit(core: str, position: int) -> bool:
+    """Checks the bit in the given position of the core segment."""
+    reader = _SliceReader(_decode_prefix(core, position + 1))
+    reader.seek(position)
+    return reader.read_bool()
+
+
+def _in_range(core: str, position: int, id: int) -> bool:
+    """Scans the range entries that start in the given position of the core
+    segment, preceded by their number, stopping at the first entry that
+    contains the id.
+    """
+    reader = _SliceReader(base64_decode(core))
+    reader.seek(position)
+    for _ in range(reader.read_int(12)):
+        entry = reader.read_int(17)
+        start = entry & 0xFFFF
+        end = reader.read_int(16) if entry >> 16 else start
+        if start <= id <= end:
+            return True
+    return False
+
+
+def _check_v1_vendor(core: str, header: Reader, vendor: int) -> bool:
+    header.seek(V1_VENDORS_OFFSET)
+    max_vendor_id = header.read_int(16)
+    if header.read_bool():
+        default_consent = header.read_bool()
+        return _in_range(core, header.position, vendor) != default_consent
+    if not 0 < vendor <= max_vendor_id:
+        return False
+    return _check_bit(core, header.position + vendor - 1)
+
+
+def _check_v2_vendor(core: str, header: Reader, vendor: int) -> bool:
+    header.seek(V2_VENDORS_OFFSET)
+    max_vendor_id = header.read_int(16)
+    if header.read_bool():
+        return _in_range(core, header.position, vendor)
+    if not 0 < vendor <= max_vendor_id:
+        return False
+    return _check_bit(core, header.position + vendor - 1)
@@ -0,0 +1,143 @@
+import binascii
+from typing import Any, Optional, Tuple, Union
+
+from .exceptions import InvalidConsentError, UnsupportedVersionError
+from .iab_tcf import peek_version
+from .iab_tcf_v1 import ConsentV1
+from .iab_tcf_v2 import consent_v2
+
+# Names the consent strings are usually sent with, as cookies or as
+# query string parameters.
+COOKIE_V1 = b"euconsent"
+COOKIE_V2 = b"euconsent-v2"
+QUERY_PARAMETER = b"gdpr_consent"
+
+# Characters that can precede the name of a cookie or parameter, and
+# characters that end its value.
+_NAME_DELIMITERS = b";&? \t"
+_VALUE_TERMINATORS = (b";", b"&", b'"', b" ", b"\t", b"\r", b"\n")
+
+_URLSAFE_TRANSLATION = bytes.maketrans(b"-_", b"+/")
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+class RawDecoder:
+
+    """Decodes consents straight from the raw bytes of a Cookie header or a
+    query string, given the name of the cookie or parameter.
+
+    The value is located, and split into segments, by its offsets in the
+    raw bytes with bytes.find, without building intermediate strings.
+    Memoryviews can't be searched, so they're copied into bytes first. The
+    core segment is copied into a buffer owned by the decoder, which is
+    reused between calls and padded there, and then translated from the
+    url safe alphabet into a new buffer, the only one allocated per call,
+    that's decoded from base64 into the bytes the Reader processes. The
+    non core segments, which are short and only decoded when accessed, are
+    kept as strings.
+
+    As the buffer is reused, a decoder must not be shared between threads.
+
+    :param name: Name of the cookie or query string parameter.
+    """
+
+    def __init__(self, name: bytes = COOKIE_V2):
+        self.name = name
+        self._key = name + b"="
+        self._buffer = bytearray()
+
+    def find(self, data: Buffer) -> Optional[memoryview]:
+        """Returns a view of the value of the cookie or parameter inside
+        data, or None if it's not present.
+
+        :param data: Raw Cookie header or query string.
+        """
+        located = self._locate(data)
+        if located is None:
+            return None
+        data, start, end = located
+        return memoryview(data)[start:end]
+
+    def decode(self, data: Buffer) -> Any:
+        """Decodes the consent in the cookie or parameter inside data, and
+        returns the appropriate ConsentV1 or ConsentV2 instance, or None if
+        the cookie or parameter is not present.
+
+        :param data: Raw Cookie header or query string.
+        """
+        located = self._locate(data)
+        if located is None:
+            return None
+        data, start, end = located
+        if start == end:
+            raise InvalidConsentError("Unable to process an empty consent")
+        core_end = data.find(b".", start, end)
+        if core_end < 0:
+            core_end = end
+        consent_version = peek_version(chr(data[start]))
+        if consent_version == 1:
+            return ConsentV1(self._base64_decode(data, start, core_end))
+        elif consent_version == 2:
+            # The core segment is decoded here, so only the non core
+            # segments are kept as strings to be decoded when accessed.
+            non_core_segments = [""]
+            if core_end < end:
+                non_core = str(data[core_end + 1 : end], "ascii")
+                non_core_segments.extend(non_core.split("."))
+            core = self._base64_decode(data, start, core_end)
+            return consent_v2(core, non_core_segments)
+        raise UnsupportedVersionError(
+            f"Unable to process a consent with version {consent_version}"
+        )
+
+    def _locate(self, data: Buffer) -> Optional[Tuple[Buffer, int, int]]:
+        """Finds the value of the cookie or parameter, returning the data to
+        read it from (memoryviews are copied once, as they can't be searched)
+        and the offsets where the value starts and ends.
+        """
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        start = data.find(self._key)
+        while start > 0 and data[start - 1] not in _NAME_DELIMITERS:
+            start = data.find(self._key, start + 1)
+        if start < 0:
+            return None
+        start += len(self._key)
+        if data[start : start + 1] == b'"':
+            start += 1
+        end = len(data)
+        for terminator in _VALUE_TERMINATORS:
+            position = data.find(terminator, start, end)
+            if position >= 0:
+                end = position
+        return data, start, end
+
+    __call__ = decode
+
+    def _base64_decode(self, data: Buffer, start: int, end: int) -> bytes:
+        """Decodes the url safe base64 segment between the offsets, copying
+        it into the reusable buffer to pad it instead of concatenating. The
+        translation into the standard alphabet still builds a new buffer, as
+        bytearray can't be translated in place.
+        """
+        buffer = self._buffer
+        buffer[:] = memoryview(data)[start:end]
+        buffer.extend(b"=="[: (start - end) % 4])
+        try:
+            return binascii.a2b_base64(buffer.translate(_URLSAFE_TRANSLATION))
+        except binascii.Error:
+            raise InvalidConsentError(
+                "Unable to process a consent that isn't base64"
+            ) from None
+
+
+def decode_raw(data: Buffer, name: bytes = COOKIE_V2) -> Any:
+    """Decodes the consent sent in the cookie or query string parameter with
+    the given name inside a raw Cookie header or query string, returning
+    None if it's not present. See RawDecoder to reuse the decoding buffer.
+
+    :param data: Raw Cookie header or query string, as bytes or memoryview.
+    :param name: Name of the cookie or query string parameter.
+    """
+    return RawDecoder(name).decode(data)
@@ -0,0 +1,239 @@
+import json
+import re
+from calendar import timegm
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .bits import Bitfield, RangeIndex
+from .iab_tcf_v1 import ConsentV1
+from .iab_tcf_v2 import ConsentV2
+from .masks import mask_to_ids
+from .v2.publisher_restriction import PubRestrictionEntry
+from .v2.publisher_tc import PubTCEntry
+
+# Fields of the records of each version, in the order they are written.
+V1_FIELDS = (
+    "version",
+    "created",
+    "last_updated",
+    "cmp_id",
+    "cmp_version",
+    "consent_screen",
+    "consent_language",
+    "vendor_list_version",
+    "purposes_allowed",
+    "max_vendor_id",
+    "consented_vendors",
+)
+V2_FIELDS = (
+    "version",
+    "created",
+    "last_updated",
+    "cmp_id",
+    "cmp_version",
+    "consent_screen",
+    "consent_language",
+    "vendor_list_version",
+    "tcf_policy_version",
+    "is_service_specific",
+    "use_non_standard_stacks",
+    "special_features_optin",
+    "purposes_consent",
+    "purposes_legitimate_interests",
+    "purpose_one_treatment",
+    "publisher_cc",
+    "max_consent_vendor_id",
+    "consented_vendors",
+    "max_interests_vendor_id",
+    "interests_vendors",
+    "pub_restriction_entries",
+    "oob_disclosed_vendors",
+    "oob_allowed_vendors",
+    "publisher_tc",
+)
+
+# Every field a serializer can write: the public attributes of the consents
+# of both versions, including the ones outside the schemas, like the masks.
+FIELDS = frozenset(
+    name
+    for consent_class in (ConsentV1, ConsentV2)
+    for name in dir(consent_class)
+    if not name.startswith("_") and not callable(getattr(consent_class, name))
+)
+
+# Fields read from the integer masks of the consents, which cover both the
+# bitfield and the range encodings of the vendor sections.
+_MASK_FIELDS = {
+    "consented_vendors": "consented_vendors_mask",
+    "interests_vendors": "interests_vendors_mask",
+}
+
+# Fields with sets of vendors, written as ids or ranges.
+_VENDOR_FIELDS = {"oob_disclosed_vendors", "oob_allowed_vendors"}
+
+_RUNS = re.compile("1+")
+
+
+def _mask_ranges(mask: int) -> List[List[int]]:
+    """Returns the runs of ids set in a mask as [start, end] pairs."""
+    bits = bin(mask)[:1:-1]
+    return [[run.start() + 1, run.end()] for run in _RUNS.finditer(bits)]
+
+
+class ConsentSerializer:
+
+    """Transforms decoded consents into records of plain primitives, which
+    any JSON library can write without hooks, following a fixed schema per
+    version (V1_FIELDS and V2_FIELDS):
+
+    - Datetimes are seconds since the epoch, or ISO 8601 strings.
+    - Languages and country codes are ASCII strings. The 6 bits character
+      63 decodes as the byte 0x80, outside of ASCII, and it's written as
+      the escape "\\x80".
+    - Purposes and special features are sorted lists of ids.
+    - Vendors are sorted lists of ids, or lists of [start, end] ranges.
+    - Publisher restrictions are objects with purpose_id, restriction_type
+      and vendors, and the Publisher TC an object with its purposes.
+    - Non core segments missing from the consent are None.
+
+    :param fields: Fields to write, by default every field of the schema of
+        the version. Attributes outside the schema are converted the same way,
+        and the fields of the other version are None. Raises ValueError for
+        a field that isn't an attribute of the consents, see FIELDS.
+    :param vendors: Form of the vendor lists, "ids" or "ranges".
+    :param timestamps: Form of the datetimes, "epoch" or "iso".
+    """
+
+    def __init__(
+        self,
+        fields: Optional[Sequence[str]] = None,
+        vendors: str = "ids",
+        timestamps: str = "epoch",
+    ):
+        if vendors not in ("ids", "ranges"):
+            raise ValueError(f"Unknown vendors form {vendors}")
+        if timestamps not in ("epoch", "iso"):
+            raise ValueError(f"Unknown timestamps form {timestamps}")
+        for field in fields or ():
+            if field not in FIELDS:
+                raise ValueError(f"Unknown field {field}")
+        self.fields = tuple(fields) if fields is not None else None
+        self.vendors = vendors
+        self.timestamps = timestamps
+        self._mask = mask_to_ids if vendors == "ids" else _mask_ranges
+        self._converters: Dict[type, Callable[[Any], Any]] = {
+            datetime: self._datetime,
+            bytes: self._bytes,
+            Bitfield: self._bitfield,
+            RangeIndex: list,
+            PubRestrictionEntry: self._restriction,
+            PubTCEntry: self._publisher_tc,
+            list: self._list,
+            tuple: self._list,
+        }
+
+    def schema(self, consent: Any) -> Tuple[str, ...]:
+        """Returns the fields written for a consent."""
+        if self.fields is not None:
+            return self.fields
+        return V1_FIELDS if consent.version == 1 else V2_FIELDS
+
+    def to_dict(self, consent: Any) -> Dict[str, Any]:
+        """Returns the record of a consent as a dict of primitives.
+
+        :param consent: Decoded ConsentV1 or ConsentV2.
+        """
+        return {field: self.field(consent, field) for field in self.schema(consent)}
+
+    def to_row(self, consent: Any) -> Tuple[Any, ...]:
+        """Returns the values of the record of a consent, in the order of
+        its fields.
+
+        :param consent: Decoded ConsentV1 or ConsentV2.
+        """
+        return tuple(self.field(consent, field) for field in self.schema(consent))
+
+    def to_json(self, consent: Any) -> str:
+        """Returns the record of a consent as compact JSON.
+
+        :param consent: Decoded ConsentV1 or ConsentV2.
+        """
+        return json.dumps(self.to_dict(consent), separators=(",", ":"))
+
+    def field(self, consent: Any, field: str) -> Any:
+        """Returns the value of a field of a consent as primitives."""
+        mask = _MASK_FIELDS.get(field)
+        if mask is not None:
+            return self._mask(getattr(consent, mask))
+        value = getattr(consent, field, None)
+        if field in _VENDOR_FIELDS and value is not None:
+            return self._vendor_set(value)
+        return self.convert(value)
+
+    def convert(self, value: Any) -> Any:
+        """Transforms a decoded value into primitives."""
+        converter = self._converters.get(type(value))
+        if converter is not None:
+            return converter(value)
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, Mapping):
+            return sorted(key for key, enabled in value.items() if enabled)
+        return str(value)
+
+    def _datetime(self, value: datetime) -> Any:
+        if self.timestamps == "iso":
+            return value.isoformat()
+        return timegm(value.utctimetuple())
+
+    def _bytes(self, value: bytes) -> str:
+        return value.decode("ascii", "backslashreplace")
+
+    def _bitfield(self, value: Bitfield) -> List[int]:
+        return mask_to_ids(value.to_mask())
+
+    def _vendor_set(self, value: Mapping) -> List:
+        """Writes a set of vendors as ids or as ranges."""
+        if isinstance(value, Bitfield):
+            return self._mask(value.to_mask())
+        if not isinstance(value, RangeIndex):
+            value = RangeIndex((id, id) for id, enabled in value.items() if enabled)
+        if self.vendors == "ranges":
+            return [[start, end] for start, end in value.ranges]
+        return list(value)
+
+    def _restriction(self, entry: PubRestrictionEntry) -> Dict[str, Any]:
+        return {
+            "purpose_id": entry.purpose_id,
+            "restriction_type": entry.restriction_type,
+            "vendors": self._vendor_set(entry.vendors),
+        }
+
+    def _publisher_tc(self, entry: PubTCEntry) -> Dict[str, Any]:
+        return {
+            name: self._bitfield(getattr(entry, name)) for name in PubTCEntry.__slots__
+        }
+
+    def _list(self, value: Sequence) -> List:
+        return [self.convert(item) for item in value]
+
+
+def to_dict(consent: Any, fields: Optional[Sequence[str]] = None, **options) -> Dict:
+    """Returns the record of a decoded consent as a dict of primitives.
+    See ConsentSerializer for the schema and the options.
+
+    :param consent: Decoded ConsentV1 or ConsentV2.
+    :param fields: Fields to write, by default every field of the schema.
+    """
+    return ConsentSerializer(fields, **options).to_dict(consent)
+
+
+def to_json(consent: Any, fields: Optional[Sequence[str]] = None, **options) -> str:
+    """Returns the record of a decoded consent as compact JSON. See
+    ConsentSerializer for the schema and the options.
+
+    :param consent: Decoded ConsentV1 or ConsentV2.
+    :param fields: Fields to write, by default every field of the schema.
+    """
+    return ConsentSerializer(fields, **options).to_json(consent)
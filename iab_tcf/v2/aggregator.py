@@ -0,0 +1,231 @@
+from array import array
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable
+
+from ..decoder import decode
+from ..masks import mask_to_ids
+from .gvl import NUM_PURPOSES, NUM_SPECIAL_FEATURES
+
+if TYPE_CHECKING:
+    from ..batch import DecodeResult
+
+
+class _MaskCounter:
+
+    """Counts, for every id, how many of the masks added have its bit set.
+
+    The counts are kept bit-sliced while masks are added: the plane i holds
+    the bit i of the count of every id, and adding a mask is a ripple carry
+    addition over the planes, so the cost of an add is a couple of integer
+    operations instead of a loop over the ids set. The planes are flushed
+    into an array of counts indexed by id - 1 before they grow too many.
+    """
+
+    __slots__ = ("_planes", "_counts")
+
+    # Number of planes kept before flushing them into the counts.
+    MAX_PLANES = 16
+
+    def __init__(self, size: int = 0):
+        self._planes = []
+        self._counts = array("Q", bytes(8 * size))
+
+    def add(self, mask: int):
+        planes = self._planes
+        for index, plane in enumerate(planes):
+            planes[index] = plane ^ mask
+            mask &= plane
+            if not mask:
+                return
+        planes.append(mask)
+        if len(planes) > self.MAX_PLANES:
+            self._flush()
+
+    def _flush(self):
+        counts = self._counts
+        for weight, plane in enumerate(self._planes):
+            if plane.bit_length() > len(counts):
+                counts.extend([0] * (plane.bit_length() - len(counts)))
+            for id in mask_to_ids(plane):
+                counts[id - 1] += 1 << weight
+        self._planes = []
+
+    def counts(self) -> array:
+        """Returns a copy of the counts, where the count of the id n is in
+        the position n - 1.
+        """
+        self._flush()
+        return array("Q", self._counts)
+
+    def merge(self, other: "_MaskCounter"):
+        self._flush()
+        counts = self._counts
+        other_counts = other.counts()
+        if len(other_counts) > len(counts):
+            counts.extend([0] * (len(other_counts) - len(counts)))
+        for index, count in enumerate(other_counts):
+            counts[index] += count
+
+
+class ConsentAggregator:
+
+    """Aggregates the consents of a stream of v2 consent strings into
+    counters, without keeping any consent around.
+
+    The counts by id (purposes, special features and vendors) are kept in
+    arrays indexed by id - 1, which grow up to the highest id seen, and
+    the breakdowns by value in Counters, which grow with the values seen
+    (CMP ids, languages...), so the memory used doesn't depend on the
+    number of consents. Adding a consent reads the integer masks of its
+    vendors, purposes and special features, which count all of their ids
+    at once, so the vendor sections are never iterated in Python.
+
+    Aggregators of different chunks, processes or nodes can be merged
+    into one, and the result is exactly the one of aggregating every
+    consent in a single aggregator. They can be pickled to be sent around.
+
+    Counters:
+
+    - total: v2 consents aggregated.
+    - skipped: consents that failed to decode or aren't v2.
+    - cmp_ids: Counter of CMP ids.
+    - cmp_versions: Counter of (CMP id, CMP version).
+    - consent_languages, publisher_countries: Counters of the 2 characters
+      codes, as bytes.
+    - pub_restrictions: Counter of (purpose id, restriction type) of the
+      publisher restrictions.
+
+    Counts by id, see the properties with the same names.
+
+    :param decoder: Function used to decode the consent strings added.
+    """
+
+    def __init__(self, decoder: Callable[[str], Any] = decode):
+        self.decoder = decoder
+        self.total = 0
+        self.skipped = 0
+        self.cmp_ids: Counter = Counter()
+        self.cmp_versions: Counter = Counter()
+        self.consent_languages: Counter = Counter()
+        self.publisher_countries: Counter = Counter()
+        self.pub_restrictions: Counter = Counter()
+        self._purposes_consent = _MaskCounter(NUM_PURPOSES)
+        self._purposes_legitimate_interests = _MaskCounter(NUM_PURPOSES)
+        self._special_features_optin = _MaskCounter(NUM_SPECIAL_FEATURES)
+        self._vendor_consents = _MaskCounter()
+        self._vendor_legitimate_interests = _MaskCounter()
+
+    def add(self, consent: Any):
+        """Aggregates a consent, as a consent string or already decoded.
+        Consents that fail to decode, or aren't v2, are only counted as
+        skipped.
+
+        :param consent: base64 encoded consent string or decoded consent.
+        """
+        if isinstance(consent, str):
+            try:
+                consent = self.decoder(consent)
+            except Exception:
+                self.skipped += 1
+                return
+        if consent is None or consent.version != 2:
+            self.skipped += 1
+            return
+        self.total += 1
+        self.cmp_ids[consent.cmp_id] += 1
+        self.cmp_versions[consent.cmp_id, consent.cmp_version] += 1
+        self.consent_languages[consent.consent_language] += 1
+        self.publisher_countries[consent.publisher_cc] += 1
+        self._purposes_consent.add(consent.purposes_consent_mask)
+        self._purposes_legitimate_interests.add(
+            consent.purposes_legitimate_interests_mask
+        )
+        self._special_features_optin.add(consent.special_features_optin_mask)
+        self._vendor_consents.add(consent.consented_vendors_mask)
+        self._vendor_legitimate_interests.add(consent.interests_vendors_mask)
+        for entry in consent.pub_restriction_entries:
+            self.pub_restrictions[entry.purpose_id, entry.restriction_type] += 1
+
+    def update(self, consents: Iterable[Any]) -> "ConsentAggregator":
+        """Aggregates every consent of an iterable, see add.
+
+        :param consents: Consent strings or decoded consents.
+        """
+        for consent in consents:
+            self.add(consent)
+        return self
+
+    def merge(self, other: "ConsentAggregator") -> "ConsentAggregator":
+        """Adds the counters of another aggregator to this one.
+
+        :param other: Aggregator of other consents.
+        """
+        self.total += other.total
+        self.skipped += other.skipped
+        self.cmp_ids.update(other.cmp_ids)
+        self.cmp_versions.update(other.cmp_versions)
+        self.consent_languages.update(other.consent_languages)
+        self.publisher_countries.update(other.publisher_countries)
+        self.pub_restrictions.update(other.pub_restrictions)
+        self._purposes_consent.merge(other._purposes_consent)
+        self._purposes_legitimate_interests.merge(other._purposes_legitimate_interests)
+        self._special_features_optin.merge(other._special_features_optin)
+        self._vendor_consents.merge(other._vendor_consents)
+        self._vendor_legitimate_interests.merge(other._vendor_legitimate_interests)
+        return self
+
+    @property
+    def purposes_consent(self) -> array:
+        """Consents that allow every purpose, the purpose n in position n - 1."""
+        return self._purposes_consent.counts()
+
+    @property
+    def purposes_legitimate_interests(self) -> array:
+        """Consents that establish the legitimate interest of every purpose,
+        the purpose n in position n - 1.
+        """
+        return self._purposes_legitimate_interests.counts()
+
+    @property
+    def special_features_optin(self) -> array:
+        """Consents that opt in every special feature, the special feature n
+        in position n - 1.
+        """
+        return self._special_features_optin.counts()
+
+    @property
+    def vendor_consents(self) -> array:
+        """Consents that allow every vendor, the vendor n in position n - 1."""
+        return self._vendor_consents.counts()
+
+    @property
+    def vendor_legitimate_interests(self) -> array:
+        """Consents that establish the legitimate interest of every vendor,
+        the vendor n in position n - 1.
+        """
+        return self._vendor_legitimate_interests.counts()
+
+    def purposes_consent_rates(self) -> Dict[int, float]:
+        """Returns the opt-in rate of every purpose, by purpose id."""
+        if not self.total:
+            return {}
+        return {
+            index + 1: count / self.total
+            for index, count in enumerate(self.purposes_consent)
+        }
+
+
+def aggregate(results: Iterable["DecodeResult"]) -> ConsentAggregator:
+    """Aggregates the results of decode_many or decode_file, counting the
+    failures as skipped. It can be given to decode_file as process, and the
+    aggregators it returns for every chunk merged together.
+
+    :param results: DecodeResult of every consent.
+    """
+    aggregator = ConsentAggregator()
+    for result in results:
+        if result.error is None:
+            aggregator.add(result.consent)
+        else:
+            aggregator.skipped += 1
+    return aggregator
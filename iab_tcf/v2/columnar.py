@@ -0,0 +1,187 @@
+import string
+from typing import Dict, Sequence
+
+import numpy as np
+
+from ..bits import Reader
+from ..iab_tcf import base64_decode
+
+# Number of base64 characters that hold the fixed size part of a v2 core
+# segment (213 bits), which is decoded for the whole batch at once.
+HEADER_CHARACTERS = 36
+
+# Bit offsets and lengths of the fixed size fields of a v2 core segment,
+# in the same order ConsentV2 reads them.
+HEADER_FIELDS = {
+    "version": (0, 6),
+    "created": (6, 36),
+    "last_updated": (42, 36),
+    "cmp_id": (78, 12),
+    "cmp_version": (90, 12),
+    "consent_screen": (102, 6),
+    "consent_language": (108, 12),
+    "vendor_list_version": (120, 12),
+    "tcf_policy_version": (132, 6),
+    "is_service_specific": (138, 1),
+    "use_non_standard_stacks": (139, 1),
+    "special_features_optin": (140, 12),
+    "purposes_consent": (152, 24),
+    "purposes_legitimate_interests": (176, 24),
+    "purpose_one_treatment": (200, 1),
+    "publisher_cc": (201, 12),
+}
+VENDORS_OFFSET = 213
+
+_ALPHABET = string.ascii_uppercase + string.ascii_lowercase + string.digits + "-_"
+_LOOKUP = np.full(256, 255, dtype=np.uint8)
+_LOOKUP[np.frombuffer(_ALPHABET.encode(), dtype=np.uint8)] = np.arange(64)
+
+
+def _header_bits(cores: Sequence[str]):
+    """Translates the first characters of every core segment into a matrix
+    with a row of bits per consent, and a mask with the rows that only
+    contain valid base64 characters.
+    """
+    padded = "".join(
+        core[:HEADER_CHARACTERS].ljust(HEADER_CHARACTERS, "A") for core in cores
+    )
+    characters = np.frombuffer(padded.encode("ascii", "replace"), dtype=np.uint8)
+    values = _LOOKUP[characters].reshape(len(cores), HEADER_CHARACTERS)
+    valid = (values != 255).all(axis=1)
+    shifts = np.arange(5, -1, -1, dtype=np.uint8)
+    bits = (values[:, :, None] >> shifts) & 1
+    return bits.reshape(len(cores), HEADER_CHARACTERS * 6), valid
+
+
+def _field(bits, name: str):
+    offset, length = HEADER_FIELDS[name]
+    weights = np.left_shift(1, np.arange(length - 1, -1, -1, dtype=np.int64))
+    return bits[:, offset : offset + length].astype(np.int64) @ weights
+
+
+def _characters(bits, name: str):
+    offset, length = HEADER_FIELDS[name]
+    weights = np.left_shift(1, np.arange(5, -1, -1, dtype=np.uint8))
+    chars = bits[:, offset : offset + length].reshape(len(bits), length // 6, 6)
+    codes = (chars @ weights).astype(np.uint8) + ord("A")
+    return np.ascontiguousarray(codes).view(f"S{length // 6}").ravel()
+
+
+def _read_vendors(reader: Reader):
+    """Reads a vendors section returning the max vendor id and, for every
+    vendor, if the bit is set, as an unpacked array of booleans.
+    """
+    max_vendor_id = reader.read_int(16)
+    vendors = np.zeros(max_vendor_id, dtype=bool)
+    if reader.read_bool():
+        ranges = np.array(reader.read_range(reader.read_int(12)), dtype=np.int64)
+        if len(ranges):
+            # Every range adds 1 from its start and removes it after its end,
+            # so the running sum is positive for the vendors in any range.
+            starts, ends = ranges[:, 0], ranges[:, 1]
+            ranges = ranges[(starts <= ends) & (ends >= 1) & (starts <= max_vendor_id)]
+            ranges = ranges.clip(1, max_vendor_id)
+            changes = np.zeros(max_vendor_id + 2, dtype=np.int64)
+            np.add.at(changes, ranges[:, 0], 1)
+            np.add.at(changes, ranges[:, 1] + 1, -1)
+            vendors[:] = np.cumsum(changes)[1 : max_vendor_id + 1] > 0
+    elif max_vendor_id:
+        value = reader.read_int(max_vendor_id) << (-max_vendor_id % 8)
+        packed = value.to_bytes((max_vendor_id + 7) // 8, "big")
+        vendors[:] = np.unpackbits(np.frombuffer(packed, dtype=np.uint8))[
+            :max_vendor_id
+        ]
+    return max_vendor_id, vendors
+
+
+def _packed_matrix(rows, width: int):
+    matrix = np.zeros((len(rows), (width + 7) // 8), dtype=np.uint8)
+    for index, row in enumerate(rows):
+        if len(row):
+            packed = np.packbits(row)
+            matrix[index, : len(packed)] = packed
+    return matrix
+
+
+def decode_v2_columns(consents: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Decodes a batch of v2 consent strings into columns, with one array
+    per field and one row per consent, instead of a ConsentV2 per consent.
+
+    The fixed size fields are decoded for the whole batch at once. Only the
+    vendor sections and the number of publisher restrictions are read row
+    by row. Non core segments are ignored.
+
+    Returned columns:
+
+    - valid: bool, False for consents that are empty, aren't base64 or
+      aren't v2. The rest of their columns must be ignored.
+    - version, cmp_id, cmp_version, consent_screen, vendor_list_version,
+      tcf_policy_version, max_consent_vendor_id, max_interests_vendor_id,
+      num_pub_restrictions: int64.
+    - created, last_updated: int64 seconds since the epoch.
+    - consent_language, publisher_cc: 2 characters bytes.
+    - is_service_specific, use_non_standard_stacks, purpose_one_treatment: bool.
+    - special_features_optin (N x 12), purposes_consent (N x 24),
+      purposes_legitimate_interests (N x 24): bool, where column i is the
+      id i + 1.
+    - vendor_consents, vendor_legitimate_interests: uint8 packed bit
+      matrices as np.packbits returns them, where bit i is the vendor
+      i + 1. np.unpackbits(matrix, axis=1) unpacks them.
+
+    :param consents: Sequence of base64 encoded v2 consent strings.
+    """
+    cores = [consent.split(".", 1)[0] for consent in consents]
+    bits, valid = _header_bits(cores)
+    columns = {name: _field(bits, name) for name in HEADER_FIELDS}
+    valid &= np.array([len(core) > 0 for core in cores], dtype=bool)
+    valid &= columns["version"] == 2
+    columns["valid"] = valid
+    columns["created"] //= 10
+    columns["last_updated"] //= 10
+    for name in ("consent_language", "publisher_cc"):
+        columns[name] = _characters(bits, name)
+    for name in (
+        "is_service_specific",
+        "use_non_standard_stacks",
+        "purpose_one_treatment",
+    ):
+        columns[name] = columns[name].astype(bool)
+    for name in (
+        "special_features_optin",
+        "purposes_consent",
+        "purposes_legitimate_interests",
+    ):
+        offset, length = HEADER_FIELDS[name]
+        columns[name] = bits[:, offset : offset + length].astype(bool)
+
+    max_consent = np.zeros(len(cores), dtype=np.int64)
+    max_interests = np.zeros(len(cores), dtype=np.int64)
+    restrictions = np.zeros(len(cores), dtype=np.int64)
+    consent_rows, interests_rows = [], []
+    for index, core in enumerate(cores):
+        if valid[index]:
+            try:
+                reader = Reader(base64_decode(core))
+            except ValueError:
+                valid[index] = False
+        if not valid[index]:
+            consent_rows.append(np.zeros(0, dtype=bool))
+            interests_rows.append(np.zeros(0, dtype=bool))
+            continue
+        reader.seek(VENDORS_OFFSET)
+        max_consent[index], vendors = _read_vendors(reader)
+        consent_rows.append(vendors)
+        max_interests[index], vendors = _read_vendors(reader)
+        interests_rows.append(vendors)
+        restrictions[index] = reader.read_int(12)
+
+    columns["max_consent_vendor_id"] = max_consent
+    columns["max_interests_vendor_id"] = max_interests
+    columns["num_pub_restrictions"] = restrictions
+    columns["vendor_consents"] = _packed_matrix(
+        consent_rows, int(max_consent.max(initial=0))
+    )
+    columns["vendor_legitimate_interests"] = _packed_matrix(
+        interests_rows, int(max_interests.max(initial=0))
+    )
+    return columns
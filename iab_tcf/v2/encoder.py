@@ -0,0 +1,246 @@
+import re
+from collections.abc import Mapping, Sequence
+from datetime import datetime
+from typing import Any, Iterable, List, Optional, Tuple
+
+from ..bits import Bitfield, RangeIndex, Writer
+from ..iab_tcf import base64_encode
+from .non_core_segments import NonCoreSegment
+
+# Maximum number of entries a range encoded section can contain (12 bits).
+MAX_RANGE_ENTRIES = 4095
+
+
+def _field(source: Any, name: str, default: Any = None) -> Any:
+    """Reads a field from a ConsentV2 like object or from a plain mapping."""
+    if isinstance(source, Mapping):
+        return source.get(name, default)
+    return getattr(source, name, default)
+
+
+def _as_mapping(values: Any) -> Mapping:
+    """Accepts a mapping of id to bool or an iterable with the ids enabled."""
+    if isinstance(values, Mapping):
+        return values
+    return {id: True for id in values or ()}
+
+
+def _as_bytes(value: Any) -> bytes:
+    return value.encode("ascii") if isinstance(value, str) else value
+
+
+def _as_datetime(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return datetime.utcfromtimestamp(value)
+
+
+def vendors_to_int(
+    vendors: Any, max_vendor_id: Optional[int] = None
+) -> Tuple[int, int]:
+    """Transforms the vendors into the integer a bitfield of max_vendor_id
+    bits would have, where the vendor 1 is the most significant bit.
+    Returns the integer and the max vendor id used.
+
+    :param vendors: A Bitfield, a RangeIndex, a list or tuple of (start,
+        end) ranges, a mapping of vendor id to bool or an iterable of
+        vendor ids.
+    :param max_vendor_id: The number of bits of the bitfield. By default the
+        highest vendor enabled. Vendors above it are ignored.
+    """
+    if isinstance(vendors, Bitfield):
+        value, length = vendors.to_int(), len(vendors)
+    else:
+        if isinstance(vendors, RangeIndex):
+            ranges = vendors.ranges
+        elif isinstance(vendors, Sequence) and all(
+            isinstance(v, (tuple, list)) for v in vendors
+        ):
+            ranges = RangeIndex(vendors).ranges
+        else:
+            ids = [id for id, enabled in _as_mapping(vendors).items() if enabled]
+            ranges = RangeIndex((id, id) for id in ids).ranges
+        ranges = [(max(start, 1), end) for start, end in ranges if end >= 1]
+        length = ranges[-1][1] if ranges else 0
+        value = 0
+        for start, end in ranges:
+            value |= ((1 << (end - start + 1)) - 1) << (length - end)
+    if max_vendor_id is None:
+        return value, length
+    if max_vendor_id >= length:
+        return value << (max_vendor_id - length), max_vendor_id
+    return value >> (length - max_vendor_id), max_vendor_id
+
+
+def vendors_to_ranges(value: int, max_vendor_id: int) -> List[Tuple[int, int]]:
+    """Returns the (start, end) ranges of consecutive vendors enabled in the
+    integer representation of a bitfield of max_vendor_id bits.
+    """
+    bits = format(value, f"0{max_vendor_id}b") if max_vendor_id else ""
+    return [(match.start() + 1, match.end()) for match in re.finditer("1+", bits)]
+
+
+def write_vendors(
+    writer: Writer,
+    value: int,
+    max_vendor_id: int,
+    range_encoding: Optional[bool] = None,
+):
+    """Writes a vendors section: the max vendor id, the encoding and either
+    the range entries or the bitfield.
+
+    :param writer: The writer where the section is written.
+    :param value: Integer representation of the vendors bitfield.
+    :param max_vendor_id: Number of vendors of the bitfield.
+    :param range_encoding: If the vendors must be written as ranges or as
+        a bitfield. By default the encoding that uses less bits.
+    """
+    ranges = None
+    if range_encoding is None:
+        ranges = vendors_to_ranges(value, max_vendor_id)
+        range_bits = 12 + sum(17 if start == end else 33 for start, end in ranges)
+        range_encoding = range_bits < max_vendor_id
+    if range_encoding:
+        ranges = (
+            ranges if ranges is not None else vendors_to_ranges(value, max_vendor_id)
+        )
+        range_encoding = len(ranges) <= MAX_RANGE_ENTRIES
+    writer.write_int(max_vendor_id, 16)
+    writer.write_bool(range_encoding)
+    if range_encoding:
+        writer.write_int(len(ranges), 12)
+        writer.write_range(ranges)
+    else:
+        writer.write_int(value, max_vendor_id)
+
+
+def _write_core_vendors(
+    writer: Writer,
+    consent: Any,
+    prefix: str,
+    max_name: str,
+    range_encoding: Optional[bool],
+):
+    vendors = _field(consent, f"{prefix}_vendors")
+    if vendors is None:
+        vendors = _field(consent, f"{prefix}_vendors_range", [])
+    value, max_vendor_id = vendors_to_int(vendors, _field(consent, max_name))
+    write_vendors(writer, value, max_vendor_id, range_encoding)
+
+
+def _write_pub_restriction_entries(writer: Writer, entries: Iterable[Any]):
+    entries = list(entries or ())
+    writer.write_int(len(entries), 12)
+    for entry in entries:
+        ranges = RangeIndex(_field(entry, "restrictions_range", [])).ranges
+        writer.write_int(_field(entry, "purpose_id"), 6)
+        writer.write_int(_field(entry, "restriction_type"), 2)
+        writer.write_int(len(ranges), 12)
+        writer.write_range(ranges)
+
+
+def encode_core(consent: Any, range_encoding: Optional[bool] = None) -> str:
+    """Encodes the core segment of a v2 consent.
+
+    :param consent: A ConsentV2, or a mapping with the same field names.
+    :param range_encoding: If the vendor sections must be written as ranges
+        or as bitfields. By default the encoding that uses less bits.
+    """
+    created = _as_datetime(_field(consent, "created", 0))
+    writer = Writer()
+    writer.write_int(_field(consent, "version", 2), 6)
+    writer.write_time(created)
+    writer.write_time(_as_datetime(_field(consent, "last_updated", created)))
+    writer.write_int(_field(consent, "cmp_id", 0), 12)
+    writer.write_int(_field(consent, "cmp_version", 0), 12)
+    writer.write_int(_field(consent, "consent_screen", 0), 6)
+    writer.write_string(_as_bytes(_field(consent, "consent_language", b"EN")))
+    writer.write_int(_field(consent, "vendor_list_version", 0), 12)
+    writer.write_int(_field(consent, "tcf_policy_version", 2), 6)
+    writer.write_bool(_field(consent, "is_service_specific", False))
+    writer.write_bool(_field(consent, "use_non_standard_stacks", False))
+    writer.write_bitfield(_as_mapping(_field(consent, "special_features_optin")), 12)
+    writer.write_bitfield(_as_mapping(_field(consent, "purposes_consent")), 24)
+    writer.write_bitfield(
+        _as_mapping(_field(consent, "purposes_legitimate_interests")), 24
+    )
+    writer.write_bool(_field(consent, "purpose_one_treatment", False))
+    writer.write_string(_as_bytes(_field(consent, "publisher_cc", b"AA")))
+    _write_core_vendors(
+        writer, consent, "consented", "max_consent_vendor_id", range_encoding
+    )
+    _write_core_vendors(
+        writer, consent, "interests", "max_interests_vendor_id", range_encoding
+    )
+    _write_pub_restriction_entries(writer, _field(consent, "pub_restriction_entries"))
+    return base64_encode(writer.to_bytes())
+
+
+def encode_vendors_segment(
+    segment_type: int, vendors: Any, range_encoding: Optional[bool] = None
+) -> str:
+    """Encodes a Disclosed Vendors or Allowed Vendors non core segment.
+
+    :param segment_type: NonCoreSegment.DISCLOSED_VENDORS or
+        NonCoreSegment.ALLOWED_VENDORS.
+    :param vendors: The vendors, in any of the forms vendors_to_int accepts.
+    :param range_encoding: If the vendors must be written as ranges or as
+        a bitfield. By default the encoding that uses less bits.
+    """
+    writer = Writer()
+    writer.write_int(segment_type, 3)
+    write_vendors(writer, *vendors_to_int(vendors), range_encoding)
+    return base64_encode(writer.to_bytes())
+
+
+def encode_publisher_tc(publisher_tc: Any) -> str:
+    """Encodes a Publisher TC non core segment.
+
+    :param publisher_tc: A PubTCEntry, or a mapping with the same field names.
+    """
+    custom_consent = _as_mapping(_field(publisher_tc, "custom_purposes_consent"))
+    custom_interests = _as_mapping(
+        _field(publisher_tc, "custom_purposes_lit_transparency")
+    )
+    num_custom_purposes = max(
+        [len(custom_consent), *custom_consent, len(custom_interests), *custom_interests]
+    )
+    writer = Writer()
+    writer.write_int(NonCoreSegment.PUBLISHER_TC, 3)
+    writer.write_bitfield(_as_mapping(_field(publisher_tc, "purposes_consent")), 24)
+    writer.write_bitfield(
+        _as_mapping(_field(publisher_tc, "purposes_lit_transparency")), 24
+    )
+    writer.write_int(num_custom_purposes, 6)
+    writer.write_bitfield(custom_consent, num_custom_purposes)
+    writer.write_bitfield(custom_interests, num_custom_purposes)
+    return base64_encode(writer.to_bytes())
+
+
+def encode_v2(consent: Any, range_encoding: Optional[bool] = None) -> str:
+    """Encodes a v2 consent into its base64 consent string, with the core
+    segment followed by the non core segments the consent has.
+
+    Fields missing from the consent are written with their default value,
+    and vendors can be given as a Bitfield, a list of (start, end) ranges,
+    a mapping of vendor id to bool or a list of vendor ids.
+
+    :param consent: A ConsentV2, or a mapping with the same field names.
+    :param range_encoding: If the vendor sections must be written as ranges
+        or as bitfields. By default, for every section, the encoding that
+        produces the shortest string.
+    """
+    encoded = [encode_core(consent, range_encoding)]
+    for segment_type, name in (
+        (NonCoreSegment.DISCLOSED_VENDORS, "oob_disclosed_vendors"),
+        (NonCoreSegment.ALLOWED_VENDORS, "oob_allowed_vendors"),
+    ):
+        vendors = _field(consent, name)
+        if vendors is not None:
+            encoded.append(
+                encode_vendors_segment(segment_type, vendors, range_encoding)
+            )
+    publisher_tc = _field(consent, "publisher_tc")
+    if publisher_tc is not None:
+        encoded.append(encode_publisher_tc(publisher_tc))
+    return ".".join(encoded)
@@ -0,0 +1,216 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from ..bits import Bitfield
+from ..exceptions import UnsupportedVersionError
+from ..masks import ids_to_mask
+
+NUM_PURPOSES = 24
+NUM_SPECIAL_FEATURES = 12
+
+
+def _mask(ids: Iterable[int], n: int) -> int:
+    """Packs the ids between 1 and n into an integer mask where the id n is
+    the bit n - 1, like ids_to_mask and the masks of the consents.
+    """
+    return ids_to_mask(id for id in ids if id <= n)
+
+
+class VendorPolicy(NamedTuple):
+
+    """Declarations of a vendor in the Global Vendor List, compiled into
+    masks of purposes and special features where the id n is the bit
+    n - 1, like the masks of the consents.
+    """
+
+    id: int
+    purposes: int
+    legitimate_interests: int
+    flexible_purposes: int
+    special_features: int
+
+    @classmethod
+    def from_dict(cls, vendor: Mapping[str, Any]) -> "VendorPolicy":
+        """Compiles a vendor as it's found in the vendors of the GVL JSON."""
+        return cls(
+            id=int(vendor["id"]),
+            purposes=_mask(vendor.get("purposes", ()), NUM_PURPOSES),
+            legitimate_interests=_mask(vendor.get("legIntPurposes", ()), NUM_PURPOSES),
+            flexible_purposes=_mask(vendor.get("flexiblePurposes", ()), NUM_PURPOSES),
+            special_features=_mask(
+                vendor.get("specialFeatures", ()), NUM_SPECIAL_FEATURES
+            ),
+        )
+
+
+class VendorPermissions(NamedTuple):
+
+    """What a consent allows a vendor to do: the purposes it may process
+    data for, under any legal basis, and the special features it may use.
+    """
+
+    vendor: int
+    purposes: Bitfield
+    special_features: Bitfield
+
+
+class GlobalVendorList:
+
+    """Represents a Global Vendor List compiled to evaluate v2 consents.
+
+    The purposes each vendor declares under consent, legitimate interest
+    and as flexible, and its special features, are compiled once into
+    integer masks. Evaluating a consent for a vendor is then a few mask
+    operations against the purposes bitfields of the consent, applying
+    the publisher restrictions that affect the vendor:
+
+    - Purpose flatly not allowed: the purpose isn't allowed.
+    - Require consent or require legitimate interest: flexible purposes
+      switch to the legal basis required. Purposes that aren't flexible
+      keep the legal basis declared in the vendor list.
+
+    A purpose under consent is allowed if the consent allows the purpose
+    and the vendor, and under legitimate interest if the consent doesn't
+    object to the legitimate interest of the purpose nor of the vendor.
+    A special feature is allowed if the vendor declares it and the user
+    opted in. Deleted vendors and vendors missing from the list aren't
+    allowed anything.
+
+    :param vendor_list: Global Vendor List, as loaded from its JSON.
+    :param vendors: Ids of the vendors to evaluate. By default, every
+        vendor in the list.
+    """
+
+    def __init__(
+        self, vendor_list: Mapping[str, Any], vendors: Optional[Iterable[int]] = None
+    ):
+        self.vendor_list_version: Optional[int] = vendor_list.get("vendorListVersion")
+        self.tcf_policy_version: Optional[int] = vendor_list.get("tcfPolicyVersion")
+        self.policies: Dict[int, VendorPolicy] = {}
+        for vendor in vendor_list.get("vendors", {}).values():
+            if not vendor.get("deletedDate"):
+                policy = VendorPolicy.from_dict(vendor)
+                self.policies[policy.id] = policy
+        self.vendors: List[int] = sorted(self.policies if vendors is None else vendors)
+
+    @classmethod
+    def from_file(
+        cls, path: str, vendors: Optional[Iterable[int]] = None
+    ) -> "GlobalVendorList":
+        """Loads the Global Vendor List from a local JSON file, which is
+        encoded in UTF-8 whatever the locale is.
+
+        :param path: Path of the vendor-list.json file.
+        :param vendors: Ids of the vendors to evaluate.
+        """
+        return cls(json.loads(Path(path).read_text(encoding="utf-8")), vendors)
+
+    def allowed_purposes(self, consent, vendor: int) -> int:
+        """Returns the mask of purposes the consent allows the vendor to
+        process data for, where the purpose n is the bit n - 1, like
+        purposes_consent_mask.
+
+        :param consent: Decoded v2 consent.
+        :param vendor: Id of the vendor to evaluate.
+        """
+        policy = self.policies.get(vendor)
+        if policy is None:
+            return 0
+        return self._allowed_purposes(consent, policy, *self._signals(consent))
+
+    def is_allowed(self, consent, vendor: int, purpose: int) -> bool:
+        """Checks if the consent allows the vendor to process data for the
+        purpose, under any legal basis.
+
+        :param consent: Decoded v2 consent.
+        :param vendor: Id of the vendor to evaluate.
+        :param purpose: Id of the purpose to evaluate.
+        """
+        if not 0 < purpose <= NUM_PURPOSES:
+            return False
+        return bool(self.allowed_purposes(consent, vendor) >> (purpose - 1) & 1)
+
+    def has_special_feature(self, consent, vendor: int, feature: int) -> bool:
+        """Checks if the consent allows the vendor to use the special feature.
+
+        :param consent: Decoded v2 consent.
+        :param vendor: Id of the vendor to evaluate.
+        :param feature: Id of the special feature to evaluate.
+        """
+        policy = self.policies.get(vendor)
+        if policy is None or not 0 < feature <= NUM_SPECIAL_FEATURES:
+            return False
+        allowed = policy.special_features & consent.special_features_optin_mask
+        return bool(allowed >> (feature - 1) & 1)
+
+    def evaluate(self, consent) -> Dict[int, VendorPermissions]:
+        """Evaluates the consent for every vendor configured at once,
+        returning what each one of them is allowed to do.
+
+        :param consent: Decoded v2 consent.
+        """
+        signals = self._signals(consent)
+        special_features = consent.special_features_optin_mask
+        permissions = {}
+        for vendor in self.vendors:
+            policy = self.policies.get(vendor)
+            purposes = features = 0
+            if policy is not None:
+                purposes = self._allowed_purposes(consent, policy, *signals)
+                features = policy.special_features & special_features
+            permissions[vendor] = VendorPermissions(
+                vendor=vendor,
+                purposes=Bitfield.from_mask(purposes, NUM_PURPOSES),
+                special_features=Bitfield.from_mask(features, NUM_SPECIAL_FEATURES),
+            )
+        return permissions
+
+    def _signals(self, consent) -> Tuple[int, int, List[Tuple[Any, int, int]]]:
+        """Extracts from the consent the purposes masks, and the publisher
+        restrictions as (entry, type, purpose bit) tuples.
+        """
+        if consent.version != 2:
+            raise UnsupportedVersionError(
+                f"Unable to evaluate a consent with version {consent.version}"
+            )
+        restrictions = [
+            (entry, entry.restriction_type, 1 << (entry.purpose_id - 1))
+            for entry in consent.pub_restriction_entries
+            if 0 < entry.purpose_id <= NUM_PURPOSES
+        ]
+        return (
+            consent.purposes_consent_mask,
+            consent.purposes_legitimate_interests_mask,
+            restrictions,
+        )
+
+    @staticmethod
+    def _allowed_purposes(
+        consent,
+        policy: VendorPolicy,
+        purposes_consent: int,
+        purposes_legitimate_interests: int,
+        restrictions: List[Tuple[Any, int, int]],
+    ) -> int:
+        masks = [0, 0, 0, 0]
+        for entry, restriction_type, bit in restrictions:
+            if entry.is_in_range(policy.id):
+                masks[restriction_type] |= bit
+        not_allowed, require_consent, require_legitimate_interest, _ = masks
+        to_consent = (
+            require_consent & policy.flexible_purposes & policy.legitimate_interests
+        )
+        to_legitimate_interest = (
+            require_legitimate_interest & policy.flexible_purposes & policy.purposes
+        )
+        allowed = 0
+        if consent.is_vendor_allowed(policy.id):
+            consent_basis = (policy.purposes & ~to_legitimate_interest) | to_consent
+            allowed |= consent_basis & purposes_consent
+        if consent.is_interest_allowed(policy.id):
+            legitimate_interest_basis = (
+                policy.legitimate_interests & ~to_consent
+            ) | to_legitimate_interest
+            allowed |= legitimate_interest_basis & purposes_legitimate_interests
+        return allowed & ~not_allowed
@@ -1,6 +1,6 @@
-from typing import Dict
+from typing import Mapping
 
-from ..bits import Reader
+from ..bits import RangeIndex, Reader
 from .publisher_tc import PubTCEntry
 
 
@@ -17,6 +17,8 @@ class NonCoreSegment:
     ALLOWED_VENDORS = 2
     PUBLISHER_TC = 3
 
+    __slots__ = ("_reader", "type")
+
     def __init__(self, segment: bytes):
         self._reader = Reader(segment)
         self.type = self._reader.read_int(3)
@@ -33,19 +35,17 @@ class NonCoreSegment:
         """Checks if the non core segment contains information about Publisher TC."""
         return self.type == self.PUBLISHER_TC
 
-    def read_vendors(self) -> Dict[int, bool]:
+    def read_vendors(self) -> Mapping[int, bool]:
         """If the non core segment is type Disclosed Vendors or Allowed Vendors, this
         method processes its information extracting a map bitfield with
-        the vendors enabled.
+        the vendors enabled. Range encoded segments are returned as a
+        RangeIndex containing only the vendors enabled.
         """
         max_vendor_id = self._reader.read_int(16)
         is_range_encoding = self._reader.read_bool()
         if is_range_encoding:
-            vendors = {}
             num_entries = self._reader.read_int(12)
-            for start, end in self._reader.read_range(num_entries):
-                vendors = {**vendors, **{i: True for i in range(start, end + 1)}}
-            return vendors
+            return RangeIndex(self._reader.read_range(num_entries))
         else:
             return self._reader.read_bitfield(max_vendor_id)
 
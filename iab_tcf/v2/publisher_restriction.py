@@ -1,11 +1,14 @@
-import json
-from typing import List, Tuple
+from typing import Iterable, Tuple
+
+from ..bits import RangeIndex
 
 
 class PubRestrictionEntry:
 
     """Represents a publisher restriction entry that can be used
-    to perform several operation on that information.
+    to perform several operation on that information. Entries are
+    read-only, as they're shared by the consents returned from caches, and
+    the ranges of the entries of frozen consents are tuples.
 
     :param purpose_id: The purpose this publisher restriction applies to.
     :param restriction_type: The type this restriction applies to.
@@ -17,23 +20,58 @@ class PubRestrictionEntry:
     REQUIRE_LEGITIMATE_INTEREST = 2
     UNDEFINED = 3
 
+    __slots__ = (
+        "purpose_id",
+        "restriction_type",
+        "restrictions_range",
+        "_restrictions_index",
+    )
+
     def __init__(
         self,
         purpose_id: int,
         restriction_type: str,
-        restrictions_range: List[Tuple[int, int]],
+        restrictions_range: Iterable[Tuple[int, int]],
     ):
-        self.purpose_id = purpose_id
-        self.restriction_type = restriction_type
-        self.restrictions_range = restrictions_range
+        set_attribute = object.__setattr__
+        set_attribute(self, "purpose_id", purpose_id)
+        set_attribute(self, "restriction_type", restriction_type)
+        if not isinstance(restrictions_range, (list, tuple)):
+            restrictions_range = list(restrictions_range)
+        set_attribute(self, "restrictions_range", restrictions_range)
+        set_attribute(self, "_restrictions_index", RangeIndex(restrictions_range))
+
+    def _freeze(self) -> "PubRestrictionEntry":
+        """Stores the ranges as a tuple, once the consent that contains the
+        entry is frozen.
+        """
+        object.__setattr__(self, "restrictions_range", tuple(self.restrictions_range))
+        return self
+
+    def __setattr__(self, name: str, value):
+        raise AttributeError(f"'{type(self).__name__}' object is read-only")
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f"'{type(self).__name__}' object is read-only")
+
+    def __reduce__(self):
+        return (
+            type(self),
+            (self.purpose_id, self.restriction_type, self.restrictions_range),
+        )
+
+    @property
+    def vendors(self) -> RangeIndex:
+        """Vendors the restriction applies to, as a read-only mapping of
+        sorted and merged ranges.
+        """
+        return self._restrictions_index
 
     def __repr__(self):
-        return json.dumps(
-            {
-                "purpose": self.purpose_id,
-                "restriction_type": self.restriction_type,
-                "restrictions_range": self.restrictions_range,
-            }
+        return (
+            f"{type(self).__name__}(purpose_id={self.purpose_id}, "
+            f"restriction_type={self.restriction_type}, "
+            f"restrictions_range={self.restrictions_range})"
         )
 
     def is_not_allowed(self):
@@ -50,10 +88,7 @@ class PubRestrictionEntry:
 
     def is_in_range(self, publisher: int) -> bool:
         """Checks if the publisher received is affected by this restriction or not"""
-        for (start, end) in self.restrictions_range:
-            if publisher >= start and publisher <= end:
-                return True
-        return False
+        return publisher in self._restrictions_index
 
     def is_publisher_restricted(self, publisher: int) -> bool:
         """If the publisher is in the range specified for this restriction
@@ -1,9 +1,10 @@
-from typing import Dict
+from typing import Mapping
 
 
 class PubTCEntry:
 
     """Represents a Publisher TC entry that can be used to retrieve further information.
+    Entries are read-only, as they're shared by the consents returned from caches.
 
     :param purposes_consent: The publisher's purposes consent.
     :param purposes_lit_transparency: The publisher's purposes legitimate
@@ -13,14 +14,33 @@ class PubTCEntry:
         legitimate interest consents.
     """
 
+    __slots__ = (
+        "purposes_consent",
+        "purposes_lit_transparency",
+        "custom_purposes_consent",
+        "custom_purposes_lit_transparency",
+    )
+
     def __init__(
         self,
-        purposes_consent: Dict[int, bool],
-        purposes_lit_transparency: Dict[int, bool],
-        custom_purposes_consent: Dict[int, bool],
-        custom_purposes_lit_transparency: Dict[int, bool],
+        purposes_consent: Mapping[int, bool],
+        purposes_lit_transparency: Mapping[int, bool],
+        custom_purposes_consent: Mapping[int, bool],
+        custom_purposes_lit_transparency: Mapping[int, bool],
     ):
-        self.purposes_consent = purposes_consent
-        self.purposes_lit_transparency = purposes_lit_transparency
-        self.custom_purposes_consent = custom_purposes_consent
-        self.custom_purposes_lit_transparency = custom_purposes_lit_transparency
+        set_attribute = object.__setattr__
+        set_attribute(self, "purposes_consent", purposes_consent)
+        set_attribute(self, "purposes_lit_transparency", purposes_lit_transparency)
+        set_attribute(self, "custom_purposes_consent", custom_purposes_consent)
+        set_attribute(
+            self, "custom_purposes_lit_transparency", custom_purposes_lit_transparency
+        )
+
+    def __setattr__(self, name: str, value):
+        raise AttributeError(f"'{type(self).__name__}' object is read-only")
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f"'{type(self).__name__}' object is read-only")
+
+    def __reduce__(self):
+        return (type(self), tuple(getattr(self, name) for name in self.__slots__))
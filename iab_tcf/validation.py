@@ -0,0 +1,212 @@
+import re
+from typing import List, NamedTuple, Optional
+
+from .bits import Reader
+from .exceptions import ConsentLimitError, InvalidConsentError, UnsupportedVersionError
+from .iab_tcf import base64_decode, peek_version, segments
+from .v2.non_core_segments import NonCoreSegment
+
+# A segment, in url safe or standard base64, optionally padded. Empty
+# segments, like the one after a trailing dot, are decoded as empty.
+_SEGMENT = re.compile(r"[A-Za-z0-9+/_-]*={0,2}")
+
+# Bits before the vendor sections of the core segment of each version, and
+# bits every vendor section starts with (max vendor id and encoding).
+V1_VENDORS_OFFSET = 156
+V2_VENDORS_OFFSET = 213
+VENDORS_HEADER_BITS = 17
+
+# Bits of the type every non core segment starts with.
+NON_CORE_TYPE_BITS = 3
+
+# Bits of the shortest range entry: single id flag and the id.
+RANGE_ENTRY_BITS = 17
+
+
+class Limits(NamedTuple):
+
+    """Resource limits a consent string has to respect to be decoded. The
+    defaults are the maximums the format can encode, so only the structure
+    is checked unless they are lowered.
+    """
+
+    max_length: Optional[int] = None
+    max_segments: int = 4
+    max_vendor_id: int = 0xFFFF
+    max_range_entries: int = 0xFFF
+    max_restrictions: int = 0xFFF
+
+
+DEFAULT_LIMITS = Limits()
+
+
+def validate(consent: str, limits: Limits = DEFAULT_LIMITS) -> int:
+    """Checks, without decoding it, that a consent string can be decoded
+    within the limits, and returns its version.
+
+    The checks go from the cheapest to the most expensive: the length, the
+    number of segments and the base64 alphabet of the string, and then the
+    segments are decoded from base64 and the vendor sections and publisher
+    restrictions of the core segment, and the vendors of the disclosed and
+    allowed vendors segments, walked, reading only their lengths, to check
+    that they fit in the bits available. Nothing is allocated for the
+    vendors or the entries declared.
+
+    :param consent: base64 encoded consent string.
+    :param limits: Limits to enforce.
+    :raises InvalidConsentError: If the string is malformed or truncated.
+    :raises UnsupportedVersionError: If the version isn't 1 or 2.
+    :raises ConsentLimitError: If the string goes over the limits.
+    """
+    consent_segments = check_segments(consent, limits)
+    consent_version = peek_version(consent_segments[0])
+    validate_decoded(
+        decode_segment(consent_segments[0]), consent_version, consent_segments, limits
+    )
+    return consent_version
+
+
+def check_segments(consent: str, limits: Limits = DEFAULT_LIMITS) -> List[str]:
+    """Checks the length, the number of segments and the alphabet of a
+    consent string, returning its segments.
+    """
+    if not consent:
+        raise InvalidConsentError("Unable to process an empty consent")
+    if limits.max_length is not None and len(consent) > limits.max_length:
+        raise ConsentLimitError(
+            f"Unable to process a consent longer than {limits.max_length}"
+        )
+    consent_segments = segments(consent)
+    if len(consent_segments) > limits.max_segments:
+        raise ConsentLimitError(
+            f"Unable to process a consent with {len(consent_segments)} segments"
+        )
+    for segment in consent_segments:
+        if not _SEGMENT.fullmatch(segment):
+            raise InvalidConsentError("Unable to process a consent that isn't base64")
+    return consent_segments
+
+
+def decode_segment(segment: str) -> bytes:
+    """Decodes a segment from base64, raising InvalidConsentError if its
+    length isn't valid base64, like every decoder does.
+    """
+    return base64_decode(segment)
+
+
+def validate_decoded(
+    core: bytes,
+    consent_version: int,
+    consent_segments: List[str],
+    limits: Limits = DEFAULT_LIMITS,
+):
+    """Same as validate for a consent string whose segments were already
+    checked by check_segments, taking its core segment already decoded from
+    base64, so a decoder can build the consent from the same bytes.
+    """
+    validate_core(core, consent_version, limits)
+    if consent_version == 2:
+        for segment in consent_segments[1:]:
+            validate_non_core(decode_segment(segment), limits)
+
+
+def validate_core(core: bytes, consent_version: int, limits: Limits = DEFAULT_LIMITS):
+    """Walks the sections of a core segment already decoded from base64,
+    checking that the lengths they declare fit in its bits and respect
+    the limits. The ids of the range entries are only read if the limits
+    lower max_vendor_id.
+    """
+    reader = Reader(core)
+    available = len(core) * 8
+    if consent_version == 1:
+        _check_size(V1_VENDORS_OFFSET + VENDORS_HEADER_BITS, available)
+        reader.seek(V1_VENDORS_OFFSET)
+        _skip_vendors(reader, available, limits, default_consent=True)
+    elif consent_version == 2:
+        _check_size(V2_VENDORS_OFFSET + VENDORS_HEADER_BITS, available)
+        reader.seek(V2_VENDORS_OFFSET)
+        _skip_vendors(reader, available, limits)
+        _check_size(reader.position + VENDORS_HEADER_BITS, available)
+        _skip_vendors(reader, available, limits)
+        _skip_restrictions(reader, available, limits)
+    else:
+        raise UnsupportedVersionError(
+            f"Unable to process a consent with version {consent_version}"
+        )
+
+
+def validate_non_core(segment: bytes, limits: Limits = DEFAULT_LIMITS):
+    """Walks the vendors of a disclosed or allowed vendors segment already
+    decoded from base64, like validate_core does for the core segment. The
+    other segments don't declare any length, so only their type is read.
+    """
+    if not segment:
+        # Empty segments, like the one after a trailing dot, are ignored.
+        return
+    reader = Reader(segment)
+    available = len(segment) * 8
+    if reader.read_int(NON_CORE_TYPE_BITS) in (
+        NonCoreSegment.DISCLOSED_VENDORS,
+        NonCoreSegment.ALLOWED_VENDORS,
+    ):
+        _check_size(reader.position + VENDORS_HEADER_BITS, available)
+        _skip_vendors(reader, available, limits)
+
+
+def _check_size(bits: int, available: int):
+    if bits > available:
+        raise InvalidConsentError(
+            f"Unable to process a consent of {available} bits that needs {bits}"
+        )
+
+
+def _skip_vendors(
+    reader: Reader, available: int, limits: Limits, default_consent: bool = False
+):
+    max_vendor_id = reader.read_int(16)
+    if max_vendor_id > limits.max_vendor_id:
+        raise ConsentLimitError(
+            f"Unable to process a consent with max vendor id {max_vendor_id}"
+        )
+    if reader.read_bool():
+        if default_consent:
+            reader.skip(1)
+        _skip_ranges(reader, available, limits)
+    else:
+        reader.skip(max_vendor_id)
+        _check_size(reader.position, available)
+
+
+def _skip_ranges(reader: Reader, available: int, limits: Limits):
+    _check_size(reader.position + 12, available)
+    entries = reader.read_int(12)
+    if entries > limits.max_range_entries:
+        raise ConsentLimitError(
+            f"Unable to process a consent with {entries} range entries"
+        )
+    _check_size(reader.position + entries * RANGE_ENTRY_BITS, available)
+    if limits.max_vendor_id >= 0xFFFF:
+        # Ids are 16 bits, so they can't go over the limit.
+        reader.skip_range(entries)
+    else:
+        for _ in range(entries):
+            entry = reader.read_int(17)
+            vendor_id = reader.read_int(16) if entry >> 16 else entry & 0xFFFF
+            vendor_id = max(vendor_id, entry & 0xFFFF)
+            if vendor_id > limits.max_vendor_id:
+                raise ConsentLimitError(
+                    f"Unable to process a consent with vendor id {vendor_id}"
+                )
+    _check_size(reader.position, available)
+
+
+def _skip_restrictions(reader: Reader, available: int, limits: Limits):
+    _check_size(reader.position + 12, available)
+    restrictions = reader.read_int(12)
+    if restrictions > limits.max_restrictions:
+        raise ConsentLimitError(
+            f"Unable to process a consent with {restrictions} publisher restrictions"
+        )
+    for _ in range(restrictions):
+        reader.skip(8)
+        _skip_ranges(reader, available, limits)
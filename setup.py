@@ -70,6 +70,8 @@ setup(
     version=get_version(),
     packages=find_packages(),
     install_requires=get_requirements(),
+    extras_require={"numpy": ["numpy"]},
+    entry_points={"console_scripts": ["iab-tcf=iab_tcf.cli:main"]},
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
@@ -0,0 +1,101 @@
+import pickle
+from collections import Counter
+from functools import reduce
+
+import pytest
+from iab_tcf import ConsentAggregator, decode
+from iab_tcf.batch import decode_file
+from iab_tcf.v2.aggregator import _MaskCounter, aggregate
+
+from .conftest import load_seed
+
+CONSENTS = [
+    load_seed(f"./seed/v2/consent_{name}.json")["consent"] for name in "abcd"
+] + [load_seed("./seed/v1/consent_a.json")["consent"], "validbase64"]
+
+
+def expected_counts(consents, count):
+    counts = Counter()
+    for consent in consents:
+        counts.update(count(decode(consent)))
+    return counts
+
+
+def as_counter(counts) -> Counter:
+    return Counter({index + 1: count for index, count in enumerate(counts) if count})
+
+
+@pytest.fixture
+def aggregator() -> ConsentAggregator:
+    return ConsentAggregator().update(CONSENTS * 3)
+
+
+def test_counters(aggregator):
+    v2 = CONSENTS[:4] * 3
+    assert (aggregator.total, aggregator.skipped) == (12, 6)
+    assert aggregator.cmp_ids == Counter(decode(c).cmp_id for c in v2)
+    assert aggregator.consent_languages == Counter(
+        decode(c).consent_language for c in v2
+    )
+    assert aggregator.pub_restrictions == expected_counts(
+        v2,
+        lambda consent: [
+            (entry.purpose_id, entry.restriction_type)
+            for entry in consent.pub_restriction_entries
+        ],
+    )
+
+
+def test_counts_by_id(aggregator):
+    v2 = CONSENTS[:4] * 3
+    assert as_counter(aggregator.vendor_consents) == expected_counts(
+        v2,
+        lambda consent: [
+            id
+            for id in range(1, consent.consented_vendors_mask.bit_length() + 1)
+            if consent.is_vendor_allowed(id)
+        ],
+    )
+    assert as_counter(aggregator.purposes_consent) == expected_counts(
+        v2,
+        lambda consent: [id for id in range(1, 25) if consent.is_purpose_allowed(id)],
+    )
+    assert len(aggregator.purposes_consent) == 24
+    assert len(aggregator.special_features_optin) == 12
+    rates = aggregator.purposes_consent_rates()
+    assert rates[1] == aggregator.purposes_consent[0] / 12
+
+
+def test_mask_counter_flushes_exactly():
+    counter = _MaskCounter()
+    values = range(1, 200000)
+    for value in values:
+        counter.add(value & 0b111)
+    expected = [sum(value >> bit & 1 for value in values) for bit in range(3)]
+    assert list(counter.counts()) == expected
+
+
+def test_merge_is_exact(aggregator):
+    merged = ConsentAggregator().update(CONSENTS)
+    merged.merge(ConsentAggregator().update(CONSENTS * 2))
+    merged = pickle.loads(pickle.dumps(merged))
+    for name in (
+        "total",
+        "skipped",
+        "cmp_versions",
+        "publisher_countries",
+        "pub_restrictions",
+        "vendor_consents",
+        "vendor_legitimate_interests",
+        "purposes_legitimate_interests",
+    ):
+        assert getattr(merged, name) == getattr(aggregator, name)
+
+
+def test_aggregate_file_chunks(tmp_path, aggregator):
+    path = tmp_path / "consents.txt"
+    path.write_text("\n".join(CONSENTS * 3) + "\n")
+    chunks = decode_file(str(path), aggregate, workers=2, chunk_size=200)
+    merged = reduce(ConsentAggregator.merge, chunks)
+    assert (merged.total, merged.skipped) == (12, 6)
+    assert merged.vendor_consents == aggregator.vendor_consents
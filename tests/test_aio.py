@@ -0,0 +1,110 @@
+import asyncio
+import subprocess
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+from iab_tcf import async_decode, async_decode_many, decode
+
+from .test_batch import CONSENTS, assert_results
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+@pytest.mark.parametrize("inline_length", [0, 10000])
+def test_async_decode(inline_length):
+    consent = run(async_decode(CONSENTS[1], inline_length=inline_length))
+    assert consent.cmp_id == decode(CONSENTS[1]).cmp_id
+    assert not hasattr(consent, "_reader")
+
+
+def test_async_decode_in_a_process_pool():
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        consent = run(async_decode(CONSENTS[3], executor=executor, inline_length=0))
+    assert consent.is_vendor_allowed(2) == decode(CONSENTS[3]).is_vendor_allowed(2)
+
+
+def test_async_decode_raises_the_decoding_errors():
+    with pytest.raises(Exception, match="Unable to process a consent with version"):
+        run(async_decode("validbase64", inline_length=0))
+
+
+@pytest.mark.parametrize("inline_length", [0, 100, 10000])
+def test_async_decode_many(inline_length):
+    assert_results(run(async_decode_many(CONSENTS, inline_length=inline_length)))
+
+
+def test_async_decode_many_limits_the_concurrency():
+    lock = threading.Lock()
+    running = [0, 0]
+
+    def decoder(consent):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        threading.Event().wait(0.01)
+        with lock:
+            running[0] -= 1
+        return consent
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = run(
+            async_decode_many(
+                ["consent"] * 12,
+                executor=executor,
+                concurrency=2,
+                inline_length=0,
+                decoder=decoder,
+            )
+        )
+    assert [result.consent for result in results] == ["consent"] * 12
+    assert running[1] == 2
+
+
+def test_async_decode_many_cancels_the_pending_consents():
+    release = threading.Event()
+    calls = []
+
+    def decoder(consent):
+        calls.append(consent)
+        release.wait(5)
+        return consent
+
+    async def cancel(executor):
+        task = asyncio.ensure_future(
+            async_decode_many(
+                ["a", "b", "c"],
+                executor=executor,
+                concurrency=3,
+                inline_length=0,
+                decoder=decoder,
+            )
+        )
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        try:
+            run(cancel(executor))
+        finally:
+            release.set()
+    assert calls == ["a"]
+
+
+def test_importing_the_package_doesnt_import_asyncio():
+    code = (
+        "import sys, iab_tcf; "
+        "assert 'asyncio' not in sys.modules; "
+        "assert 'concurrent.futures' not in sys.modules; "
+        "assert iab_tcf.async_decode and iab_tcf.decode_many"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
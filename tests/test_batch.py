@@ -0,0 +1,140 @@
+import json
+import pickle
+import tempfile
+from collections import Counter
+from functools import partial
+
+import pytest
+from iab_tcf import decode, decode_many
+from iab_tcf.batch import decode_file, file_chunks
+
+from .conftest import load_seed
+
+CONSENTS = [
+    load_seed("./seed/v1/consent_a.json")["consent"],
+    load_seed("./seed/v2/consent_a.json")["consent"],
+    "validbase64",
+    load_seed("./seed/v2/consent_c.json")["consent"],
+    "",
+]
+
+
+def assert_results(results):
+    assert [result.index for result in results] == list(range(len(CONSENTS)))
+    for result, consent in zip(results, CONSENTS):
+        if consent in ("", "validbase64"):
+            assert result.consent is None
+            assert "Unable to process" in str(result.error)
+        else:
+            assert result.error is None
+            assert result.consent.version == decode(consent).version
+            assert result.consent.is_vendor_allowed(2) == decode(
+                consent
+            ).is_vendor_allowed(2)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_decode_many_in_order(workers):
+    assert_results(list(decode_many(CONSENTS, workers=workers, chunksize=2)))
+
+
+def test_decode_many_unordered():
+    results = decode_many(CONSENTS * 3, workers=2, chunksize=1, ordered=False)
+    indexes = sorted(result.index for result in results)
+    assert indexes == list(range(len(CONSENTS) * 3))
+
+
+def test_decoded_consents_are_sent_without_the_reader():
+    consent = decode(CONSENTS[1])
+    assert "_reader" in consent.__getstate__()
+    consent.load()
+    assert "_reader" not in consent.__getstate__()
+    restored = pickle.loads(pickle.dumps(consent))
+    for vendor in range(consent.max_consent_vendor_id + 1):
+        assert restored.is_vendor_allowed(vendor) == consent.is_vendor_allowed(vendor)
+
+
+def count_versions(results) -> Counter:
+    return Counter(
+        result.consent.version if result.consent else None for result in results
+    )
+
+
+def write_chunk(directory: str, results) -> str:
+    with tempfile.NamedTemporaryFile(
+        "w", dir=directory, suffix=".jsonl", delete=False
+    ) as output:
+        for result in results:
+            version = result.consent.version if result.consent else None
+            output.write(json.dumps({"offset": result.index, "version": version}))
+            output.write("\n")
+        return output.name
+
+
+@pytest.fixture
+def consents_file(tmp_path):
+    path = tmp_path / "consents.txt"
+    lines = [consent for consent in CONSENTS if consent] * 4
+    path.write_bytes(("\n".join(lines) + "\r\n\n").encode())
+    return path
+
+
+def test_file_chunks_are_aligned_to_lines(consents_file):
+    data = consents_file.read_bytes()
+    chunks = file_chunks(str(consents_file), chunk_size=100)
+    assert len(chunks) > 1
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(data)
+    for (_, end), (start, _) in zip(chunks, chunks[1:]):
+        assert end == start and data[end - 1 : end] == b"\n"
+
+
+def test_file_chunks_of_an_empty_file(tmp_path):
+    path = tmp_path / "empty.txt"
+    path.write_bytes(b"")
+    assert file_chunks(str(path)) == []
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_decode_file(consents_file, workers):
+    data = consents_file.read_bytes()
+    chunks = list(decode_file(str(consents_file), workers=workers, chunk_size=100))
+    assert len(chunks) > 1
+    results = [result for chunk in chunks for result in chunk]
+    lines = [consent for consent in CONSENTS if consent] * 4
+    assert len(results) == len(lines)
+    for result, line in zip(results, lines):
+        assert data[result.index :].startswith(line.encode())
+        if line == "validbase64":
+            assert "Unable to process" in str(result.error)
+        else:
+            assert result.consent.cmp_id == decode(line).cmp_id
+
+
+def test_decode_file_returns_loaded_consents(tmp_path):
+    path = tmp_path / "consents.txt"
+    path.write_text(f"{CONSENTS[1]}\n{CONSENTS[3]}.a\n")
+    [results] = decode_file(str(path), workers=1)
+    assert not hasattr(results[0].consent, "_reader")
+    assert results[0].consent.pub_restriction_entries is not None
+    assert results[1].consent is None and results[1].error is not None
+
+
+def test_decode_file_aggregates_in_the_workers(consents_file):
+    counts = sum(
+        decode_file(str(consents_file), count_versions, workers=2, chunk_size=100),
+        Counter(),
+    )
+    assert counts == Counter({2: 8, 1: 4, None: 4})
+
+
+def test_decode_file_writes_a_file_per_chunk(consents_file, tmp_path):
+    process = partial(write_chunk, str(tmp_path))
+    outputs = list(decode_file(str(consents_file), process, workers=2, chunk_size=100))
+    assert len(outputs) > 1
+    lines = [
+        json.loads(line) for output in outputs for line in open(output).readlines()
+    ]
+    assert len(lines) == 16
+    assert [line["offset"] for line in lines] == sorted(
+        line["offset"] for line in lines
+    )
@@ -1,6 +1,9 @@
+import random
+from datetime import datetime
+
 import pytest
 from bitarray import bitarray
-from iab_tcf.bits import Reader
+from iab_tcf.bits import Bitfield, RangeIndex, Reader, Writer
 
 from .conftest import mapbit
 
@@ -100,3 +103,120 @@ def test_read_bitfield(input, length, output):
 def test_read_range(input, length, output):
     reader = Reader(input)
     assert reader.read_range(length) == output
+
+
+def test_read_past_the_end_pads_with_zeros():
+    reader = Reader(b"\xff")
+    assert reader.read_int(12) == 4080
+    assert reader.read_bool() is False
+    assert reader.read_int(8) == 0
+
+
+def test_seek_and_skip():
+    reader = Reader(b"\x0f\xf0")
+    reader.skip(4)
+    assert reader.position == 4
+    assert reader.read_int(8) == 255
+    reader.seek(0)
+    assert reader.read_int(4) == 0
+
+
+def test_skip_range():
+    reader = Reader(b"\x00\x01@\x00\x80\x01\x80")
+    reader.skip_range(2)
+    assert reader.position == 50
+
+
+def test_bitfield_behaves_as_a_read_only_mapping():
+    bitfield = Reader(b"\xa0").read_bitfield(4)
+    assert len(bitfield) == 4
+    assert list(bitfield) == [1, 2, 3, 4]
+    assert bitfield[1] and not bitfield[2] and bitfield[3] and not bitfield[4]
+    assert 4 in bitfield and 5 not in bitfield and 0 not in bitfield
+    assert "1" not in bitfield
+    assert bitfield.get(5, False) is False
+    with pytest.raises(KeyError):
+        bitfield[5]
+    with pytest.raises(TypeError):
+        bitfield[1] = False
+
+
+def test_bitfield_equality():
+    assert Bitfield.from_int(0b1010, 4) == Bitfield(b"\xa0", 4)
+    assert Bitfield.from_int(0b1010, 4) != Bitfield.from_int(0b1010, 5)
+    assert Bitfield.from_int(0b1010, 4) == {1: True, 2: False, 3: True, 4: False}
+
+
+def test_range_index_merges_ranges():
+    index = RangeIndex([(10, 12), (1, 3), (4, 5), (11, 20), (30, 30), (9, 8)])
+    assert index.ranges == [(1, 5), (10, 20), (30, 30)]
+    assert len(index) == 17
+    assert list(index)[:6] == [1, 2, 3, 4, 5, 10]
+    assert index == {i: True for i in list(range(1, 6)) + list(range(10, 21)) + [30]}
+
+
+def test_range_index_matches_linear_scan():
+    generator = random.Random(42)
+    ranges = []
+    for _ in range(200):
+        start = generator.randint(1, 5000)
+        ranges.append((start, start + generator.randint(0, 30)))
+    index = RangeIndex(ranges)
+    for id in range(0, 5100):
+        expected = any(start <= id <= end for start, end in ranges)
+        assert (id in index) == expected
+    assert "1" not in index
+    with pytest.raises(KeyError):
+        index[0]
+
+
+def test_long_consents_read_the_same_values(monkeypatch):
+    consent = random.Random(7).getrandbits(8 * 64).to_bytes(64, "big")
+    sizes = [random.Random(i).randint(0, 40) for i in range(50)]
+    short = Reader(consent)
+    monkeypatch.setattr(Reader, "MAX_INT_BYTES", 16)
+    long = Reader(consent)
+    assert long._value is None
+    for size in sizes + [1000]:
+        assert long.read_int(size) == short.read_int(size)
+
+
+def test_writer_writes_what_the_reader_reads():
+    writer = Writer()
+    writer.write_int(2, 6)
+    writer.write_time(datetime(2020, 9, 5, 21, 50, 29))
+    writer.write_string(b"EN")
+    writer.write_bool(True)
+    writer.write_bitfield({1: True, 3: True}, 4)
+    writer.write_bitfield(Bitfield.from_int(0b011, 3), 3)
+    writer.write_range([(2, 2), (2, 6)])
+    assert len(writer) == 6 + 36 + 12 + 1 + 4 + 3 + 50
+    reader = Reader(writer.to_bytes())
+    assert reader.read_int(6) == 2
+    assert reader.read_time().isoformat() == "2020-09-05T21:50:29"
+    assert reader.read_string(2) == b"EN"
+    assert reader.read_bool()
+    assert reader.read_bitfield(4) == {1: True, 2: False, 3: True, 4: False}
+    assert reader.read_bitfield(3) == Bitfield.from_int(0b011, 3)
+    assert reader.read_range(2) == [(2, 2), (2, 6)]
+
+
+def test_bitfield_to_int():
+    assert Bitfield.from_int(0b10110, 5).to_int() == 0b10110
+    assert Reader(b"\xf7\x80").read_bitfield(9).to_int() == 495
+
+
+def test_to_mask():
+    assert Bitfield.from_int(0b10110, 5).to_mask() == 0b01101
+    assert Bitfield.from_int(1, 9).to_mask() == 1 << 8
+    assert RangeIndex([(2, 4), (9, 9)]).to_mask() == 0b100001110
+    assert RangeIndex([]).to_mask() == 0
+
+
+def test_bitfield_from_mask():
+    assert Bitfield.from_mask(0b01101, 5) == Bitfield.from_int(0b10110, 5)
+    assert Bitfield.from_mask(1 << 8, 9) == Bitfield.from_int(1, 9)
+    assert Bitfield.from_mask(0b111, 2) == Bitfield.from_int(0b11, 2)
+    for length in (1, 8, 13):
+        bitfield = Bitfield.from_int((1 << length) // 3, length)
+        assert Bitfield.from_mask(bitfield.to_mask(), length) == bitfield
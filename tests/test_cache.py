@@ -0,0 +1,210 @@
+import pickle
+
+import pytest
+from iab_tcf import DecodeCache, SegmentCache, decode
+
+from .conftest import load_seed
+
+CONSENT_V1 = load_seed("./seed/v1/consent_a.json")["consent"]
+CONSENT_V2 = load_seed("./seed/v2/consent_a.json")["consent"]
+CONSENT_V2_B = load_seed("./seed/v2/consent_b.json")["consent"]
+CONSENT_V2_C = load_seed("./seed/v2/consent_c.json")["consent"]
+
+
+class CountingDecoder:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, consent: str):
+        self.calls += 1
+        return decode(consent)
+
+
+@pytest.fixture
+def decoder() -> CountingDecoder:
+    return CountingDecoder()
+
+
+def test_returns_the_same_consent_on_hits(decoder):
+    cache = DecodeCache(decoder=decoder)
+    consent = cache.decode(CONSENT_V2)
+    assert cache.decode(CONSENT_V2) is consent
+    assert decoder.calls == 1
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+
+def test_cached_consents_are_read_only():
+    consent = DecodeCache().decode(CONSENT_V2)
+    assert consent.is_vendor_allowed(1) == decode(CONSENT_V2).is_vendor_allowed(1)
+    with pytest.raises(AttributeError, match="read-only"):
+        consent.cmp_id = 1
+
+
+def test_cached_sections_are_read_only():
+    consent = DecodeCache().decode(CONSENT_V2_C)
+    entry = consent.pub_restriction_entries[0]
+    with pytest.raises(AttributeError):
+        consent.pub_restriction_entries.append(entry)
+    with pytest.raises(TypeError):
+        consent._pub_restrictions_index[entry.purpose_id] = []
+    with pytest.raises(AttributeError, match="read-only"):
+        entry.restriction_type = 0
+    assert isinstance(entry.restrictions_range, tuple)
+    with pytest.raises(AttributeError, match="read-only"):
+        consent.publisher_tc.purposes_consent = {}
+    restored = pickle.loads(pickle.dumps(consent))
+    assert restored.get_restriction(1, 1) == consent.get_restriction(1, 1)
+    with pytest.raises(AttributeError):
+        restored.pub_restriction_entries.append(entry)
+
+
+def test_lru_evicts_the_least_recently_used(decoder):
+    cache = DecodeCache(maxsize=2, decoder=decoder)
+    cache.decode(CONSENT_V1)
+    cache.decode(CONSENT_V2)
+    cache.decode(CONSENT_V1)
+    cache.decode(CONSENT_V2_B)
+    assert CONSENT_V1 in cache and CONSENT_V2 not in cache
+    assert cache.cache_info().evictions == 1
+
+
+def test_lfu_evicts_the_least_frequently_used(decoder):
+    cache = DecodeCache(maxsize=2, policy=DecodeCache.LFU, decoder=decoder)
+    cache.decode(CONSENT_V1)
+    cache.decode(CONSENT_V1)
+    cache.decode(CONSENT_V2)
+    cache.decode(CONSENT_V2_B)
+    assert CONSENT_V1 in cache and CONSENT_V2 not in cache
+    cache.decode(CONSENT_V2_B)
+    cache.decode(CONSENT_V2_B)
+    cache.decode(CONSENT_V2)
+    assert CONSENT_V2_B in cache and CONSENT_V1 not in cache
+    assert cache.cache_info().evictions == 2
+
+
+def test_expired_entries_are_decoded_again(decoder):
+    cache = DecodeCache(ttl=0, decoder=decoder)
+    cache.decode(CONSENT_V2)
+    cache.decode(CONSENT_V2)
+    assert decoder.calls == 2
+    assert cache.cache_info().hits == 0
+
+
+def test_failures_are_cached(decoder):
+    cache = DecodeCache(decoder=decoder)
+    for _ in range(3):
+        with pytest.raises(
+            Exception, match="Unable to process a consent with version 47"
+        ):
+            cache.decode("validbase64")
+    assert decoder.calls == 1
+
+
+def test_cached_failures_drop_their_traceback(decoder):
+    cache = DecodeCache(decoder=decoder)
+    for _ in range(2):
+        with pytest.raises(Exception, match="version 47") as raised:
+            cache.decode("validbase64")
+    entry = cache._entries["validbase64"]
+    assert entry.error.__traceback__ is None
+    assert raised.value is not entry.error
+
+
+def test_failures_loading_sections_are_cached(decoder):
+    cache = DecodeCache(decoder=decoder)
+    for _ in range(3):
+        with pytest.raises(Exception):
+            cache.decode(CONSENT_V2_B + ".a")
+    assert decoder.calls == 1
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (2, 1, 1)
+
+
+def test_failures_are_not_cached_if_disabled(decoder):
+    cache = DecodeCache(decoder=decoder, negative=False)
+    for _ in range(2):
+        with pytest.raises(Exception):
+            cache.decode("validbase64")
+    assert decoder.calls == 2 and len(cache) == 0
+
+
+def test_cache_clear(decoder):
+    cache = DecodeCache(decoder=decoder)
+    cache.decode(CONSENT_V2)
+    cache.cache_clear()
+    assert len(cache) == 0 and cache.cache_info().misses == 0
+
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        DecodeCache(maxsize=0)
+    with pytest.raises(ValueError):
+        DecodeCache(policy="fifo")
+
+
+def test_segment_cache_shares_the_core_segment():
+    cache = SegmentCache()
+    core, non_core = CONSENT_V2.split(".")
+    consent = cache.decode(CONSENT_V2)
+    core_consent = cache.decode(core)
+    assert cache.decode(core) is core_consent
+    assert consent is not core_consent
+    assert consent.consented_vendors is core_consent.consented_vendors
+    assert consent.pub_restriction_entries is core_consent.pub_restriction_entries
+    with pytest.raises(AttributeError):
+        consent.pub_restriction_entries.append(None)
+    assert cache.decode(f"{core}.{non_core}").oob_disclosed_vendors is (
+        consent.oob_disclosed_vendors
+    )
+    info = cache.cache_info()
+    assert (info.core.hits, info.core.misses) == (3, 1)
+    assert (info.non_core.hits, info.non_core.misses) == (1, 1)
+
+
+def test_segment_cache_shares_read_only_parts():
+    cache = SegmentCache()
+    core = CONSENT_V2_C.split(".")[0]
+    first = cache.decode(CONSENT_V2_C)
+    second = cache.decode(f"{core}.{CONSENT_V2.split('.')[1]}")
+    assert first._pub_restrictions_index is not second._pub_restrictions_index
+    for consent in (first, second):
+        with pytest.raises(AttributeError):
+            consent.pub_restriction_entries.append(None)
+        with pytest.raises(TypeError):
+            consent._pub_restrictions_index[1] = ()
+        with pytest.raises(AttributeError, match="read-only"):
+            consent.pub_restriction_entries[0].purpose_id = 2
+    assert second.get_restrictions(1, 1) == first.get_restrictions(1, 1)
+
+
+@pytest.mark.parametrize(
+    "consent", [CONSENT_V1, CONSENT_V2, CONSENT_V2_B, CONSENT_V2_C]
+)
+def test_segment_cache_decodes_like_decode(consent):
+    decoded = SegmentCache().decode(consent)
+    expected = decode(consent).load()
+    assert decoded.version == expected.version
+    assert decoded.is_vendor_allowed(8) == expected.is_vendor_allowed(8)
+    if expected.version == 2:
+        assert decoded.consented_vendors == expected.consented_vendors
+        for name in ("oob_disclosed_vendors", "oob_allowed_vendors"):
+            assert getattr(decoded, name, None) == getattr(expected, name, None)
+        publisher_tc = getattr(expected, "publisher_tc", None)
+        assert hasattr(decoded, "publisher_tc") == (publisher_tc is not None)
+        if publisher_tc is not None:
+            assert decoded.publisher_tc.purposes_consent == (
+                publisher_tc.purposes_consent
+            )
+    with pytest.raises(AttributeError, match="read-only"):
+        decoded.cmp_id = 1
+
+
+def test_segment_cache_errors():
+    cache = SegmentCache()
+    with pytest.raises(Exception, match="Unable to process an empty consent"):
+        cache.decode("")
+    with pytest.raises(Exception, match="Unable to process a consent with version 47"):
+        cache("validbase64")
+    cache.cache_clear()
+    assert cache.cache_info().core.misses == 0
@@ -0,0 +1,100 @@
+import csv
+import json
+
+import pytest
+from iab_tcf import encode_v2
+from iab_tcf.cli import main
+
+from .conftest import load_seed
+
+CONSENT_V1 = load_seed("./seed/v1/consent_b.json")
+CONSENT_V2 = load_seed("./seed/v2/consent_b.json")
+
+
+@pytest.fixture
+def consents(tmp_path):
+    path = tmp_path / "consents.txt"
+    path.write_text(f"{CONSENT_V1['consent']}\nvalidbase64\n{CONSENT_V2['consent']}\n")
+    return path
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_writes_jsonl(consents, tmp_path, workers):
+    output = tmp_path / "output.jsonl"
+    errors = tmp_path / "errors.jsonl"
+    argv = [str(consents), "-o", str(output), "-e", str(errors), "-w", str(workers)]
+    assert main(argv) == 1
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [record["consent"] for record in records] == [
+        CONSENT_V1["consent"],
+        CONSENT_V2["consent"],
+    ]
+    assert records[0]["cmp_id"] == CONSENT_V1["cmpId"]
+    assert records[1]["created"] == CONSENT_V2["core"]["created"]
+    assert records[1]["consent_language"] == CONSENT_V2["core"]["consentLanguage"]
+    failures = [json.loads(line) for line in errors.read_text().splitlines()]
+    assert [(failure["line"], failure["consent"]) for failure in failures] == [
+        (2, "validbase64")
+    ]
+
+
+def test_skips_blank_lines(tmp_path):
+    consents = tmp_path / "consents.txt"
+    consents.write_text(f"\n{CONSENT_V2['consent']}\n  \n\n")
+    output = tmp_path / "output.jsonl"
+    errors = tmp_path / "errors.jsonl"
+    assert main([str(consents), "-o", str(output), "-e", str(errors)]) == 0
+    assert len(output.read_text().splitlines()) == 1
+    assert errors.read_text() == ""
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_records_that_fail_to_serialize_are_errors(tmp_path, workers):
+    # The non core segment is only decoded when the record reads it.
+    consents = tmp_path / "consents.txt"
+    consents.write_text(f"{CONSENT_V2['consent']}.a\n{CONSENT_V2['consent']}\n")
+    output = tmp_path / "output.jsonl"
+    errors = tmp_path / "errors.jsonl"
+    argv = [str(consents), "-o", str(output), "-e", str(errors), "-w", str(workers)]
+    argv += ["--fields", "consent,oob_disclosed_vendors"]
+    assert main(argv) == 1
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [record["consent"] for record in records] == [CONSENT_V2["consent"]]
+    failures = [json.loads(line) for line in errors.read_text().splitlines()]
+    assert [failure["line"] for failure in failures] == [1]
+
+
+def test_writes_characters_outside_of_ascii(tmp_path):
+    # The 6 bits character 63 decodes as a byte outside of ASCII.
+    consents = tmp_path / "consents.txt"
+    consents.write_text(encode_v2({"consent_language": b"\x80A"}) + "\n")
+    output = tmp_path / "output.jsonl"
+    assert main([str(consents), "-o", str(output)]) == 0
+    assert json.loads(output.read_text())["consent_language"] == "\\x80A"
+
+
+def test_writes_csv_with_selected_fields(consents, tmp_path):
+    output = tmp_path / "output.csv"
+    main([str(consents), "-o", str(output), "-f", "csv", "--fields", "cmp_id,version"])
+    with open(output) as rows:
+        assert list(csv.DictReader(rows)) == [
+            {"cmp_id": str(CONSENT_V1["cmpId"]), "version": "1"},
+            {"cmp_id": str(CONSENT_V2["core"]["cmpId"]), "version": "2"},
+        ]
+
+
+def test_reads_stdin(monkeypatch, capsys):
+    monkeypatch.setattr("sys.stdin", [CONSENT_V2["consent"] + "\n"])
+    main(["--fields", "purposes_consent"])
+    record = json.loads(capsys.readouterr().out)
+    expected = [int(id) for id, value in CONSENT_V2["core"]["purposeConsents"].items()]
+    assert record == {"purposes_consent": sorted(expected)}
+
+
+def test_unknown_fields_are_usage_errors(consents, tmp_path, capsys):
+    output = tmp_path / "output.jsonl"
+    with pytest.raises(SystemExit) as raised:
+        main([str(consents), "-o", str(output), "--fields", "consent,cmpid"])
+    assert raised.value.code == 2
+    assert "Unknown field cmpid" in capsys.readouterr().err
+    assert not output.exists()
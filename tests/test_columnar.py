@@ -0,0 +1,62 @@
+import pytest
+from iab_tcf.iab_tcf_v2 import decode_v2
+
+from .conftest import load_seed
+
+np = pytest.importorskip("numpy")
+columnar = pytest.importorskip("iab_tcf.v2.columnar")
+
+CONSENTS = [
+    load_seed(f"./seed/v2/consent_{name}.json")["consent"] for name in "abcd"
+] + ["", "@£$%^", load_seed("./seed/v1/consent_a.json")["consent"]]
+
+
+@pytest.fixture(scope="module")
+def columns():
+    return columnar.decode_v2_columns(CONSENTS)
+
+
+def test_invalid_rows(columns):
+    assert columns["valid"].tolist() == [True] * 4 + [False] * 3
+
+
+@pytest.mark.parametrize("index", range(4))
+def test_columns_match_consent(columns, index):
+    consent = decode_v2(CONSENTS[index])
+    for name in (
+        "version",
+        "cmp_id",
+        "cmp_version",
+        "consent_screen",
+        "vendor_list_version",
+        "tcf_policy_version",
+        "is_service_specific",
+        "use_non_standard_stacks",
+        "purpose_one_treatment",
+        "consent_language",
+        "publisher_cc",
+        "max_consent_vendor_id",
+        "max_interests_vendor_id",
+        "num_pub_restrictions",
+    ):
+        assert columns[name][index] == getattr(consent, name), name
+    assert columns["created"][index] == int(consent.created.timestamp())
+    assert columns["last_updated"][index] == int(consent.last_updated.timestamp())
+    for name in (
+        "special_features_optin",
+        "purposes_consent",
+        "purposes_legitimate_interests",
+    ):
+        assert columns[name][index].tolist() == list(getattr(consent, name).values())
+
+
+@pytest.mark.parametrize("index", range(4))
+def test_vendor_matrices_match_consent(columns, index):
+    consent = decode_v2(CONSENTS[index])
+    consents = np.unpackbits(columns["vendor_consents"], axis=1)[index]
+    interests = np.unpackbits(columns["vendor_legitimate_interests"], axis=1)[index]
+    for vendor in range(1, consent.max_consent_vendor_id + 1):
+        assert bool(consents[vendor - 1]) == consent.is_vendor_allowed(vendor)
+    assert not consents[consent.max_consent_vendor_id :].any()
+    for vendor in range(1, consent.max_interests_vendor_id + 1):
+        assert bool(interests[vendor - 1]) == consent.is_interest_allowed(vendor)
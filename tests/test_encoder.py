@@ -0,0 +1,151 @@
+from datetime import datetime
+
+import pytest
+from iab_tcf import DecodeCache, decode_v2, encode_v2
+from iab_tcf.iab_tcf_v2 import ConsentV2
+
+from .conftest import load_seed
+
+HEADER_FIELDS = [
+    "version",
+    "created",
+    "last_updated",
+    "cmp_id",
+    "cmp_version",
+    "consent_screen",
+    "consent_language",
+    "vendor_list_version",
+    "tcf_policy_version",
+    "is_service_specific",
+    "use_non_standard_stacks",
+    "special_features_optin",
+    "purposes_consent",
+    "purposes_legitimate_interests",
+    "purpose_one_treatment",
+    "publisher_cc",
+    "max_consent_vendor_id",
+    "max_interests_vendor_id",
+    "num_pub_restrictions",
+]
+
+
+def assert_equivalent(consent: ConsentV2, expected: ConsentV2):
+    for name in HEADER_FIELDS:
+        assert getattr(consent, name) == getattr(expected, name), name
+    for vendor in range(1, expected.max_consent_vendor_id + 1):
+        assert consent.is_vendor_allowed(vendor) == expected.is_vendor_allowed(vendor)
+    for vendor in range(1, expected.max_interests_vendor_id + 1):
+        assert consent.is_interest_allowed(vendor) == expected.is_interest_allowed(
+            vendor
+        )
+    for entry, expected_entry in zip(
+        consent.pub_restriction_entries, expected.pub_restriction_entries
+    ):
+        assert entry.purpose_id == expected_entry.purpose_id
+        assert entry.restriction_type == expected_entry.restriction_type
+        assert entry.vendors == expected_entry.vendors
+    for name in ("oob_disclosed_vendors", "oob_allowed_vendors"):
+        assert getattr(consent, name, None) == getattr(expected, name, None)
+    if hasattr(expected, "publisher_tc"):
+        for name in type(expected.publisher_tc).__slots__:
+            assert getattr(consent.publisher_tc, name) == getattr(
+                expected.publisher_tc, name
+            )
+
+
+@pytest.mark.parametrize(
+    "file",
+    [
+        "./seed/v2/consent_a.json",
+        "./seed/v2/consent_b.json",
+        "./seed/v2/consent_c.json",
+        "./seed/v2/consent_d.json",
+    ],
+)
+def test_reencoding_gives_an_equivalent_consent(file):
+    consent = load_seed(file)["consent"]
+    encoded = encode_v2(decode_v2(consent))
+    assert len(encoded) <= len(consent)
+    assert_equivalent(decode_v2(encoded), decode_v2(consent))
+    assert encode_v2(decode_v2(encoded)) == encoded
+
+
+@pytest.mark.parametrize("range_encoding", [True, False])
+def test_forced_encoding(range_encoding):
+    consent = decode_v2(load_seed("./seed/v2/consent_b.json")["consent"])
+    encoded = decode_v2(encode_v2(consent, range_encoding=range_encoding))
+    assert encoded.is_consent_range_encoding == range_encoding
+    assert encoded.is_interests_range_encoding == range_encoding
+    assert_equivalent(encoded, consent)
+
+
+def test_chooses_the_shortest_encoding():
+    sparse = decode_v2(encode_v2({"consented_vendors": [5000]}))
+    assert sparse.is_consent_range_encoding
+    assert sparse.max_consent_vendor_id == 5000
+    dense = decode_v2(encode_v2({"consented_vendors": range(1, 300, 2)}))
+    assert not dense.is_consent_range_encoding
+    assert dense.max_consent_vendor_id == 299
+
+
+def test_encodes_a_plain_mapping():
+    created = datetime(2020, 9, 5, 21, 50, 29)
+    consent = decode_v2(
+        encode_v2(
+            {
+                "created": created,
+                "cmp_id": 300,
+                "consent_language": "ES",
+                "purposes_consent": [1, 3],
+                "consented_vendors_range": [(1, 10), (20, 20)],
+                "interests_vendors": {2: True, 4: False},
+                "pub_restriction_entries": [
+                    {
+                        "purpose_id": 2,
+                        "restriction_type": 1,
+                        "restrictions_range": [(7, 8)],
+                    }
+                ],
+                "oob_disclosed_vendors": [1, 2, 3],
+                "publisher_tc": {"purposes_consent": [2]},
+            }
+        )
+    )
+    assert consent.created == consent.last_updated == created
+    assert consent.cmp_id == 300 and consent.consent_language == b"ES"
+    assert [id for id, on in consent.purposes_consent.items() if on] == [1, 3]
+    assert consent.is_vendor_allowed(10) and not consent.is_vendor_allowed(11)
+    assert consent.is_vendor_allowed(20) and consent.max_consent_vendor_id == 20
+    assert consent.is_interest_allowed(2) and not consent.is_interest_allowed(4)
+    assert consent.get_restriction(8, 2).is_consent_required()
+    assert list(consent.oob_disclosed_vendors) == [1, 2, 3]
+    assert consent.publisher_tc.purposes_consent[2]
+
+
+def test_reencodes_a_cached_range_encoded_consent():
+    string = encode_v2(
+        {"consented_vendors": [(1, 10), (20, 30)], "interests_vendors": [(5, 9)]},
+        range_encoding=True,
+    )
+    cached = DecodeCache().decode(string)
+    assert isinstance(cached.consented_vendors_range, tuple)
+    assert_equivalent(decode_v2(encode_v2(cached)), decode_v2(string))
+
+
+def test_encodes_custom_purposes_only_with_legitimate_interest():
+    consent = decode_v2(
+        encode_v2(
+            {
+                "publisher_tc": {
+                    "custom_purposes_consent": [2],
+                    "custom_purposes_lit_transparency": [5],
+                }
+            }
+        )
+    )
+    publisher_tc = consent.publisher_tc
+    assert len(publisher_tc.custom_purposes_consent) == 5
+    assert [id for id, on in publisher_tc.custom_purposes_consent.items() if on] == [2]
+    assert [
+        id for id, on in publisher_tc.custom_purposes_lit_transparency.items() if on
+    ] == [5]
@@ -0,0 +1,158 @@
+import json
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+from iab_tcf import decode, decode_v2, encode_v2, ids_to_mask
+from iab_tcf.v2.gvl import GlobalVendorList
+
+from .conftest import load_seed
+
+VENDOR_LIST = os.path.join(os.path.dirname(__file__), "seed/gvl/vendor_list.json")
+
+
+@pytest.fixture
+def gvl() -> GlobalVendorList:
+    return GlobalVendorList.from_file(VENDOR_LIST, vendors=[1, 2, 3, 4, 8, 9])
+
+
+def expected_allowed(vendor_list, consent, vendor: int, purpose: int) -> bool:
+    """Straightforward evaluation with the consent methods, to compare with."""
+    declared = vendor_list["vendors"].get(str(vendor))
+    if declared is None or declared.get("deletedDate"):
+        return False
+    if purpose in declared["purposes"]:
+        basis = "consent"
+    elif purpose in declared["legIntPurposes"]:
+        basis = "legitimate_interest"
+    else:
+        return False
+    for entry in consent.pub_restriction_entries:
+        if entry.purpose_id != purpose or not entry.is_in_range(vendor):
+            continue
+        if entry.is_not_allowed():
+            return False
+        if purpose in declared["flexiblePurposes"]:
+            if entry.is_consent_required():
+                basis = "consent"
+            elif entry.is_legitimate_interest_required():
+                basis = "legitimate_interest"
+    if basis == "consent":
+        return consent.is_purpose_allowed(purpose) and consent.is_vendor_allowed(vendor)
+    return consent.has_purpose_legitimate_interest(
+        purpose
+    ) and consent.is_interest_allowed(vendor)
+
+
+def random_consent(generator: random.Random):
+    def ids(n):
+        return [id for id in range(1, n + 1) if generator.random() < 0.6]
+
+    return decode_v2(
+        encode_v2(
+            {
+                "purposes_consent": ids(24),
+                "purposes_legitimate_interests": ids(24),
+                "special_features_optin": ids(12),
+                "consented_vendors": ids(10),
+                "interests_vendors": ids(10),
+                "pub_restriction_entries": [
+                    {
+                        "purpose_id": generator.randint(1, 10),
+                        "restriction_type": generator.randint(0, 3),
+                        "restrictions_range": [(1, generator.randint(1, 9))],
+                    }
+                    for _ in range(generator.randint(0, 4))
+                ],
+            }
+        )
+    )
+
+
+def test_compiles_the_vendor_list(gvl):
+    assert gvl.vendor_list_version == 48
+    assert sorted(gvl.policies) == [1, 2, 3, 8]
+    assert gvl.policies[2].purposes == 0b101
+    assert gvl.policies[2].flexible_purposes == 0b110 | (1 << 6)
+    assert gvl.policies[3].special_features == 0b11
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_evaluation_matches_the_consent_signals(gvl, seed):
+    vendor_list = load_seed("./seed/gvl/vendor_list.json")
+    consent = random_consent(random.Random(seed))
+    permissions = gvl.evaluate(consent)
+    assert sorted(permissions) == [1, 2, 3, 4, 8, 9]
+    for vendor in permissions:
+        for purpose in range(1, 25):
+            expected = expected_allowed(vendor_list, consent, vendor, purpose)
+            assert gvl.is_allowed(consent, vendor, purpose) == expected
+            assert permissions[vendor].purposes[purpose] == expected
+        for feature in range(1, 13):
+            declared = vendor_list["vendors"].get(str(vendor), {})
+            expected = (
+                not declared.get("deletedDate")
+                and feature in declared.get("specialFeatures", ())
+                and consent.special_features_optin[feature]
+            )
+            assert gvl.has_special_feature(consent, vendor, feature) == bool(expected)
+            assert permissions[vendor].special_features[feature] == bool(expected)
+
+
+def test_publisher_restrictions_switch_flexible_purposes(gvl):
+    base = {
+        "purposes_consent": [2, 3],
+        "purposes_legitimate_interests": [],
+        "consented_vendors": [2],
+        "interests_vendors": [2],
+    }
+    consent = decode_v2(encode_v2(base))
+    assert not gvl.is_allowed(consent, 2, 2)
+    restricted = dict(
+        base,
+        pub_restriction_entries=[
+            {"purpose_id": 2, "restriction_type": 1, "restrictions_range": [(2, 2)]},
+            {"purpose_id": 3, "restriction_type": 0, "restrictions_range": [(2, 2)]},
+        ],
+    )
+    consent = decode_v2(encode_v2(restricted))
+    assert gvl.is_allowed(consent, 2, 2)
+    assert not gvl.is_allowed(consent, 2, 3)
+
+
+def test_allowed_purposes_line_up_with_the_consent_masks(gvl):
+    consent = decode_v2(
+        encode_v2(
+            {
+                "purposes_consent": list(range(1, 11)),
+                "purposes_legitimate_interests": [],
+                "consented_vendors": [2],
+                "interests_vendors": [],
+            }
+        )
+    )
+    allowed = gvl.allowed_purposes(consent, 2)
+    assert allowed == ids_to_mask([1, 3])
+    assert allowed & consent.purposes_consent_mask == allowed
+
+
+def test_rejects_v1_consents(gvl):
+    consent = load_seed("./seed/v1/consent_a.json")["consent"]
+    with pytest.raises(Exception, match="Unable to evaluate a consent with version 1"):
+        gvl.evaluate(decode(consent))
+
+
+def test_loads_utf8_vendor_lists(tmp_path):
+    vendor_list = load_seed("./seed/gvl/vendor_list.json")
+    vendor_list["vendors"]["2"]["name"] = "Société Générale"
+    path = tmp_path / "vendor-list.json"
+    path.write_bytes(json.dumps(vendor_list, ensure_ascii=False).encode("utf-8"))
+    # Loads it with the C locale, whose encoding is ASCII.
+    code = (
+        "from iab_tcf.v2.gvl import GlobalVendorList; "
+        f"assert GlobalVendorList.from_file({str(path)!r}).policies[2].purposes"
+    )
+    env = dict(os.environ, LC_ALL="C", PYTHONUTF8="0", PYTHONCOERCECLOCALE="0")
+    subprocess.run([sys.executable, "-c", code], check=True, env=env)
@@ -1,5 +1,5 @@
 import pytest
-from iab_tcf import decode
+from iab_tcf import base64_decode, decode, peek_version, version
 
 from .conftest import load_seed
 
@@ -43,3 +43,23 @@ def test_decode_raises_exception_if_consent_is_not_base64():
 def test_decode_raises_exception_if_consent_version_is_not_one_or_two():
     with pytest.raises(Exception, match="Unable to process a consent with version 47"):
         decode("validbase64")
+
+
+@pytest.mark.parametrize(
+    "segment, expected", [("BOE", 1), ("COw", 2), ("validbase64", 47), ("", 0)]
+)
+def test_peek_version(segment, expected):
+    assert peek_version(segment) == expected
+    assert version(base64_decode(segment + "AAA")) == expected
+
+
+def test_peek_version_raises_exception_if_not_base64():
+    with pytest.raises(ValueError):
+        peek_version("@AAA")
+
+
+def test_decode_v2_keeps_non_core_segments():
+    data = load_seed("./seed/v2/consent_a.json")
+    consent = decode(data["consent"])
+    assert consent._non_core_segments == data["consent"].split(".")
+    assert consent.oob_disclosed_vendors is not None
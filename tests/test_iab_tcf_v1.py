@@ -1,4 +1,5 @@
 import pytest
+from iab_tcf import mask_to_ids
 from iab_tcf.iab_tcf_v1 import ConsentV1, decode_v1
 
 from .conftest import load_seed, mapbit
@@ -66,3 +67,27 @@ def test_is_vendor_allowed(consent, info):
     expected = mapbit(info["maxVendorId"], trues=info["allowedVendorIds"])
     for vendor, allowed in expected.items():
         assert consent.is_vendor_allowed(vendor) == allowed
+
+
+def test_masks(consent, info):
+    assert mask_to_ids(consent.consented_vendors_mask) == sorted(
+        info["allowedVendorIds"]
+    )
+    assert mask_to_ids(consent.purposes_allowed_mask) == sorted(
+        info["allowedPurposeIds"]
+    )
+
+
+def test_vendors_are_decoded_on_demand(info):
+    consent = decode_v1(info["consent"])
+    assert consent._loaded_sections == ()
+    assert consent.max_vendor_id == info["maxVendorId"]
+    assert consent._loaded_sections == ("read_vendors",)
+
+
+def test_reader_is_dropped_once_loaded(info):
+    consent = decode_v1(info["consent"])
+    assert not hasattr(consent, "__dict__")
+    assert hasattr(consent, "_reader")
+    consent.load()
+    assert not hasattr(consent, "_reader")
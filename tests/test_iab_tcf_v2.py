@@ -1,7 +1,12 @@
+import pickle
+import sys
+import threading
 from typing import Dict
 
 import pytest
-from iab_tcf.iab_tcf_v2 import ConsentV2, decode_v2
+from iab_tcf import encode_v2, mask_to_ids
+from iab_tcf.iab_tcf_v2 import ConsentV2, PubRestrictionEntry, decode_v2
+from iab_tcf.v2 import NonCoreSegment
 
 from .conftest import load_seed, mapbit_from_dict
 
@@ -119,6 +124,23 @@ def test_is_interest_allowed(consent, core):
         assert consent.is_interest_allowed(interest) == allowed
 
 
+def test_masks(consent):
+    # Range entries can go past the max vendor id, and they are allowed too.
+    mask = consent.consented_vendors_mask
+    vendors = range(1, max(consent.max_consent_vendor_id, mask.bit_length()) + 1)
+    expected = [vendor for vendor in vendors if consent.is_vendor_allowed(vendor)]
+    assert mask_to_ids(mask) == expected
+    mask = consent.interests_vendors_mask
+    interests = range(1, max(consent.max_interests_vendor_id, mask.bit_length()) + 1)
+    expected = [vendor for vendor in interests if consent.is_interest_allowed(vendor)]
+    assert mask_to_ids(consent.interests_vendors_mask) == expected
+    expected = [id for id in range(1, 25) if consent.is_purpose_allowed(id)]
+    assert mask_to_ids(consent.purposes_consent_mask) == expected
+    features = consent.special_features_optin
+    expected = [id for id, enabled in features.items() if enabled]
+    assert mask_to_ids(consent.special_features_optin_mask) == expected
+
+
 def test_publisher_restrictions(consent, core):
     for publisher, purposes in core["publisherRestrictions"].items():
         for info in purposes:
@@ -131,6 +153,54 @@ def test_publisher_restrictions(consent, core):
             )
 
 
+def test_every_restriction_is_indexed(consent, core):
+    for publisher, purposes in core["publisherRestrictions"].items():
+        vendor_restrictions = consent.get_vendor_restrictions(int(publisher))
+        assert sorted(vendor_restrictions) == sorted(
+            info["purpose"] for info in purposes
+        )
+        for info in purposes:
+            restrictions = consent.get_restrictions(int(publisher), info["purpose"])
+            assert restrictions == vendor_restrictions[info["purpose"]]
+            assert restrictions[0] is consent.get_restriction(
+                int(publisher), info["purpose"]
+            )
+
+
+def test_get_restrictions_returns_every_match():
+    consent = decode_v2(
+        encode_v2(
+            {
+                "pub_restriction_entries": [
+                    {
+                        "purpose_id": 1,
+                        "restriction_type": 0,
+                        "restrictions_range": [(1, 5), (20, 30)],
+                    },
+                    {
+                        "purpose_id": 2,
+                        "restriction_type": 1,
+                        "restrictions_range": [(4, 4)],
+                    },
+                    {
+                        "purpose_id": 1,
+                        "restriction_type": 2,
+                        "restrictions_range": [(25, 40)],
+                    },
+                ]
+            }
+        )
+    )
+    first, second, third = consent.pub_restriction_entries
+    assert consent.get_restrictions(25, 1) == [first, third]
+    assert consent.get_restriction(25, 1) is first
+    assert consent.get_restrictions(35, 1) == [third]
+    assert consent.get_restrictions(6, 1) == []
+    assert consent.get_restriction(6, 1) is None
+    assert consent.get_vendor_restrictions(4) == {1: [first], 2: [second]}
+    assert consent.get_vendor_restrictions(50) == {}
+
+
 def test_disclosed_vendors(consent, info):
     if "disclosedVendors" in info:
         max_disclosed_vendors = len(consent.oob_disclosed_vendors)
@@ -150,3 +220,117 @@ def test_publisher_tc_purposes_lit_transparency(consent, info):
             24, info["publisherTC"]["purposeLegitimateInterests"]
         )
         assert consent.publisher_tc.purposes_lit_transparency == expected
+
+
+def test_sections_are_decoded_on_demand(info):
+    consent = decode_v2(info["consent"])
+    assert consent._loaded_sections == ()
+    consent.is_interest_allowed(1)
+    assert consent._loaded_sections == ("_load_interest_vendors",)
+
+
+def test_load_decodes_every_section(consent, core):
+    consent.load()
+    assert set(consent._loaded_sections) == {
+        "_load_consent_vendors",
+        "_load_interest_vendors",
+        "_load_pub_restriction_entries",
+        "_load_non_core_segments",
+    }
+    assert consent.max_consent_vendor_id == core["maxVendorId"]
+    assert consent.max_interests_vendor_id == core["maxVendorLegitimateInterestsId"]
+
+
+def test_decoding_state_is_dropped_once_loaded(info):
+    consent = decode_v2(info["consent"])
+    assert not hasattr(consent, "__dict__")
+    consent.is_vendor_allowed(1)
+    assert hasattr(consent, "_reader")
+    consent.load()
+    for name in ("_reader", "_sections_offsets", "_non_core_segments"):
+        assert not hasattr(consent, name)
+    for entry in consent.pub_restriction_entries:
+        assert not hasattr(entry, "__dict__")
+
+
+def test_partially_loaded_consents_can_be_pickled(info, core):
+    consent = decode_v2(info["consent"])
+    consent.is_interest_allowed(1)
+    restored = pickle.loads(pickle.dumps(consent))
+    assert restored.cmp_id == consent.cmp_id
+    assert restored.max_consent_vendor_id == core["maxVendorId"]
+    assert restored.is_vendor_allowed(1) == consent.is_vendor_allowed(1)
+
+
+def test_range_encoded_non_core_vendors():
+    # Disclosed vendors, max vendor 65535, range encoded with 2 entries:
+    # 1-65535 as a range and 7 as a single vendor.
+    bits = "001" + f"{65535:016b}" + "1" + f"{2:012b}"
+    bits += "1" + f"{1:016b}" + f"{65535:016b}" + "0" + f"{7:016b}"
+    bits += "0" * (-len(bits) % 8)
+    segment = NonCoreSegment(int(bits, 2).to_bytes(len(bits) // 8, "big"))
+    assert segment.is_disclosed_vendors()
+    vendors = segment.read_vendors()
+    assert len(vendors) == 65535
+    assert 1 in vendors and 65535 in vendors and 0 not in vendors
+    assert vendors[7] is True
+
+
+def test_sections_can_be_loaded_from_several_threads():
+    string = encode_v2(
+        {
+            "version": 2,
+            "consented_vendors": list(range(1, 600, 3)),
+            "interests_vendors": [(1, 40), (90, 300), (512, 512)],
+            "pub_restriction_entries": [
+                {
+                    "purpose_id": 2,
+                    "restriction_type": 1,
+                    "restrictions_range": [(5, 80)],
+                }
+            ],
+        },
+        range_encoding=True,
+    )
+    expected = decode_v2(string).load()
+    expected = [
+        (expected.is_vendor_allowed(vendor), expected.is_interest_allowed(vendor))
+        for vendor in (1, 4, 50, 512)
+    ] + [expected.get_restriction(7, 2).restriction_type]
+    errors = []
+
+    def read(consent, barrier):
+        barrier.wait()
+        try:
+            results = [
+                (consent.is_vendor_allowed(vendor), consent.is_interest_allowed(vendor))
+                for vendor in (1, 4, 50, 512)
+            ] + [consent.get_restriction(7, 2).restriction_type]
+            assert results == expected
+        except Exception as error:
+            errors.append(error)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for _ in range(50):
+            consent = decode_v2(string)
+            barrier = threading.Barrier(4)
+            threads = [
+                threading.Thread(target=read, args=(consent, barrier)) for _ in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert errors == []
+
+
+def test_restriction_entries_keep_their_ranges():
+    entry = PubRestrictionEntry(1, 0, iter([(1, 5)]))
+    assert entry.is_in_range(3)
+    assert entry.restrictions_range == [(1, 5)]
+    consent = decode_v2(load_seed("./seed/v2/consent_c.json")["consent"])
+    assert isinstance(consent.pub_restriction_entries[0].restrictions_range, list)
@@ -0,0 +1,115 @@
+import logging
+
+import pytest
+from iab_tcf import DecodeCache, decode, decode_v1, decode_v2, instrumentation
+from iab_tcf.instrumentation import Histograms, SlowDecodeLog, instrument
+
+from .conftest import load_seed
+
+CONSENT_V1 = load_seed("./seed/v1/consent_a.json")["consent"]
+CONSENT_V2 = load_seed("./seed/v2/consent_a.json")["consent"]
+
+
+@pytest.fixture
+def events():
+    events = []
+    with instrument(events.append):
+        yield events
+
+
+def test_decode_phases(events):
+    consent = decode(CONSENT_V2)
+    assert [event.phase for event in events] == ["base64_decode", "header", "decode"]
+    assert events[-1].details == {"version": 2, "consent": CONSENT_V2}
+    assert events[-1].bits == 213
+    consent.load()
+    phases = {event.phase: event for event in events[3:]}
+    assert set(phases) == {
+        "consent_vendors",
+        "interest_vendors",
+        "pub_restriction_entries",
+        "non_core_segments",
+    }
+    vendors = phases["consent_vendors"]
+    assert vendors.details == {
+        "consent": CONSENT_V2,
+        "range_encoding": consent.is_consent_range_encoding,
+        "entries": getattr(consent, "num_consent_entries", None),
+    }
+    assert all(event.details["consent"] == CONSENT_V2 for event in events)
+    assert not hasattr(consent, "_consent_string")
+    assert vendors.bits > 17
+    assert all(event.seconds >= 0 for event in events)
+
+
+def test_v1_vendors_phase(events):
+    decode(CONSENT_V1).load()
+    assert [event.phase for event in events][-1] == "vendors"
+
+
+@pytest.mark.parametrize(
+    "decoder, consent", [(decode_v1, CONSENT_V1), (decode_v2, CONSENT_V2)]
+)
+def test_versioned_decoders_phases(events, decoder, consent):
+    decoder(consent).load()
+    phases = [event.phase for event in events]
+    assert phases[:3] == ["base64_decode", "header", "decode"]
+    assert len(phases) > 3
+    assert all(event.details["consent"] == consent for event in events)
+
+
+def test_slow_sections_are_identified(caplog):
+    consent = decode(CONSENT_V2)
+    with caplog.at_level(logging.WARNING, logger="iab_tcf.instrumentation"):
+        with instrument(SlowDecodeLog(0)):
+            consent.is_vendor_allowed(1)
+            decode(CONSENT_V2).is_vendor_allowed(1)
+    messages = [record.getMessage() for record in caplog.records]
+    assert "Slow consent_vendors phase" in messages[0]
+    assert CONSENT_V2 not in messages[0]
+    assert "Slow consent_vendors phase" in messages[-1]
+    assert CONSENT_V2 in messages[-1]
+
+
+def test_cache_outcomes(events):
+    cache = DecodeCache()
+    cache.decode(CONSENT_V2)
+    cache.decode(CONSENT_V2)
+    outcomes = [event.details for event in events if event.phase == "cache"]
+    assert outcomes == [
+        {"outcome": "miss", "error": False},
+        {"outcome": "hit", "error": False},
+    ]
+
+
+def test_nothing_is_emitted_without_hooks():
+    events = []
+    with instrument(events.append):
+        pass
+    assert instrumentation._hooks == []
+    decode(CONSENT_V2).load()
+    assert events == []
+
+
+def test_histograms():
+    histograms = Histograms()
+    with instrument(histograms):
+        for _ in range(10):
+            decode(CONSENT_V2).load()
+    summary = histograms.summary()
+    assert summary["decode"]["count"] == 10
+    assert summary["decode"]["bits"] == 213
+    assert summary["decode"]["p50"] <= summary["decode"]["p99"]
+    with pytest.raises(KeyError):
+        histograms.percentile("unknown", 50)
+
+
+def test_slow_decode_log(caplog):
+    with caplog.at_level(logging.WARNING, logger="iab_tcf.instrumentation"):
+        with instrument(SlowDecodeLog(0)):
+            decode(CONSENT_V2)
+        with instrument(SlowDecodeLog(60)):
+            decode(CONSENT_V2)
+    messages = [record.getMessage() for record in caplog.records]
+    assert len(messages) == 3
+    assert "Slow decode phase" in messages[-1] and CONSENT_V2 in messages[-1]
@@ -0,0 +1,26 @@
+import pytest
+from iab_tcf import decode, ids_to_mask, mask_to_ids
+
+from .conftest import load_seed
+
+CONSENT_V2 = load_seed("./seed/v2/consent_a.json")["consent"]
+
+
+def test_ids_to_mask():
+    assert ids_to_mask([1, 3, 3, 10]) == 0b1000000101
+    assert ids_to_mask([0, -1]) == 0
+    assert ids_to_mask([]) == 0
+
+
+def test_mask_to_ids():
+    assert mask_to_ids(0b1000000101) == [1, 3, 10]
+    assert mask_to_ids(0) == []
+    with pytest.raises(ValueError):
+        mask_to_ids(-1)
+
+
+def test_allowed_partners():
+    consent = decode(CONSENT_V2)
+    partners = [1, 2, 8, 755, 9999]
+    allowed = mask_to_ids(consent.consented_vendors_mask & ids_to_mask(partners))
+    assert allowed == [id for id in partners if consent.is_vendor_allowed(id)]
@@ -0,0 +1,84 @@
+import pytest
+from iab_tcf import check, decode, encode_v2
+
+from .conftest import load_seed
+
+SEEDS = [
+    "./seed/v1/consent_a.json",
+    "./seed/v1/consent_b.json",
+    "./seed/v1/consent_c.json",
+    "./seed/v2/consent_a.json",
+    "./seed/v2/consent_b.json",
+    "./seed/v2/consent_c.json",
+    "./seed/v2/consent_d.json",
+]
+
+
+def max_vendor_id(consent) -> int:
+    if consent.version == 1:
+        return consent.max_vendor_id
+    return consent.max_consent_vendor_id
+
+
+@pytest.mark.parametrize("file", SEEDS)
+def test_check_vendor_matches_decode(file):
+    consent_string = load_seed(file)["consent"]
+    consent = decode(consent_string)
+    for vendor in range(0, max_vendor_id(consent) + 5):
+        assert check(consent_string, vendor=vendor) == consent.is_vendor_allowed(
+            vendor
+        ), vendor
+
+
+@pytest.mark.parametrize("file", SEEDS)
+def test_check_purposes_matches_decode(file):
+    consent_string = load_seed(file)["consent"]
+    consent = decode(consent_string)
+    for purpose in range(0, 26):
+        assert check(consent_string, purposes=[purpose]) == (
+            consent.is_purpose_allowed(purpose)
+        ), purpose
+    allowed = [id for id in range(1, 25) if consent.is_purpose_allowed(id)]
+    assert check(consent_string, purposes=allowed)
+    assert check(consent_string)
+
+
+def test_check_special_features():
+    consent_string = encode_v2({"special_features_optin": [1, 2]})
+    assert check(consent_string, special_features=[1, 2])
+    assert not check(consent_string, special_features=[1, 3])
+    assert not check(consent_string, special_features=[13])
+    v1 = load_seed("./seed/v1/consent_a.json")["consent"]
+    assert check(v1, special_features=[])
+    assert not check(v1, special_features=[1])
+
+
+def test_check_requires_every_condition():
+    consent_string = encode_v2(
+        {
+            "purposes_consent": [1, 2],
+            "consented_vendors": [10],
+            "max_consent_vendor_id": 20,
+        }
+    )
+    assert check(consent_string, vendor=10, purposes=[1, 2])
+    assert not check(consent_string, vendor=11, purposes=[1, 2])
+    assert not check(consent_string, vendor=10, purposes=[1, 3])
+
+
+def test_check_raises_exception_if_consent_is_not_supported():
+    with pytest.raises(Exception, match="Unable to process an empty consent"):
+        check("")
+    with pytest.raises(Exception, match="Unable to process a consent with version 47"):
+        check("validbase64", vendor=1)
+
+
+@pytest.mark.parametrize("range_encoding", [True, False])
+def test_check_vendor_at_the_end_of_a_long_consent(range_encoding):
+    vendors = list(range(1, 3000, 3))
+    consent_string = encode_v2(
+        {"consented_vendors": vendors}, range_encoding=range_encoding
+    )
+    assert check(consent_string, vendor=2998)
+    assert not check(consent_string, vendor=2999)
+    assert not check(consent_string, vendor=3001)
@@ -0,0 +1,66 @@
+import pytest
+from iab_tcf import RawDecoder, decode, decode_raw
+from iab_tcf.raw import COOKIE_V1, QUERY_PARAMETER
+
+from .conftest import load_seed
+
+V1 = load_seed("./seed/v1/consent_a.json")["consent"]
+V2 = load_seed("./seed/v2/consent_a.json")["consent"]
+
+
+def assert_same_consent(consent, expected):
+    assert consent.version == expected.version
+    assert consent.cmp_id == expected.cmp_id
+    assert consent.created == expected.created
+    for vendor in range(1, 100):
+        assert consent.is_vendor_allowed(vendor) == expected.is_vendor_allowed(vendor)
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        f"euconsent-v2={V2}",
+        f"_ga=GA1.2.3; euconsent-v2={V2}; other=value",
+        f'session=abc;euconsent-v2="{V2}"',
+    ],
+)
+def test_decodes_from_a_cookie_header(header):
+    consent = decode_raw(header.encode())
+    assert_same_consent(consent, decode(V2))
+    assert consent.oob_disclosed_vendors == decode(V2).oob_disclosed_vendors
+
+
+def test_decodes_from_a_query_string_memoryview():
+    query = memoryview(f"/bid?gdpr=1&{QUERY_PARAMETER.decode()}={V1}&x=2".encode())
+    assert_same_consent(decode_raw(query, QUERY_PARAMETER), decode(V1))
+
+
+def test_finds_the_cookie_by_its_whole_name():
+    header = f"euconsent-v2={V2}; euconsent={V1}".encode()
+    assert decode_raw(header, COOKIE_V1).version == 1
+    assert decode_raw(header).version == 2
+    assert decode_raw(b"xeuconsent-v2=" + V2.encode()) is None
+    assert decode_raw(b"a=b") is None
+
+
+def test_find_returns_a_view_of_the_value():
+    header = bytearray(f"a=b; euconsent-v2={V2}".encode())
+    value = RawDecoder().find(header)
+    assert isinstance(value, memoryview)
+    assert value.obj is header
+    assert value.tobytes() == V2.encode()
+
+
+def test_reuses_the_decoder_between_consents():
+    decoder = RawDecoder()
+    first = decoder(f"euconsent-v2={V2}".encode())
+    second = decoder(b"euconsent-v2=" + V2.split(".")[0][:20].encode())
+    assert_same_consent(first, decode(V2))
+    assert second.cmp_id == first.cmp_id
+
+
+def test_raises_exception_if_consent_is_empty_or_invalid():
+    with pytest.raises(Exception, match="Unable to process an empty consent"):
+        decode_raw(b"euconsent-v2=; a=b")
+    with pytest.raises(Exception, match="Unable to process a consent with version 47"):
+        decode_raw(b"euconsent-v2=validbase64")
@@ -0,0 +1,93 @@
+import json
+from calendar import timegm
+
+import pytest
+from iab_tcf import ConsentSerializer, decode, encode_v2, to_dict, to_json
+from iab_tcf.serialization import V1_FIELDS, V2_FIELDS
+
+from .conftest import load_seed
+
+
+@pytest.fixture(
+    params=[
+        "./seed/v1/consent_a.json",
+        "./seed/v1/consent_c.json",
+        "./seed/v2/consent_a.json",
+        "./seed/v2/consent_c.json",
+        "./seed/v2/consent_d.json",
+    ]
+)
+def consent(request):
+    return decode(load_seed(request.param)["consent"])
+
+
+def expand(ranges):
+    return [id for start, end in ranges for id in range(start, end + 1)]
+
+
+def test_schema(consent):
+    record = to_dict(consent)
+    fields = V1_FIELDS if consent.version == 1 else V2_FIELDS
+    assert tuple(record) == fields
+    assert json.loads(to_json(consent)) == record
+    assert record["created"] == timegm(consent.created.utctimetuple())
+    assert to_dict(consent, timestamps="iso")["created"] == (
+        consent.created.isoformat()
+    )
+    assert isinstance(record["consent_language"], str)
+
+
+def test_vendors(consent):
+    ids = to_dict(consent)["consented_vendors"]
+    ranges = to_dict(consent, vendors="ranges")["consented_vendors"]
+    assert ids == sorted(ids) and expand(ranges) == ids
+    assert all(consent.is_vendor_allowed(id) for id in ids)
+    assert len(ids) == bin(consent.consented_vendors_mask).count("1")
+
+
+def test_v2_sections():
+    consent = decode(load_seed("./seed/v2/consent_c.json")["consent"])
+    record = ConsentSerializer(vendors="ranges").to_dict(consent)
+    entry = consent.pub_restriction_entries[0]
+    assert record["pub_restriction_entries"][0] == {
+        "purpose_id": entry.purpose_id,
+        "restriction_type": entry.restriction_type,
+        "vendors": [list(pair) for pair in entry.vendors.ranges],
+    }
+    purposes = consent.publisher_tc.purposes_consent
+    assert record["publisher_tc"]["purposes_consent"] == [
+        id for id, enabled in purposes.items() if enabled
+    ]
+    assert record["oob_disclosed_vendors"] is None
+
+
+def test_field_selection(consent):
+    serializer = ConsentSerializer(fields=["cmp_id", "version", "publisher_cc"])
+    publisher_cc = consent.publisher_cc.decode() if consent.version == 2 else None
+    assert serializer.to_dict(consent) == {
+        "cmp_id": consent.cmp_id,
+        "version": consent.version,
+        "publisher_cc": publisher_cc,
+    }
+    assert serializer.to_row(consent) == (consent.cmp_id, consent.version, publisher_cc)
+
+
+def test_characters_outside_of_ascii_are_escaped():
+    # The 6 bits character 63 decodes as the byte 0x80.
+    consent = decode(encode_v2({"consent_language": b"\x80A", "publisher_cc": b"Z["}))
+    assert to_dict(consent, ["consent_language", "publisher_cc"]) == {
+        "consent_language": "\\x80A",
+        "publisher_cc": "Z[",
+    }
+    assert json.loads(to_json(consent))["consent_language"] == "\\x80A"
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        ConsentSerializer(vendors="bits")
+    with pytest.raises(ValueError):
+        ConsentSerializer(timestamps="local")
+    with pytest.raises(ValueError, match="Unknown field cmpid"):
+        ConsentSerializer(fields=["cmp_id", "cmpid"])
+    with pytest.raises(ValueError, match="Unknown field _reader"):
+        to_dict(decode(encode_v2({})), ["_reader"])
@@ -0,0 +1,156 @@
+import pytest
+from iab_tcf import (
+    ConsentError,
+    ConsentLimitError,
+    InvalidConsentError,
+    Limits,
+    UnsupportedVersionError,
+    decode,
+    decode_raw,
+    decode_v1,
+    decode_v2,
+    encode_v2,
+    validate,
+    validation,
+)
+
+from .conftest import load_seed
+
+CONSENT_V1 = load_seed("./seed/v1/consent_a.json")["consent"]
+CONSENT_V2 = load_seed("./seed/v2/consent_a.json")["consent"]
+# Its legitimate interests section declares more range entries than fit in it.
+CONSENT_V2_TRUNCATED = load_seed("./seed/v2/consent_d.json")["consent"]
+
+
+@pytest.mark.parametrize(
+    "consent, version", [(CONSENT_V1, 1), (CONSENT_V2, 2), (CONSENT_V2 + ".", 2)]
+)
+def test_valid_consents(consent, version):
+    assert validate(consent) == version
+    assert decode(consent, limits=Limits()).version == version
+
+
+@pytest.mark.parametrize(
+    "consent, error",
+    [
+        ("", InvalidConsentError),
+        ("@£$%^", InvalidConsentError),
+        ("COw.a b", InvalidConsentError),
+        ("C", InvalidConsentError),
+        ("COwAAAAA", InvalidConsentError),
+        ("validbase64", UnsupportedVersionError),
+        (CONSENT_V2_TRUNCATED, InvalidConsentError),
+        (CONSENT_V2 + ".AA" * 4, ConsentLimitError),
+    ],
+)
+def test_invalid_consents(consent, error):
+    with pytest.raises(error):
+        validate(consent)
+    with pytest.raises(ConsentError):
+        decode(consent, limits=Limits())
+
+
+def test_declared_vendors_must_fit():
+    consent = encode_v2(
+        {"consented_vendors": [1], "max_consent_vendor_id": 0xFFFF},
+        range_encoding=False,
+    )
+    assert validate(consent) == 2
+    # Declares a bitfield of 65535 vendors in a few bytes.
+    with pytest.raises(InvalidConsentError, match="that needs"):
+        validate(consent[:60])
+
+
+def test_limits():
+    consent = encode_v2(
+        {
+            "consented_vendors": [(1, 2), (10, 20), (40, 40)],
+            "interests_vendors": [900],
+        },
+        range_encoding=True,
+    )
+    assert validate(consent) == 2
+    with pytest.raises(ConsentLimitError, match="max vendor id 900"):
+        validate(consent, Limits(max_vendor_id=500))
+    with pytest.raises(ConsentLimitError, match="3 range entries"):
+        validate(consent, Limits(max_range_entries=2))
+    with pytest.raises(ConsentLimitError, match="longer than 10"):
+        validate(consent, Limits(max_length=10))
+
+
+def test_range_entries_respect_the_max_vendor_id():
+    consent = encode_v2(
+        {
+            "consented_vendors": [1, 2],
+            "pub_restriction_entries": [
+                {
+                    "purpose_id": 1,
+                    "restriction_type": 0,
+                    "restrictions_range": [(1, 3), (600, 600)],
+                }
+            ],
+        },
+        range_encoding=True,
+    )
+    assert validate(consent, Limits(max_vendor_id=600)) == 2
+    with pytest.raises(ConsentLimitError, match="vendor id 600"):
+        validate(consent, Limits(max_vendor_id=500))
+
+
+def test_out_of_band_vendors_respect_the_limits():
+    for name in ("oob_disclosed_vendors", "oob_allowed_vendors"):
+        consent = encode_v2(
+            {"consented_vendors": [1], name: [(1, 2), (800, 900)]},
+            range_encoding=True,
+        )
+        assert validate(consent, Limits(max_vendor_id=900)) == 2
+        with pytest.raises(ConsentLimitError, match="max vendor id 900"):
+            validate(consent, Limits(max_vendor_id=500))
+        with pytest.raises(ConsentLimitError, match="2 range entries"):
+            decode(consent, limits=Limits(max_range_entries=1))
+
+
+def test_out_of_band_vendors_must_fit():
+    consent = encode_v2(
+        {"consented_vendors": [1], "oob_disclosed_vendors": [0xFFFF]},
+        range_encoding=False,
+    )
+    # Declares a bitfield of 65535 vendors in a few bytes.
+    truncated = consent[: consent.index(".") + 20]
+    with pytest.raises(InvalidConsentError, match="that needs"):
+        validate(truncated)
+
+
+def test_core_is_decoded_once(monkeypatch):
+    decoded = []
+    base64_decode = validation.base64_decode
+
+    def counting_base64_decode(segment):
+        decoded.append(segment)
+        return base64_decode(segment)
+
+    monkeypatch.setattr(validation, "base64_decode", counting_base64_decode)
+    assert decode(CONSENT_V2, limits=Limits()).version == 2
+    # The out of band segments aren't decoded again until they're loaded.
+    assert decoded == CONSENT_V2.split(".")
+
+
+def test_base64_errors_are_typed():
+    for decoder in (decode, decode_v1, decode_v2):
+        for consent in ("C", "CAAAA", "COéabc"):
+            with pytest.raises(InvalidConsentError, match="isn't base64"):
+                decoder(consent)
+    with pytest.raises(InvalidConsentError, match="isn't base64"):
+        decode_raw(b"euconsent-v2=CAAAA")
+    for segment in ("a", "Ié"):
+        consent = decode(CONSENT_V2 + "." + segment)
+        with pytest.raises(InvalidConsentError, match="isn't base64"):
+            consent.load()
+
+
+def test_errors_are_typed():
+    with pytest.raises(InvalidConsentError, match="empty consent"):
+        decode("")
+    with pytest.raises(UnsupportedVersionError, match="version 47"):
+        decode("validbase64")
+    assert issubclass(InvalidConsentError, ValueError)